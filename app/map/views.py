@@ -3,16 +3,18 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from kismet.models import Device, Scan, Packet, Client
 from django.db.models import Avg
+from kismet.cache import cache_response
 
 @login_required
 def map_view(request):
    return render(request, 'map/map.html')
 
+@cache_response('map-aps')
 def api_aps(request):
    scan_ids = request.GET.get('scan_id')
 
    if scan_ids:
-      scan_ids = [int(x) for x in scan_ids.split(',') if x.isdigit()]
+      scan_ids = [int(x) for x in scan_ids.split(',') if x.strip().isdigit()]
       aps = Device.objects.filter(scan_id__in=scan_ids)
    else:
       aps = Device.objects.all()
@@ -70,6 +72,7 @@ def api_monitoring_path(request):
 
    return JsonResponse(data, safe=False)
 
+@cache_response('map-client-graph')
 def api_client_graph(request):
    scan_ids = request.GET.get('scan_id')
 
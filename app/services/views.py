@@ -8,6 +8,7 @@ import os
 import json
 import shutil
 import signal
+from kismet.jobs import enqueue_import
 
 # =========================
 # === KISMET SETTINGS ===
@@ -68,13 +69,9 @@ def run_kismet(request):
 
 @login_required
 def stop_kismet(request):
-    subprocess.run(
-        ["sudo", IMPORT_SCRIPT],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        check=False
-    )
-    return JsonResponse({"status": "stopped"})
+    # Stopping and importing run as a background job; poll /api/jobs/<job_id>/
+    job = enqueue_import(stop_script=IMPORT_SCRIPT)
+    return JsonResponse({"status": "stopping", "job_id": job.id})
 
 
 @login_required
@@ -0,0 +1,6 @@
+try:
+    from .celery import app as celery_app
+except ImportError:  # celery not installed: kismet.jobs uses its in-process worker
+    celery_app = None
+
+__all__ = ('celery_app',)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -103,6 +104,41 @@ DATABASES = {
     }
 }
 
+# Background jobs (kismet.jobs)
+# Without a reachable broker jobs run on an in-process worker thread instead
+
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+
+# Chart / map response cache (kismet.cache)
+# An in-process LRU cache by default; set ANALYTICS_CACHE_URL (redis://...) to
+# share the cached responses between processes. Either way entries are keyed
+# on Scan.cache_version, read from the database, so an import or purge made by
+# any process (CLI, Celery worker, another web worker) retires them at once
+
+ANALYTICS_CACHE_URL = os.environ.get('ANALYTICS_CACHE_URL')
+ANALYTICS_CACHE_TIMEOUT = int(os.environ.get('ANALYTICS_CACHE_TIMEOUT', 600))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': ANALYTICS_CACHE_URL,
+        'KEY_PREFIX': 'analytics',
+        'TIMEOUT': ANALYTICS_CACHE_TIMEOUT,
+    } if ANALYTICS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'analytics',
+        'TIMEOUT': ANALYTICS_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('ANALYTICS_CACHE_MAX_ENTRIES', 500)),
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,141 @@
+import functools
+import hashlib
+
+from django.core.cache import caches
+from django.db.models import Count, F, Max, Sum
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from .models import Scan
+
+# Django cache alias holding cached responses and hit / miss counters
+ANALYTICS_CACHE = "analytics"
+
+# Endpoint names wrapped by cache_response(), for stats()
+CACHED_ENDPOINTS = set()
+
+
+def analytics_cache():
+    return caches[ANALYTICS_CACHE]
+
+
+def scan_ids_param(request):
+    """The request's ?scan_id=1,2,3 as a list of ints, or None when absent."""
+    raw = request.GET.get("scan_id")
+    if not raw:
+        return None
+    return [int(sid) for sid in raw.split(",") if sid.strip().isdigit()]
+
+
+def scan_versions(scan_ids):
+    """
+    Current Scan.cache_version of the given scans, as sorted (id, version)
+    pairs with None for scans that no longer exist, or, when scan_ids is
+    None, a (scans, newest id, sum of versions) triple of every scan that
+    changes whenever any scan is bumped, added or deleted. Read from the
+    database, so a bump made by any process is seen at once.
+    """
+    if scan_ids is None:
+        totals = Scan.objects.aggregate(n=Count("id"), newest=Max("id"), versions=Sum("cache_version"))
+        return (totals["n"], totals["newest"], totals["versions"])
+    versions = dict(Scan.objects.filter(pk__in=scan_ids).values_list("pk", "cache_version"))
+    return sorted((sid, versions.get(sid)) for sid in scan_ids)
+
+
+def bump_scan_versions(*scan_ids):
+    """
+    Invalidates every cached response covering the given scans, and every
+    response over all scans, by moving their Scan.cache_version on. Called
+    after a scan is imported, edited or purged, inside the transaction
+    making the change when there is one; with no ids every scan is bumped.
+    """
+    scans = Scan.objects.filter(pk__in=scan_ids) if scan_ids else Scan.objects.all()
+    scans.update(cache_version=F("cache_version") + 1)
+
+
+def _count(endpoint, outcome):
+    cache = analytics_cache()
+    key = f"stats:{outcome}:{endpoint}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats():
+    """
+    Hit and miss counters, in total and per endpoint, since the cache was
+    last cleared. They live in the analytics cache: per process with the
+    default LocMemCache, shared between processes with Redis.
+    """
+    cache = analytics_cache()
+    endpoints = sorted(CACHED_ENDPOINTS)
+    counts = cache.get_many(
+        [f"stats:{outcome}:{endpoint}" for endpoint in endpoints for outcome in ("hits", "misses")]
+    )
+    per_endpoint = {
+        endpoint: {
+            "hits": counts.get(f"stats:hits:{endpoint}", 0),
+            "misses": counts.get(f"stats:misses:{endpoint}", 0),
+        }
+        for endpoint in endpoints
+    }
+    hits = sum(c["hits"] for c in per_endpoint.values())
+    misses = sum(c["misses"] for c in per_endpoint.values())
+    return {
+        "backend": type(cache).__name__,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "endpoints": per_endpoint,
+    }
+
+
+def _entry_key(endpoint, scan_ids, versions, request):
+    params = sorted((name, tuple(values)) for name, values in request.GET.lists() if name != "scan_id")
+    digest = hashlib.sha1(repr((scan_ids, versions, params)).encode()).hexdigest()
+    return f"response:{endpoint}:{digest}"
+
+
+def cache_response(endpoint, every_scan=False):
+    """
+    Caches a view's successful responses per endpoint, scan id set and
+    query parameters, under the versions of the scans covered, so an
+    import, edit or purge (see bump_scan_versions) retires them. Wraps DRF
+    actions, whose Response data is cached, and plain Django views, whose
+    rendered content is. every_scan=True keys the entry on the all-scans
+    version, for results that depend on scans outside ?scan_id=, while
+    still keeping one entry per scan id set.
+    """
+    CACHED_ENDPOINTS.add(endpoint)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            request = args[-1]  # view(request) or action(self, request)
+            scan_ids = scan_ids_param(request)
+            if scan_ids is not None:
+                scan_ids = sorted(set(scan_ids))
+            versions = scan_versions(None if every_scan else scan_ids)
+            key = _entry_key(endpoint, scan_ids, versions, request)
+
+            cache = analytics_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                _count(endpoint, "hits")
+                kind, content_type, payload = cached
+                if kind == "data":
+                    return Response(payload)
+                return HttpResponse(payload, content_type=content_type)
+
+            _count(endpoint, "misses")
+            response = view(*args, **kwargs)
+            if response.status_code == 200:
+                if isinstance(response, Response):
+                    cache.set(key, ("data", None, response.data))
+                else:
+                    cache.set(key, ("content", response["Content-Type"], response.content))
+            return response
+        return wrapper
+    return decorator
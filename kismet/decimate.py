@@ -0,0 +1,123 @@
+# Degrees GPS positions are rounded to (about 1 m) before comparing them
+POSITION_PRECISION = 5
+
+
+class _DeviceWindow:
+    __slots__ = ("window", "max_signal", "position", "pending")
+
+    def __init__(self, window):
+        self.window = window
+        self.max_signal = None
+        self.position = None
+        self.pending = None
+
+
+class PacketDecimator:
+    """
+    Sampling policy for Kismet packets rows. Per transmitting MAC and per
+    window of `seconds`, the first and the last packet are kept, plus every
+    packet that raises the device's strongest signal so far or reports a new
+    GPS position; the rest are dropped.
+
+    The last packet of a window is only known once the window closes, so it
+    is held back until then: until the device's next packet falls in a later
+    window, or release() is given a time past the window's end. Held
+    packets carry over from chunk to chunk, so the result does not depend
+    on the chunk size. With follow=True (a capture still growing) windows
+    left open at the end of an import stay held for the next one; otherwise
+    the importer releases them all at the end of the file. One instance
+    can be reused across chunks and imports of the same capture.
+    """
+
+    def __init__(self, seconds, follow=False):
+        if seconds <= 0:
+            raise ValueError("decimation window must be positive")
+        self.seconds = seconds
+        self.follow = follow
+        self._devices = {}
+
+    def _position(self, row):
+        lat, lon = row['lat'], row['lon']
+        if not lat and not lon:
+            return None
+        return (round(lat, POSITION_PRECISION), round(lon, POSITION_PRECISION))
+
+    def filter(self, rows):
+        """Splits rows into (kept, dropped) lists, keeping their order."""
+        kept = []
+        dropped = []
+
+        for row in rows:
+            window = row['ts_sec'] // self.seconds
+            device = self._devices.get(row['sourcemac'])
+            signal = row['signal']
+            position = self._position(row)
+
+            if device is None or device.window != window:
+                if device is None:
+                    device = self._devices[row['sourcemac']] = _DeviceWindow(window)
+                else:
+                    if device.pending is not None:
+                        kept.append(device.pending)
+                    device.window = window
+                    device.pending = None
+                # First packet of the window
+                kept.append(row)
+                if signal is not None and (device.max_signal is None or signal > device.max_signal):
+                    device.max_signal = signal
+                if position is not None:
+                    device.position = position
+                continue
+
+            keep = False
+            if signal is not None and (device.max_signal is None or signal > device.max_signal):
+                device.max_signal = signal
+                keep = True
+            if position is not None and position != device.position:
+                device.position = position
+                keep = True
+
+            if keep:
+                if device.pending is not None:
+                    dropped.append(device.pending)
+                    device.pending = None
+                kept.append(row)
+            else:
+                # Last packet of the window so far
+                if device.pending is not None:
+                    dropped.append(device.pending)
+                device.pending = row
+
+        return kept, dropped
+
+    def hold(self, row):
+        """
+        Holds row back again as the last packet of its window, e.g. a row an
+        interrupted import held (see ImportState.packets_held). A row
+        already held is left alone.
+        """
+        device = self._devices.get(row['sourcemac'])
+        if device is None:
+            device = self._devices[row['sourcemac']] = _DeviceWindow(row['ts_sec'] // self.seconds)
+        if device.pending is None:
+            device.window = row['ts_sec'] // self.seconds
+            device.pending = row
+
+    def held(self):
+        """The rows currently held back."""
+        return [device.pending for device in self._devices.values() if device.pending is not None]
+
+    def release(self, before_ts=None):
+        """
+        Returns the held-back packets of windows ending at or before
+        before_ts, or of every window when it is None; they then count as
+        kept.
+        """
+        released = []
+        for device in self._devices.values():
+            if device.pending is None:
+                continue
+            if before_ts is None or (device.window + 1) * self.seconds <= before_ts:
+                released.append(device.pending)
+                device.pending = None
+        return released
@@ -0,0 +1,135 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json decodes the same documents
+    orjson = None
+
+# Device columns filled from the Kismet device JSON, in the order of
+# extract_device(); the tuple it returns ends with the client edges.
+DEVICE_JSON_FIELDS = (
+    "avg_signal", "last_signal", "packets_seen", "clients_count",
+    "ssid", "channel", "encryption", "manufacturer",
+    "probed_ssids", "advertised_ssids", "device_json",
+)
+
+
+def loads(val):
+    """json.loads through orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        try:
+            return orjson.loads(val)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN and integers past 64 bits; json does not
+            pass
+    return json.loads(val)
+
+
+def safe_json_load(val):
+    """Safely parse JSON strings or return dict if already parsed."""
+    if not val:
+        return {}
+    if isinstance(val, dict):
+        return val
+    try:
+        return loads(val)
+    except (json.JSONDecodeError, TypeError):
+        return {}
+
+
+def extract_latlon(block):
+    if not block:
+        return (None, None)
+    point = block.get("kismet.common.location.geopoint")
+    if isinstance(point, list) and len(point) == 2:
+        return (point[1], point[0])  # lat, lon
+    return (None, None)
+
+
+def client_edges(devmac, dot11):
+    """
+    Client edges of one device from both AP and Client perspectives, as
+    (client_mac, rank, fields) tuples. first_time/last_time stay Kismet
+    epoch seconds; see parser.collect_clients for how edges are merged.
+    """
+    edges = []
+
+    # 1. Perspective: This device is an AP. Map its associated clients.
+    # The key is the client MAC, value is the internal Kismet key.
+    associated_map = dot11.get("dot11.device.associated_client_map", {})
+    for client_mac, client_key in associated_map.items():
+        edges.append((client_mac, (False, 0, devmac or ""), {
+            "bssid": devmac,
+            "bssid_key": None,
+            "is_associated": True,
+            "client_type": "Associated",
+            "decrypted": False,
+            "datasize": 0,
+            "num_retries": 0,
+            "first_time": None,
+            "last_time": None,
+            "last_lat": None,
+            "last_lon": None,
+            "client_json": {"kismet_key": client_key},
+        }))
+
+    # 2. Perspective: This device is a Client. Map the AP it is talking to.
+    if not devmac:
+        return edges
+
+    client_map = dot11.get("dot11.device.client_map", {})
+    for _, client_data in client_map.items():
+        loc = client_data.get("dot11.client.location", {})
+        last_lat, last_lon = extract_latlon(loc.get("kismet.common.location.last"))
+
+        target_bssid = client_data.get("dot11.client.bssid")
+        if not target_bssid or target_bssid == "00:00:00:00:00:00":
+            continue
+
+        last_ts = client_data.get("dot11.client.last_time") or 0
+        edges.append((devmac, (True, last_ts, target_bssid), {
+            "bssid": target_bssid,
+            "bssid_key": client_data.get("dot11.client.bssid_key"),
+            "is_associated": False,
+            "client_type": client_data.get("dot11.client.type"),
+            "decrypted": bool(client_data.get("dot11.client.decrypted", 0)),
+            "datasize": client_data.get("dot11.client.datasize", 0),
+            "num_retries": client_data.get("dot11.client.num_retries", 0),
+            "first_time": client_data.get("dot11.client.first_time"),
+            "last_time": client_data.get("dot11.client.last_time"),
+            "last_lat": last_lat,
+            "last_lon": last_lon,
+            "client_json": client_data,
+        }))
+
+    return edges
+
+
+def extract_device(item):
+    """
+    Decodes one (devmac, is_wifi, device blob) item into the
+    DEVICE_JSON_FIELDS values followed by its client edges. Pure Python with
+    no Django imports, so it can run in worker processes.
+    """
+    devmac, is_wifi, blob = item
+    d_json = safe_json_load(blob)
+    signal_data = d_json.get("kismet.device.base.signal", {})
+    dot11 = d_json.get("dot11.device", {})
+
+    assoc_map = dot11.get("dot11.device.associated_client_map", {})
+
+    return (
+        signal_data.get("kismet.common.signal.avg_signal", None),
+        signal_data.get("kismet.common.signal.last_signal", None),
+        d_json.get("kismet.device.base.packets", 0),
+        len(assoc_map) if assoc_map else 0,
+        d_json.get("kismet.device.base.name"),
+        d_json.get("kismet.device.base.channel"),
+        d_json.get("kismet.device.base.crypt"),
+        d_json.get("kismet.device.base.manuf"),
+        dot11.get("dot11.device.probed_ssid_map", []),
+        dot11.get("dot11.device.advertised_ssid_map", []),
+        d_json,
+        client_edges(devmac, dot11) if is_wifi else [],
+    )
+
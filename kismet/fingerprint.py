@@ -0,0 +1,91 @@
+import hashlib
+import os
+from contextlib import closing
+
+from .pcap import iter_frames
+from .reader import open_kismet_db
+
+# Tables whose MAX(rowid) goes into the fingerprint; an O(log n) lookup each
+FINGERPRINT_TABLES = ("devices", "packets", "alerts", "data", "datasources")
+
+# Bytes at each end of a pcap / pcapng capture that go into its fingerprint
+CAPTURE_SAMPLE_BYTES = 64 * 1024
+
+
+def _sha1(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else repr(part).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def fingerprint_kismet_file(file_path):
+    """
+    Cheap identity of a Kismet log, without reading it through.
+
+    fingerprint changes whenever the content does: it covers the file size,
+    sqlite page count, the first and last pages on disk and the highest rowid
+    of every imported table. origin stays the same while Kismet keeps
+    appending to the file: it is built from the first packet row, which
+    Kismet writes once and never rewrites, so a renamed or copied file still
+    matches its Scan and a different file with the same name does not. Logs
+    without packets fall back to the earliest device; an empty log has no
+    origin (see resolve_scan for how those are matched).
+    """
+    size = os.path.getsize(file_path)
+
+    with closing(open_kismet_db(file_path)) as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        max_rowids = tuple(
+            conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0]
+            for table in FINGERPRINT_TABLES
+        )
+        first_packet = conn.execute(
+            "SELECT ts_sec, ts_usec, sourcemac, destmac, packet_len FROM packets "
+            "ORDER BY rowid LIMIT 1"
+        ).fetchone()
+        first_device = conn.execute(
+            "SELECT first_time, devkey FROM devices ORDER BY first_time, devkey LIMIT 1"
+        ).fetchone()
+
+    with open(file_path, "rb") as f:
+        first_page = f.read(page_size)
+        f.seek(max(0, size - page_size))
+        last_page = f.read(page_size)
+
+    origin = None
+    if first_packet:
+        origin = _sha1("packet", tuple(first_packet))
+    elif first_device:
+        origin = _sha1("device", tuple(first_device))
+
+    return {
+        "fingerprint": _sha1(size, page_count, first_page, last_page, max_rowids),
+        "origin": origin,
+        "size": size,
+    }
+
+
+def fingerprint_capture_file(file_path):
+    """
+    fingerprint_kismet_file() for pcap and pcapng captures. fingerprint
+    covers the file size and its first and last CAPTURE_SAMPLE_BYTES;
+    origin is built from the first frame, which stays put while the capture
+    is appended to. Raises ValueError for files that are not captures.
+    """
+    size = os.path.getsize(file_path)
+
+    with open(file_path, "rb") as f:
+        head = f.read(CAPTURE_SAMPLE_BYTES)
+        f.seek(max(0, size - CAPTURE_SAMPLE_BYTES))
+        tail = f.read(CAPTURE_SAMPLE_BYTES)
+        f.seek(0)
+        first_frame = next(iter_frames(f), None)
+
+    return {
+        "fingerprint": _sha1(size, head, tail),
+        "origin": _sha1(*first_frame) if first_frame else None,
+        "size": size,
+    }
@@ -0,0 +1,82 @@
+from django.db.models import Case, Count, FloatField, IntegerField, Value, When
+from django.db.models.functions import Cast, Floor
+
+# Model field types a histogram can be computed over
+NUMERIC_FIELD_TYPES = {
+    "IntegerField", "BigIntegerField", "SmallIntegerField",
+    "PositiveIntegerField", "PositiveBigIntegerField", "PositiveSmallIntegerField",
+    "FloatField",
+}
+
+# Bins returned at most; a narrower width is refused rather than truncated
+MAX_HISTOGRAM_BINS = 1000
+
+
+def numeric_fields(model):
+    """Names of the model's plain numeric columns (no keys)."""
+    return sorted(
+        f.name for f in model._meta.concrete_fields
+        if f.get_internal_type() in NUMERIC_FIELD_TYPES and not f.primary_key
+    )
+
+
+def _in_range(queryset, field, min_value, max_value):
+    queryset = queryset.exclude(**{f"{field}__isnull": True})
+    if min_value is not None:
+        queryset = queryset.filter(**{f"{field}__gte": min_value})
+    if max_value is not None:
+        queryset = queryset.filter(**{f"{field}__lte": max_value})
+    return queryset
+
+
+def bin_counts(queryset, field, width, min_value=None, max_value=None):
+    """
+    Counts rows per fixed-width bin of a numeric field with one GROUP BY
+    FLOOR(field / width) query; only (bin start, count) pairs leave the
+    database. Bins start at multiples of width, empty ones are left out.
+    """
+    if width <= 0:
+        raise ValueError("bin width must be positive")
+
+    rows = list(
+        _in_range(queryset, field, min_value, max_value)
+            .annotate(histogram_bin=Floor(Cast(field, FloatField()) / Value(float(width))))
+            .values_list("histogram_bin")
+            .annotate(count=Count("pk"))
+            .order_by("histogram_bin")[:MAX_HISTOGRAM_BINS + 1]
+    )
+    if len(rows) > MAX_HISTOGRAM_BINS:
+        raise ValueError(f"more than {MAX_HISTOGRAM_BINS} bins, use a wider bin width")
+    return [{"bin": int(b) * width, "count": count} for b, count in rows]
+
+
+def category_counts(queryset, field, thresholds, labels=None, min_value=None, max_value=None):
+    """
+    Counts rows per category of a numeric field, computed with a CASE
+    expression in the GROUP BY. thresholds are lower bounds, checked from
+    the highest down: a value >= thresholds[0] falls in the first category,
+    anything below the lowest threshold in the last one. labels name the
+    len(thresholds) + 1 categories; every category is returned, in order,
+    even when empty.
+    """
+    thresholds = sorted(thresholds, reverse=True)
+    if not thresholds:
+        raise ValueError("at least one threshold is needed")
+    if labels is None:
+        labels = [f">= {t}" for t in thresholds] + [f"< {thresholds[-1]}"]
+    if len(labels) != len(thresholds) + 1:
+        raise ValueError(f"{len(thresholds)} thresholds need {len(thresholds) + 1} labels")
+
+    category = Case(
+        *[When(**{f"{field}__gte": t}, then=Value(i)) for i, t in enumerate(thresholds)],
+        default=Value(len(thresholds)),
+        output_field=IntegerField(),
+    )
+    counts = dict(
+        _in_range(queryset, field, min_value, max_value)
+            .annotate(histogram_category=category)
+            .values_list("histogram_category")
+            .annotate(count=Count("pk"))
+            .order_by()
+    )
+    return [{"category": label, "count": counts.get(i, 0)} for i, label in enumerate(labels)]
@@ -0,0 +1,64 @@
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+from .reader import current_rss_mb
+
+
+class _QueryCounter:
+    """execute_wrapper that counts queries and samples RSS around each one."""
+
+    def __init__(self):
+        self.queries = 0
+        self.peak_rss_mb = current_rss_mb()
+
+    def sample(self):
+        self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        # Queries are issued once per chunk, so this tracks the chunk peaks
+        self.sample()
+        return execute(sql, params, many, context)
+
+
+class ImportProfiler:
+    """
+    Records wall time, rows, rows/sec, query count and peak RSS for each
+    stage of an import. Stages are kept in order in self.stages.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Profiles the enclosed block; set record["rows"] inside it."""
+        record = {"rows": 0}
+        counter = _QueryCounter()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(counter):
+                yield record
+        finally:
+            counter.sample()
+            elapsed = time.perf_counter() - started
+            record.update({
+                "seconds": round(elapsed, 4),
+                "rows_per_sec": round(record["rows"] / elapsed, 1) if elapsed else 0.0,
+                "queries": counter.queries,
+                "peak_rss_mb": round(counter.peak_rss_mb, 1),
+            })
+            self.stages[name] = record
+
+
+def format_stages(stages):
+    """Per-stage table lines for management command output."""
+    lines = [f"  {'stage':<12}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'queries':>9}{'peak MB':>9}"]
+    for name, s in stages.items():
+        lines.append(
+            f"  {name:<12}{s['rows']:>10}{s['seconds']:>10.2f}{s['rows_per_sec']:>12.0f}"
+            f"{s['queries']:>9}{s['peak_rss_mb']:>9.1f}"
+        )
+    return lines
@@ -0,0 +1,151 @@
+import queue
+import subprocess
+import threading
+import time
+
+from django.db import connections
+from django.utils import timezone
+
+from .models import Job
+from .parser import import_kismet_file
+from .purge import purge_scan
+
+# Progress is written at most this often so a fast import is not slowed by it
+PROGRESS_INTERVAL = 1.0
+
+_local_queue = queue.Queue()
+_local_worker = None
+_local_lock = threading.Lock()
+
+
+def enqueue_import(file_path=None, stop_script=None):
+    """
+    Queues a Kismet import. With stop_script, the job first runs
+    '<stop_script> --stop-only' (stops Kismet and prints LATEST_DB=<path>)
+    and imports the file it reports.
+    """
+    job = Job.objects.create(
+        kind="import",
+        params={"file_path": file_path, "stop_script": stop_script},
+    )
+    dispatch(job)
+    return job
+
+
+def enqueue_purge(scan):
+    """Queues the deletion of a scan, or returns the purge already queued for it."""
+    job = Job.objects.filter(kind="purge", scan=scan, status__in=["queued", "running"]).first()
+    if job:
+        return job
+    job = Job.objects.create(kind="purge", scan=scan, params={"scan_id": scan.pk})
+    dispatch(job)
+    return job
+
+
+def dispatch(job):
+    """Hands the job to Celery, or to the in-process worker when no broker answers."""
+    try:
+        from .tasks import run_job_task
+        # One quick connection attempt instead of kombu's retry loop
+        with run_job_task.app.connection_for_write() as conn:
+            conn.ensure_connection(max_retries=1, interval_start=0, interval_step=0)
+        run_job_task.apply_async(args=[job.id], retry=False)
+    except Exception:
+        # celery missing or the broker is down
+        _start_local_worker()
+        _local_queue.put(job.id)
+
+
+def _start_local_worker():
+    global _local_worker
+    with _local_lock:
+        if _local_worker is None or not _local_worker.is_alive():
+            _local_worker = threading.Thread(target=_local_loop, name="gloopie-jobs", daemon=True)
+            _local_worker.start()
+
+
+def _local_loop():
+    # One job at a time, so imports never compete with each other on the Pi
+    while True:
+        job_id = _local_queue.get()
+        try:
+            run_job(job_id)
+        finally:
+            connections.close_all()
+            _local_queue.task_done()
+
+
+def run_job(job_id):
+    """Runs a queued job to completion, recording its status and progress."""
+    job = Job.objects.get(pk=job_id)
+    if job.status != "queued":
+        return
+
+    job.status = "running"
+    job.started_at = timezone.now()
+    job.save(update_fields=["status", "started_at"])
+
+    try:
+        RUNNERS[job.kind](job)
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+    else:
+        job.status = "success"
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at", "stage", "rows_done", "rows_total", "scan"])
+
+
+def _progress_writer(job):
+    last_write = [0.0]
+
+    def progress(stage, rows_done, rows_total):
+        job.stage, job.rows_done, job.rows_total = stage, rows_done, rows_total
+        now = time.monotonic()
+        if now - last_write[0] >= PROGRESS_INTERVAL:
+            last_write[0] = now
+            Job.objects.filter(pk=job.pk).update(stage=stage, rows_done=rows_done, rows_total=rows_total)
+
+    return progress
+
+
+def _stop_kismet(job, stop_script):
+    job.stage = "stopping"
+    job.save(update_fields=["stage"])
+
+    result = subprocess.run(
+        ["sudo", stop_script, "--stop-only"],
+        capture_output=True, text=True, check=False
+    )
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith("LATEST_DB="):
+            return line.split("=", 1)[1].strip()
+    raise RuntimeError(result.stderr.strip() or result.stdout.strip() or "No .kismet file to import")
+
+
+def run_import_job(job):
+    file_path = job.params.get("file_path")
+    stop_script = job.params.get("stop_script")
+    if stop_script:
+        file_path = _stop_kismet(job, stop_script)
+        job.params["file_path"] = file_path
+        job.save(update_fields=["params"])
+
+    scan = import_kismet_file(file_path, progress=_progress_writer(job))
+    job.scan = scan
+    job.stage = "done"
+    job.rows_done = job.rows_total = max(job.rows_done, job.rows_total)
+
+
+def run_purge_job(job):
+    purge_scan(job.params["scan_id"], progress=_progress_writer(job))
+    # The scan row is gone; scan_id stays in params
+    job.scan = None
+    job.stage = "done"
+    job.rows_done = job.rows_total = max(job.rows_done, job.rows_total)
+
+
+RUNNERS = {
+    "import": run_import_job,
+    "purge": run_purge_job,
+}
@@ -0,0 +1,169 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+import os
+import json
+import time
+import tempfile
+from kismet.instrumentation import format_stages
+from kismet.parser import import_kismet_file
+from kismet.purge import purge_scan
+from kismet.synthetic import generate_kismet_db
+
+# Named generator settings; --devices/--clients/--packets define a "custom" one
+PRESETS = {
+    "small": {"devices": 500, "clients": 200, "packets": 20_000, "alerts": 50, "data": 500},
+    "medium": {"devices": 2000, "clients": 800, "packets": 200_000, "alerts": 200, "data": 2000},
+    "large": {"devices": 10_000, "clients": 4000, "packets": 2_000_000, "alerts": 1000, "data": 10_000},
+}
+
+# Stages faster than this are too noisy to flag as regressions
+MIN_COMPARE_SECONDS = 0.05
+
+
+def best_stages(runs):
+    """Per stage, the fastest of several runs' profiler records."""
+    best = {}
+    for stages in runs:
+        for name, record in stages.items():
+            if name not in best or record["seconds"] < best[name]["seconds"]:
+                best[name] = record
+    return best
+
+
+def compare_stages(current, baseline, tolerance):
+    """
+    Yields (size, stage, baseline rows/s, current rows/s, change, regressed)
+    for every stage present in both results.
+    """
+    for size, result in current.items():
+        if size not in baseline:
+            continue
+        old_stages = baseline[size]["stages"]
+        for name, new in result["stages"].items():
+            old = old_stages.get(name)
+            if not old or not old["rows_per_sec"]:
+                continue
+            change = new["rows_per_sec"] / old["rows_per_sec"] - 1
+            slow_enough = max(new["seconds"], old["seconds"]) >= MIN_COMPARE_SECONDS
+            yield size, name, old["rows_per_sec"], new["rows_per_sec"], change, slow_enough and change < -tolerance
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic Kismet logs, import them and report per-stage throughput. '
+        'Usage: python manage.py benchmark_import --size small --repeat 3 --save bench.json'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', action='append', choices=sorted(PRESETS),
+                            help='Preset to run (repeatable; default: small)')
+        parser.add_argument('--devices', type=int, help='Run a custom size with this many devices')
+        parser.add_argument('--clients', type=int, help='Clients for the custom size (default: 40%% of devices)')
+        parser.add_argument('--packets', type=int, help='Packets for the custom size (default: 100 per device)')
+        parser.add_argument('--repeat', type=int, default=1, help='Imports per size; the fastest run of each stage is kept')
+        parser.add_argument('--work-dir', type=str, help='Where generated files are kept and reused (default: a temporary directory)')
+        parser.add_argument('--decode-workers', type=int, default=1, help='Passed to import_kismet_file')
+        parser.add_argument('--no-copy', action='store_true', help='Insert packets with bulk_create even on PostgreSQL')
+        parser.add_argument('--keep', action='store_true', help='Keep the imported scans instead of deleting them')
+        parser.add_argument('--save', type=str, help='Write the results to this JSON file')
+        parser.add_argument('--compare', type=str, help='JSON file from an earlier --save to compare against')
+        parser.add_argument('--tolerance', type=float, default=20.0,
+                            help='Percent rows/s drop per stage reported as a regression with --compare')
+
+    def handle(self, *args, **options):
+        sizes = {name: PRESETS[name] for name in options['size'] or []}
+        if options['devices']:
+            devices = options['devices']
+            sizes["custom"] = {
+                "devices": devices,
+                "clients": options['clients'] if options['clients'] is not None else devices * 2 // 5,
+                "packets": options['packets'] if options['packets'] is not None else devices * 100,
+                "alerts": max(1, devices // 10),
+                "data": devices,
+            }
+        if not sizes:
+            sizes["small"] = PRESETS["small"]
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)["results"]
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+
+        if options['work_dir']:
+            os.makedirs(options['work_dir'], exist_ok=True)
+            work_dir, tmp = options['work_dir'], None
+        else:
+            tmp = tempfile.TemporaryDirectory(prefix="kismet-bench-")
+            work_dir = tmp.name
+
+        try:
+            results = {name: self._run_size(name, params, work_dir, options) for name, params in sizes.items()}
+        finally:
+            if tmp:
+                tmp.cleanup()
+
+        if options['save']:
+            with open(options['save'], "w") as f:
+                json.dump({
+                    "database": connection.vendor,
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "results": results,
+                }, f, indent=2)
+            self.stdout.write(f"Results saved to {options['save']}")
+
+        if baseline is not None:
+            self._compare(results, baseline, options['tolerance'])
+
+    def _run_size(self, name, params, work_dir, options):
+        path = os.path.join(
+            work_dir, "bench-{devices}d-{clients}c-{packets}p-{alerts}a-{data}r.kismet".format(**params)
+        )
+        if not os.path.exists(path):
+            self.stdout.write(self.style.NOTICE(f"[{name}] generating {os.path.basename(path)} ..."))
+            generate_kismet_db(path, **params)
+
+        runs = []
+        totals = []
+        for i in range(options['repeat']):
+            started = time.perf_counter()
+            scan = import_kismet_file(
+                path,
+                full=True,
+                record_run=False,
+                use_copy=False if options['no_copy'] else None,
+                decode_workers=options['decode_workers'],
+            )
+            totals.append(time.perf_counter() - started)
+            runs.append(scan.import_stats["stages"])
+            # The next run must not find the file already imported; purged
+            # like any scan, so its partition and registry counts go too
+            if not options['keep']:
+                purge_scan(scan.id, vacuum=False)
+
+        stages = best_stages(runs)
+        total = min(totals)
+        rows = sum(s["rows"] for s in stages.values())
+        self.stdout.write(
+            f"[{name}] {params['devices']} devices, {params['clients']} clients, {params['packets']} packets: "
+            f"best of {len(totals)} in {total:.2f}s ({rows / total:.0f} rows/s, "
+            f"{os.path.getsize(path) / 1_048_576 / total:.1f} MB/s)"
+        )
+        for line in format_stages(stages):
+            self.stdout.write(line)
+        return {"params": params, "seconds": round(total, 4), "stages": stages}
+
+    def _compare(self, results, baseline, tolerance):
+        self.stdout.write(f"  {'size':<8}{'stage':<12}{'baseline/s':>12}{'now/s':>12}{'change':>9}")
+        regressions = 0
+        for size, name, old, new, change, regressed in compare_stages(results, baseline, tolerance / 100):
+            line = f"  {size:<8}{name:<12}{old:>12.0f}{new:>12.0f}{change:>+9.1%}"
+            if regressed:
+                regressions += 1
+                line = self.style.ERROR(line + "  regression")
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"{regressions} stage(s) more than {tolerance:g}% slower than the baseline.")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+import os
+from kismet.synthetic import generate_kismet_db
+
+
+class Command(BaseCommand):
+    help = (
+        'Write a synthetic .kismet sqlite log for testing and benchmarking imports. '
+        'Usage: python manage.py generate_kismet /path/to/out.kismet --devices 1000 --packets 100000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('out_path', type=str, help='Kismet sqlite DB to create')
+        parser.add_argument('--devices', type=int, default=1000, help='Devices in the log, APs and clients included')
+        parser.add_argument('--clients', type=int, help='How many of the devices are Wi-Fi clients associated to an AP (default: 40%% of devices)')
+        parser.add_argument('--packets', type=int, default=100_000, help='Packets rows')
+        parser.add_argument('--alerts', type=int, default=100, help='Alerts rows')
+        parser.add_argument('--data', type=int, default=1000, help='Data rows')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed writes the same file')
+        parser.add_argument('--force', action='store_true', help='Overwrite out_path if it exists')
+
+    def handle(self, *args, **options):
+        out_path = options['out_path']
+        if os.path.exists(out_path):
+            if not options['force']:
+                raise CommandError(f"{out_path} already exists (use --force to overwrite)")
+            os.remove(out_path)
+
+        counts = generate_kismet_db(
+            out_path,
+            devices=options['devices'],
+            clients=options['clients'],
+            packets=options['packets'],
+            alerts=options['alerts'],
+            data=options['data'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {out_path}: {counts['devices']} devices ({counts['clients']} clients), "
+            f"{counts['packets']} packets, {counts['alerts']} alerts, {counts['data']} data rows "
+            f"({os.path.getsize(out_path) / 1_048_576:.1f} MB)"
+        ))
@@ -1,25 +1,162 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 import os
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import timedelta
+from django.db import connections
 from django.utils import timezone
 import requests
+from kismet.decimate import PacketDecimator
+from kismet.instrumentation import format_stages
 from kismet.parser import import_kismet_file
 
+
+def resolve_db_paths(patterns):
+    """Expands files, directories (their *.kismet files) and glob patterns."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(glob.glob(os.path.join(pattern, "*.kismet"))))
+        elif any(c in pattern for c in "*?["):
+            paths.extend(sorted(p for p in glob.glob(pattern) if os.path.isfile(p)))
+        else:
+            paths.append(pattern)
+
+    # Keep the first occurrence of a file listed twice
+    return list(dict.fromkeys(paths))
+
+
+def _init_worker():
+    # Workers started with spawn/forkserver need their own app registry;
+    # each opens its own DB connection on first query.
+    import django
+    django.setup()
+
+
+def _import_one(db_path, import_options):
+    """Imports one file and returns a picklable per-file summary."""
+    started = time.monotonic()
+    import_options = dict(import_options)
+    decimate = import_options.pop("decimate", None)
+    if decimate:
+        import_options["decimator"] = PacketDecimator(decimate)
+    try:
+        scan = import_kismet_file(db_path, **import_options)
+    except Exception as e:
+        return {"path": db_path, "error": str(e), "elapsed": time.monotonic() - started}
+    finally:
+        connections.close_all()
+
+    return {
+        "path": db_path,
+        "scan_id": scan.id,
+        "stats": scan.import_stats,
+        "elapsed": time.monotonic() - started,
+    }
+
+
 class Command(BaseCommand):
-    help = 'Import a Kismet sqlite DB into Django models. Usage: python manage.py import_kismet /path/to/kismet.db'
+    help = (
+        'Import Kismet sqlite DBs into Django models. Usage: python manage.py import_kismet /path/to/kismet.db '
+        '(several files, directories or globs can be given; --workers imports them in parallel)'
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument('db_path', type=str, help='Path to the Kismet sqlite DB file')
+        parser.add_argument('db_path', type=str, nargs='+', help='Kismet sqlite DB files, directories or glob patterns')
+        parser.add_argument('--workers', type=int, default=1, help='Number of files imported in parallel (one process each)')
+        parser.add_argument('--device-chunk-size', type=int, help='Devices rows read and upserted per chunk')
+        parser.add_argument('--packet-chunk-size', type=int, help='Packets rows read and inserted per chunk')
+        parser.add_argument('--max-rss-mb', type=int, help='Shrink chunk sizes whenever the import grows past this many MB')
+        parser.add_argument('--full', action='store_true', help='Ignore the fingerprint and saved high-water marks and re-import every row')
+        parser.add_argument('--decode-workers', type=int, default=1,
+                            help='Processes decoding device JSON within each file; the pool only pays off on '
+                                 'logs with many large device records (default: 1, decode in the importing process)')
+        parser.add_argument('--decimate', type=int, metavar='SECONDS',
+                            help='Store only the first and last packet per device per SECONDS window, '
+                                 'plus packets with a new max signal or GPS position')
+        parser.add_argument('--no-copy', action='store_true', help='Insert packets with bulk_create even on PostgreSQL')
 
     def handle(self, *args, **options):
-        db_path = options['db_path']
-        if not os.path.isfile(db_path):
-            raise CommandError(f"DB file not found: {db_path}")
-
-        self.stdout.write(self.style.NOTICE(f"Importing {db_path} ..."))
-        try:
-            import_kismet_file(db_path)
-        except Exception as e:
-            raise CommandError(f"Import failed: {e}")
+        db_paths = resolve_db_paths(options['db_path'])
+        if not db_paths:
+            raise CommandError("No Kismet DB files matched.")
+        for db_path in db_paths:
+            if not os.path.isfile(db_path):
+                raise CommandError(f"DB file not found: {db_path}")
+
+        chunk_sizes = {}
+        if options['device_chunk_size']:
+            chunk_sizes['devices'] = options['device_chunk_size']
+        if options['packet_chunk_size']:
+            chunk_sizes['packets'] = options['packet_chunk_size']
+        if options['decimate'] is not None and options['decimate'] <= 0:
+            raise CommandError("--decimate must be a positive number of seconds.")
+        workers = max(1, min(options['workers'], len(db_paths), os.cpu_count() or 1))
+        if options['decode_workers'] < 1:
+            raise CommandError("--decode-workers must be at least 1.")
+
+        import_options = {
+            "chunk_sizes": chunk_sizes,
+            "max_rss_mb": options['max_rss_mb'],
+            "full": options['full'],
+            "use_copy": False if options['no_copy'] else None,
+            "decode_workers": options['decode_workers'],
+            "decimate": options['decimate'],
+        }
+
+        started = time.monotonic()
+        failed = 0
+
+        if workers == 1:
+            for db_path in db_paths:
+                self.stdout.write(self.style.NOTICE(f"Importing {db_path} ..."))
+                failed += self._report(_import_one(db_path, import_options))
+        else:
+            self.stdout.write(self.style.NOTICE(f"Importing {len(db_paths)} files with {workers} workers ..."))
+            # Forked workers must not share the parent's DB sockets
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = [pool.submit(_import_one, db_path, import_options) for db_path in db_paths]
+                for future in as_completed(futures):
+                    failed += self._report(future.result())
+
+        if len(db_paths) > 1:
+            self.stdout.write(
+                f"{len(db_paths) - failed}/{len(db_paths)} files imported in {time.monotonic() - started:.1f}s"
+            )
+        if failed:
+            raise CommandError(f"Import failed for {failed} file(s).")
         self.stdout.write(self.style.SUCCESS("Import completed successfully."))
+
+    def _report(self, result):
+        """Prints the per-file summary. Returns 1 when the import failed."""
+        name = os.path.basename(result['path'])
+        if "error" in result:
+            self.stderr.write(self.style.ERROR(f"{name}: import failed: {result['error']}"))
+            return 1
+
+        stats = result['stats']
+        elapsed = result['elapsed']
+        if stats['status'] == "unchanged":
+            self.stdout.write(f"{name}: unchanged since it was imported as scan {result['scan_id']}, skipped ({elapsed * 1000:.0f} ms)")
+            return 0
+        if stats['status'] == "grown":
+            self.stdout.write(f"{name}: grew since the last import of scan {result['scan_id']}, importing new rows only")
+        rows = stats['devices'] + stats['clients'] + stats['packets'] + stats['alerts'] + stats['data']
+        self.stdout.write(
+            f"{name}: {stats['devices']} devices, {stats['clients']} clients, {stats['packets']} packets "
+            f"({stats['packets_unresolved']} with an unresolved devkey), "
+            f"{stats['alerts']} alerts, {stats['data']} data rows "
+            f"in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        if stats['packets_dropped']:
+            read = stats['packets'] + stats['packets_dropped']
+            self.stdout.write(
+                f"{name}: decimation kept {stats['packets']} of {read} packets "
+                f"({stats['packets_dropped'] / read:.1%} reduction)"
+            )
+        for line in format_stages(stats['stages']):
+            self.stdout.write(line)
+        return 0
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand, CommandError
+import os
+import glob
+import time
+from kismet.instrumentation import format_stages
+from kismet.models import Scan
+from kismet.parser import import_pcap_file
+
+PCAP_PATTERNS = ("*.pcap", "*.pcapng")
+
+
+def resolve_pcap_paths(patterns):
+    """Expands files, directories (their pcap/pcapng files) and glob patterns."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(
+                p for ext in PCAP_PATTERNS for p in glob.glob(os.path.join(pattern, ext))
+            ))
+        elif any(c in pattern for c in "*?["):
+            paths.extend(sorted(p for p in glob.glob(pattern) if os.path.isfile(p)))
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+
+class Command(BaseCommand):
+    help = (
+        'Import pcap/pcapng captures (radiotap or 802.11) into Packet rows. '
+        'Usage: python manage.py import_pcap /path/to/capture.pcapng [--scan ID]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('pcap_path', type=str, nargs='+', help='pcap/pcapng files, directories or glob patterns')
+        parser.add_argument('--scan', type=int, help='Add the packets to this existing scan, linked to its devices by source MAC')
+        parser.add_argument('--chunk-size', type=int, help='Packets written per chunk')
+        parser.add_argument('--no-copy', action='store_true', help='Insert packets with bulk_create even on PostgreSQL')
+        parser.add_argument('--full', action='store_true',
+                            help='Ignore the fingerprint and frames already imported and re-import the whole capture')
+
+    def handle(self, *args, **options):
+        paths = resolve_pcap_paths(options['pcap_path'])
+        if not paths:
+            raise CommandError("No pcap files matched.")
+        for path in paths:
+            if not os.path.isfile(path):
+                raise CommandError(f"pcap file not found: {path}")
+
+        scan = None
+        if options['scan'] is not None:
+            try:
+                scan = Scan.objects.get(pk=options['scan'])
+            except Scan.DoesNotExist:
+                raise CommandError(f"Scan {options['scan']} does not exist.")
+
+        for path in paths:
+            self.stdout.write(self.style.NOTICE(f"Importing {path} ..."))
+            started = time.monotonic()
+            try:
+                result = import_pcap_file(
+                    path,
+                    scan=scan,
+                    chunk_size=options['chunk_size'],
+                    use_copy=False if options['no_copy'] else None,
+                    full=options['full'],
+                )
+            except ValueError as e:
+                raise CommandError(f"{os.path.basename(path)}: {e}")
+
+            stats = result.import_stats
+            elapsed = time.monotonic() - started
+            if stats['status'] == "unchanged":
+                self.stdout.write(
+                    f"{os.path.basename(path)}: unchanged since it was imported as scan {result.id}, skipped"
+                )
+                continue
+            if stats['status'] == "grown":
+                self.stdout.write(
+                    f"{os.path.basename(path)}: grew since the last import of scan {result.id}, importing new frames only"
+                )
+            self.stdout.write(
+                f"{os.path.basename(path)}: {stats['packets']} packets into scan {result.id} "
+                f"({stats['skipped']} frames skipped) in {elapsed:.2f}s "
+                f"({stats['packets'] / elapsed if elapsed else 0:.0f} packets/s)"
+            )
+            for line in format_stages(stats['stages']):
+                self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS("Import completed successfully."))
@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connections
+import os
+import glob
+import time
+from kismet.decimate import PacketDecimator
+from kismet.parser import import_kismet_file
+
+# Small chunks keep each poll's memory and write bursts low on the Pi
+LIVE_CHUNK_SIZES = {
+    "devices": 100,
+    "packets": 1000,
+    "alerts": 200,
+    "data": 200,
+}
+
+
+def newest_kismet_file(log_dir):
+    """Returns the most recently modified .kismet file in log_dir, if any."""
+    files = glob.glob(os.path.join(log_dir, "*.kismet"))
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def file_signature(db_path):
+    """(size, mtime) of the DB and its WAL; changes whenever Kismet writes."""
+    signature = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            signature.append(None)
+        else:
+            signature.append((st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+
+class Command(BaseCommand):
+    help = (
+        'Follow the .kismet file Kismet is writing and import new devices and packets every few seconds. '
+        'Usage: python manage.py ingest_live [/path/to/kismet.db]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('db_path', type=str, nargs='?', help='Kismet sqlite DB to follow (default: newest file in --log-dir)')
+        parser.add_argument('--log-dir', type=str, default=os.path.join(settings.BASE_DIR, 'kismet', 'logs'),
+                            help='Directory searched for the newest .kismet file')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls')
+        parser.add_argument('--nice', type=int, default=10, help='Niceness increment so capture keeps priority')
+        parser.add_argument('--max-rss-mb', type=int, help='Shrink chunk sizes whenever a poll grows past this many MB')
+        parser.add_argument('--decimate', type=int, metavar='SECONDS',
+                            help='Store only the first and last packet per device per SECONDS window, '
+                                 'plus packets with a new max signal or GPS position')
+        parser.add_argument('--once', action='store_true', help='Run a single poll and exit')
+
+    def handle(self, *args, **options):
+        if options['nice']:
+            os.nice(options['nice'])
+
+        fixed_path = options['db_path']
+        if fixed_path and not os.path.isfile(fixed_path):
+            raise CommandError(f"DB file not found: {fixed_path}")
+
+        if options['decimate'] is not None and options['decimate'] <= 0:
+            raise CommandError("--decimate must be a positive number of seconds.")
+
+        db_path = None
+        last_signature = None
+        self.decimator = None
+
+        try:
+            while True:
+                current = fixed_path or newest_kismet_file(options['log_dir'])
+                if current != db_path:
+                    db_path, last_signature = current, None
+                    # Windows carry over between polls of the same capture
+                    self.decimator = PacketDecimator(options['decimate'], follow=True) if options['decimate'] else None
+                    if db_path:
+                        self.stdout.write(self.style.NOTICE(f"Following {db_path}"))
+
+                if db_path:
+                    # A stat() is all an idle poll costs
+                    signature = file_signature(db_path)
+                    if signature != last_signature and self._poll(db_path, options):
+                        last_signature = signature
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.NOTICE("Stopped."))
+
+    def _poll(self, db_path, options):
+        """Imports whatever is new in db_path. Returns False when the poll failed."""
+        try:
+            scan = import_kismet_file(
+                db_path,
+                chunk_sizes=LIVE_CHUNK_SIZES,
+                max_rss_mb=options['max_rss_mb'],
+                # A run every few seconds would flood the ImportRun history
+                record_run=False,
+                decimator=self.decimator,
+            )
+        except Exception as e:
+            # Kismet may be mid-checkpoint; the next interval retries
+            self.stderr.write(self.style.WARNING(f"Poll failed: {e}"))
+            connections.close_all()
+            return False
+
+        stats = scan.import_stats
+        if stats['devices'] or stats['packets'] or stats['alerts'] or stats['data']:
+            self.stdout.write(
+                f"{time.strftime('%H:%M:%S')} {scan}: +{stats['devices']} devices, "
+                f"+{stats['packets']} packets, +{stats['alerts']} alerts, +{stats['data']} data rows"
+                + (f" ({stats['packets_dropped']} packets decimated)" if stats['packets_dropped'] else "")
+            )
+        return True
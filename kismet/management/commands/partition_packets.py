@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+import time
+from kismet.partitions import default_partition_scans, ensure_packet_partition, packets_partitioned
+
+
+class Command(BaseCommand):
+    help = (
+        'Move packets imported before partitioning out of the default partition, one partition per scan. '
+        'Usage: python manage.py partition_packets [--scan ID ...]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scan', type=int, action='append', help='Only move this scan (repeatable)')
+
+    def handle(self, *args, **options):
+        if not packets_partitioned():
+            raise CommandError("The packets table is not partitioned (PostgreSQL only; run migrate first).")
+
+        scan_ids = options['scan'] or default_partition_scans()
+        if not scan_ids:
+            self.stdout.write("No packets left in the default partition.")
+            return
+
+        for scan_id in scan_ids:
+            started = time.monotonic()
+            # One transaction per scan, so an interrupted run keeps what it moved
+            moved = ensure_packet_partition(scan_id)
+            self.stdout.write(f"Scan {scan_id}: {moved} packets moved in {time.monotonic() - started:.1f}s")
+        self.stdout.write(self.style.SUCCESS("Partitioning completed successfully."))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+import time
+from kismet.jobs import enqueue_purge
+from kismet.models import Scan
+from kismet.purge import PURGE_BATCH_SIZE, purge_scan
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete scans and all their rows with batched set-based SQL, then reclaim the space. '
+        'Usage: python manage.py purge_scan SCAN_ID [SCAN_ID ...]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scan_ids', type=int, nargs='+', help='Scans to delete')
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help='Rows deleted per statement')
+        parser.add_argument('--no-vacuum', action='store_true', help='Skip VACUUM after deleting')
+        parser.add_argument('--background', action='store_true', help='Queue a purge job per scan instead of deleting now')
+
+    def handle(self, *args, **options):
+        scans = list(Scan.objects.filter(pk__in=options['scan_ids']))
+        missing = set(options['scan_ids']) - {scan.pk for scan in scans}
+        if missing:
+            raise CommandError(f"Scan(s) not found: {', '.join(map(str, sorted(missing)))}")
+
+        for scan in scans:
+            if options['background']:
+                job = enqueue_purge(scan)
+                self.stdout.write(f"{scan}: purge queued as job {job.id}")
+                continue
+
+            started = time.monotonic()
+            deleted = purge_scan(scan.pk, batch_size=options['batch_size'], vacuum=not options['no_vacuum'])
+            summary = ", ".join(f"{count} {table}" for table, count in deleted.items() if count)
+            self.stdout.write(f"{scan}: deleted {summary or 'no rows'} in {time.monotonic() - started:.1f}s")
+
+        self.stdout.write(self.style.SUCCESS("Purge completed successfully."))
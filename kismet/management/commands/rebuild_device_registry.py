@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+import time
+from kismet.registry import rebuild_registry
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the cross-scan KnownDevice registry from every imported Device, '
+        'e.g. after upgrading with scans already imported. '
+        'Usage: python manage.py rebuild_device_registry'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = rebuild_registry(progress=lambda scan, macs: self.stdout.write(f"{scan}: {macs} MACs"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Registry rebuilt: {total} known devices in {time.monotonic() - started:.1f}s."
+        ))
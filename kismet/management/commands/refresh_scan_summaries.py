@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from kismet.cache import bump_scan_versions
+from kismet.models import Scan
+from kismet.summary import refresh_summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the precomputed chart summaries of imported scans, e.g. after editing '
+        'devices outside the API. '
+        'Usage: python manage.py refresh_scan_summaries [--scan ID]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scan', type=int, action='append', dest='scan_ids',
+                            help='Only this scan (repeatable; default: every scan)')
+
+    def handle(self, *args, **options):
+        scans = Scan.objects.order_by('id')
+        if options['scan_ids']:
+            scans = scans.filter(pk__in=options['scan_ids'])
+            missing = set(options['scan_ids']) - set(scans.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Scan(s) not found: {', '.join(map(str, sorted(missing)))}")
+
+        for scan in scans:
+            with transaction.atomic():
+                summary = refresh_summary(scan)
+                bump_scan_versions(scan.id)
+            self.stdout.write(f"{scan}: {summary.data['devices']} devices")
+
+        self.stdout.write(self.style.SUCCESS("Scan summaries refreshed."))
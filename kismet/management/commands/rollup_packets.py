@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+import time
+from datetime import timedelta
+from kismet.models import Scan
+from kismet.purge import PURGE_BATCH_SIZE
+from kismet.rollup import ROLLUP_CHUNK_SIZE, prune_packets, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Roll up stored packets into per-device, per-minute PacketRollup rows and optionally '
+        'delete raw packets older than a retention period. '
+        'Usage: python manage.py rollup_packets --retention-days 30'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scan', type=int, action='append', dest='scan_ids',
+                            help='Only this scan (repeatable; default: every scan)')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute rollups even for scans already rolled up')
+        parser.add_argument('--retention-days', type=int,
+                            help='Delete raw packets older than this many days once rolled up')
+        parser.add_argument('--chunk-size', type=int, default=ROLLUP_CHUNK_SIZE, help='Packets read per query')
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help='Packets deleted per statement')
+
+    def handle(self, *args, **options):
+        if options['retention_days'] is not None and options['retention_days'] < 0:
+            raise CommandError("--retention-days must not be negative.")
+
+        scans = Scan.objects.order_by('id')
+        if options['scan_ids']:
+            scans = scans.filter(pk__in=options['scan_ids'])
+            missing = set(options['scan_ids']) - set(scans.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Scan(s) not found: {', '.join(map(str, sorted(missing)))}")
+
+        cutoff = None
+        if options['retention_days'] is not None:
+            cutoff = timezone.now() - timedelta(days=options['retention_days'])
+
+        for scan in scans:
+            if options['rebuild'] or not scan.rollups_built:
+                if scan.packets_pruned_before is not None:
+                    self.stdout.write(self.style.WARNING(f"{scan}: raw packets already pruned, rollups kept as they are"))
+                else:
+                    started = time.monotonic()
+                    rolled = rebuild_rollups(scan, chunk_size=options['chunk_size'])
+                    self.stdout.write(f"{scan}: rolled up {rolled} packets in {time.monotonic() - started:.1f}s")
+
+            if cutoff is not None and scan.rollups_built:
+                deleted = prune_packets(scan, cutoff, batch_size=options['batch_size'])
+                if deleted:
+                    self.stdout.write(f"{scan}: deleted {deleted} packets older than {cutoff:%Y-%m-%d %H:%M}")
+
+        self.stdout.write(self.style.SUCCESS("Rollup completed successfully."))
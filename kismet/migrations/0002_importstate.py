@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('devices_last_time', models.BigIntegerField(blank=True, null=True)),
+                ('packets_rowid', models.BigIntegerField(default=0)),
+                ('packets_ts_sec', models.BigIntegerField(blank=True, null=True)),
+                ('alerts_rowid', models.BigIntegerField(default=0)),
+                ('alerts_ts_sec', models.BigIntegerField(blank=True, null=True)),
+                ('data_rowid', models.BigIntegerField(default=0)),
+                ('data_ts_sec', models.BigIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('scan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='import_state', to='kismet.scan')),
+            ],
+            options={
+                'db_table': 'import_states',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0002_importstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(blank=True, max_length=255, null=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('success', 'Success'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('seconds', models.FloatField(blank=True, null=True)),
+                ('stages', models.JSONField(blank=True, default=dict)),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_runs', to='kismet.scan')),
+            ],
+            options={
+                'db_table': 'import_runs',
+                'indexes': [models.Index(fields=['scan', '-started_at'], name='import_runs_scan_id_508e6d_idx')],
+            },
+        ),
+    ]
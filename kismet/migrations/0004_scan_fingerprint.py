@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0003_importrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scan',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='origin',
+            field=models.CharField(blank=True, db_index=True, max_length=40, null=True),
+        ),
+    ]
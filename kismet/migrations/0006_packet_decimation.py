@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0005_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='device',
+            name='packets_dropped',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='decimate_seconds',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='packets_dropped',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
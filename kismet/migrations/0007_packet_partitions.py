@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:03
+
+from django.db import migrations, models
+
+from kismet.partitions import partition_packets_table
+
+
+def partition_packets(apps, schema_editor):
+    # PostgreSQL only; a no-op on other backends
+    partition_packets_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0006_packet_decimation'),
+    ]
+
+    operations = [
+        # Not reversed: the partitioned table works the same for Django
+        migrations.RunPython(partition_packets, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='packet',
+            index=models.Index(fields=['scan', 'timestamp', 'id'], name='packets_scan_id_6be315_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0007_packet_partitions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('import', 'Kismet import'), ('purge', 'Scan purge')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0008_job_purge_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scan',
+            name='packets_pruned_before',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='rollups_built',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='PacketRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sourcemac', models.CharField(blank=True, max_length=17, null=True)),
+                ('bucket_start', models.DateTimeField()),
+                ('packets', models.BigIntegerField(default=0)),
+                ('bytes', models.BigIntegerField(default=0)),
+                ('min_signal', models.IntegerField(blank=True, null=True)),
+                ('avg_signal', models.FloatField(blank=True, null=True)),
+                ('max_signal', models.IntegerField(blank=True, null=True)),
+                ('signal_count', models.BigIntegerField(default=0)),
+                ('frequencies', models.JSONField(blank=True, default=list)),
+                ('min_lat', models.FloatField(blank=True, null=True)),
+                ('max_lat', models.FloatField(blank=True, null=True)),
+                ('min_lon', models.FloatField(blank=True, null=True)),
+                ('max_lon', models.FloatField(blank=True, null=True)),
+                ('device', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='packet_rollups', to='kismet.device')),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='packet_rollups', to='kismet.scan')),
+            ],
+            options={
+                'db_table': 'packet_rollups',
+                'indexes': [models.Index(fields=['scan', 'bucket_start'], name='packet_roll_scan_id_daaad4_idx'), models.Index(fields=['device', 'bucket_start'], name='packet_roll_device__3a9974_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scan', 'sourcemac', 'bucket_start'), name='unique_packet_rollup_bucket')],
+            },
+        ),
+    ]
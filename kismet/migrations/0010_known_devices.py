@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0009_packet_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnownDevice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('devmac', models.CharField(max_length=17, unique=True)),
+                ('phyname', models.CharField(blank=True, max_length=50, null=True)),
+                ('type', models.CharField(blank=True, max_length=50, null=True)),
+                ('manufacturer', models.CharField(blank=True, max_length=100, null=True)),
+                ('first_seen', models.DateTimeField(blank=True, null=True)),
+                ('last_seen', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('scan_count', models.IntegerField(db_index=True, default=0)),
+                ('last_lat', models.FloatField(blank=True, null=True)),
+                ('last_lon', models.FloatField(blank=True, null=True)),
+                ('last_ssid', models.CharField(blank=True, max_length=255, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('first_scan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kismet.scan')),
+                ('last_scan', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kismet.scan')),
+            ],
+            options={
+                'db_table': 'known_devices',
+            },
+        ),
+    ]
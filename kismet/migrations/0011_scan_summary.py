@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0010_known_devices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('scan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='kismet.scan')),
+            ],
+            options={
+                'db_table': 'scan_summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:36
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seen_up_to_rowid(apps, schema_editor):
+    # Nothing was held back before; every row up to the mark was handled
+    ImportState = apps.get_model('kismet', 'ImportState')
+    ImportState.objects.update(packets_seen_rowid=F('packets_rowid'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0011_scan_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importstate',
+            name='packets_held',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='importstate',
+            name='packets_seen_rowid',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(seen_up_to_rowid, migrations.RunPython.noop),
+    ]
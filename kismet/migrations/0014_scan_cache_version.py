@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kismet', '0013_import_state_held_packets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scan',
+            name='cache_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -1,16 +1,44 @@
 from django.db import models
+from django.utils import timezone
 
 class Scan(models.Model):
     name = models.CharField(max_length=100, null=True, blank=True)
     file_path = models.CharField(max_length=255, null=True, blank=True)
     imported_at = models.DateTimeField(auto_now_add=True)
 
+    # Identity of the imported .kismet file (see kismet.fingerprint)
+    fingerprint = models.CharField(max_length=40, null=True, blank=True, db_index=True)
+    origin = models.CharField(max_length=40, null=True, blank=True, db_index=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+
+    # Packet decimation (see kismet.decimate): window used and rows not stored
+    decimate_seconds = models.PositiveIntegerField(null=True, blank=True)
+    packets_dropped = models.BigIntegerField(default=0)
+
+    # Packet rollups (see kismet.rollup): whether every packet of the scan is
+    # rolled up, and the cutoff raw packets were deleted before, if any
+    rollups_built = models.BooleanField(default=False)
+    packets_pruned_before = models.DateTimeField(null=True, blank=True)
+
+    # Bumped whenever the scan's data changes; part of every cached response
+    # key covering the scan (see kismet.cache)
+    cache_version = models.PositiveBigIntegerField(default=0)
+
     class Meta:
         db_table = "scans"
 
     def __str__(self):
         return self.name or f"Scan {self.id}"
 
+class ScanSummary(models.Model):
+    """Chart aggregates of one scan's devices, written at import time (see kismet.summary)"""
+    scan = models.OneToOneField(Scan, on_delete=models.CASCADE, related_name="summary")
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "scan_summaries"
+
 class Device(models.Model):
     scan = models.ForeignKey(
         Scan,
@@ -58,6 +86,8 @@ class Device(models.Model):
     # Traffic metrics
     bytes_data = models.BigIntegerField(null=True, blank=True)
     packets_seen = models.BigIntegerField(null=True, blank=True)
+    # Kismet packets rows of this device skipped by import decimation
+    packets_dropped = models.BigIntegerField(default=0)
     clients_count = models.IntegerField(null=True, blank=True)
 
     # Raw Kismet JSON
@@ -81,6 +111,32 @@ class Device(models.Model):
     def __str__(self):
         return f"{self.devmac or 'Unknown'} ({self.type or 'Device'})"
 
+class KnownDevice(models.Model):
+    """Every MAC ever imported, across scans; maintained by kismet.registry"""
+    devmac = models.CharField(max_length=17, unique=True)
+    phyname = models.CharField(max_length=50, null=True, blank=True)
+    type = models.CharField(max_length=50, null=True, blank=True)
+    manufacturer = models.CharField(max_length=100, null=True, blank=True)
+
+    first_seen = models.DateTimeField(null=True, blank=True)
+    last_seen = models.DateTimeField(null=True, blank=True, db_index=True)
+    first_scan = models.ForeignKey(Scan, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_scan = models.ForeignKey(Scan, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    scan_count = models.IntegerField(default=0, db_index=True)
+
+    # Taken from the sighting with the latest last_seen
+    last_lat = models.FloatField(null=True, blank=True)
+    last_lon = models.FloatField(null=True, blank=True)
+    last_ssid = models.CharField(max_length=255, null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "known_devices"
+
+    def __str__(self):
+        return f"{self.devmac} ({self.scan_count} scans)"
+
 class Client(models.Model):
     scan = models.ForeignKey(
         Scan,
@@ -156,7 +212,51 @@ class Packet(models.Model):
     packet_json = models.JSONField(null=True, blank=True)
 
     class Meta:
+        # LIST-partitioned by scan_id on PostgreSQL, see kismet.partitions.
+        # The table's primary key there is (id, scan_id), as a partition key
+        # must be part of it; id alone, drawn from one sequence, still
+        # picks out a single row, so Django keeps it as the pk.
         db_table = "packets"
+        indexes = [
+            # Also the keyset order of the packets API (kismet.pagination)
+            models.Index(fields=["scan", "timestamp", "id"]),
+        ]
+
+class PacketRollup(models.Model):
+    """Per-minute packet aggregates of one transmitter, kept after raw packets are pruned"""
+    scan = models.ForeignKey(Scan, on_delete=models.CASCADE, related_name="packet_rollups")
+    device = models.ForeignKey(Device, on_delete=models.SET_NULL, null=True, blank=True, related_name="packet_rollups")
+    sourcemac = models.CharField(max_length=17, null=True, blank=True)
+    bucket_start = models.DateTimeField()
+
+    packets = models.BigIntegerField(default=0)
+    bytes = models.BigIntegerField(default=0)
+
+    # avg_signal is over the signal_count packets that reported a signal
+    min_signal = models.IntegerField(null=True, blank=True)
+    avg_signal = models.FloatField(null=True, blank=True)
+    max_signal = models.IntegerField(null=True, blank=True)
+    signal_count = models.BigIntegerField(default=0)
+
+    frequencies = models.JSONField(default=list, blank=True)
+
+    min_lat = models.FloatField(null=True, blank=True)
+    max_lat = models.FloatField(null=True, blank=True)
+    min_lon = models.FloatField(null=True, blank=True)
+    max_lon = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        db_table = "packet_rollups"
+        indexes = [
+            models.Index(fields=["scan", "bucket_start"]),
+            models.Index(fields=["device", "bucket_start"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scan", "sourcemac", "bucket_start"],
+                name="unique_packet_rollup_bucket"
+            )
+        ]
 
 class DataSource(models.Model):
     scan = models.ForeignKey(Scan, on_delete=models.CASCADE, related_name="datasources")
@@ -195,4 +295,106 @@ class DeviceData(models.Model):
     json = models.JSONField(null=True, blank=True)
 
     class Meta:
-        db_table = "data"
\ No newline at end of file
+        db_table = "data"
+
+class ImportState(models.Model):
+    """High-water marks of the last committed import chunk per Scan"""
+    scan = models.OneToOneField(Scan, on_delete=models.CASCADE, related_name="import_state")
+
+    # Kismet epoch seconds of the newest device last_time imported
+    devices_last_time = models.BigIntegerField(null=True, blank=True)
+
+    # sqlite rowid and ts_sec of the last row committed from each log table.
+    # packets_rowid stops short of packets the decimator still holds back:
+    # rows up to packets_seen_rowid were handled already, and those listed
+    # in packets_held are held again when an import resumes
+    packets_rowid = models.BigIntegerField(default=0)
+    packets_ts_sec = models.BigIntegerField(null=True, blank=True)
+    packets_seen_rowid = models.BigIntegerField(default=0)
+    packets_held = models.JSONField(default=list, blank=True)
+    alerts_rowid = models.BigIntegerField(default=0)
+    alerts_ts_sec = models.BigIntegerField(null=True, blank=True)
+    data_rowid = models.BigIntegerField(default=0)
+    data_ts_sec = models.BigIntegerField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "import_states"
+
+    def __str__(self):
+        return f"Import state of {self.scan}"
+
+
+class ImportRun(models.Model):
+    """One run of import_kismet_file with per-stage timings"""
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("success", "Success"),
+        ("failed", "Failed"),
+    ]
+
+    scan = models.ForeignKey(Scan, on_delete=models.CASCADE, related_name="import_runs")
+    file_path = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    error = models.TextField(null=True, blank=True)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    seconds = models.FloatField(null=True, blank=True)
+
+    # {stage: {rows, seconds, rows_per_sec, queries, peak_rss_mb}}
+    stages = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        db_table = "import_runs"
+        indexes = [
+            models.Index(fields=["scan", "-started_at"]),
+        ]
+
+    def __str__(self):
+        return f"Import of {self.scan} at {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class Job(models.Model):
+    """Background job run by Celery or the in-process fallback worker"""
+    KIND_CHOICES = [
+        ("import", "Kismet import"),
+        ("purge", "Scan purge"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("success", "Success"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued", db_index=True)
+    params = models.JSONField(default=dict, blank=True)
+    scan = models.ForeignKey(Scan, on_delete=models.SET_NULL, null=True, blank=True, related_name="jobs")
+
+    # Progress
+    stage = models.CharField(max_length=50, null=True, blank=True)
+    rows_done = models.BigIntegerField(default=0)
+    rows_total = models.BigIntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "jobs"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.id} ({self.status})"
+
+    @property
+    def eta_seconds(self):
+        """Seconds left at the current rate, or None before there is a rate."""
+        if self.status != "running" or not self.started_at or not self.rows_done:
+            return None
+        elapsed = (timezone.now() - self.started_at).total_seconds()
+        remaining = max(0, self.rows_total - self.rows_done)
+        return round(elapsed / self.rows_done * remaining, 1)
@@ -0,0 +1,190 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks past the last row seen on a unique
+    ordering, WHERE (timestamp, id) > (last timestamp, last id), instead of
+    skipping OFFSET rows. Each page is one index range scan of limit + 1
+    rows whatever its depth, and no COUNT(*) runs unless ?count=true asks
+    for one. ordering lists ascending columns ending in a unique one;
+    index them, after any equality filter, in that order. NULLs of a
+    nullable column sort after every value, on every database.
+
+    Requests giving ?offset= keep the LimitOffsetPagination pages these
+    endpoints served before, count included, in the queryset's ordering
+    or, when it has none, this one. So do requests giving ?ordering=,
+    which no cursor can seek through, in the order they ask for.
+    """
+
+    ordering = ("id",)
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    count_query_param = "count"
+    offset_query_param = "offset"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.offset_paginator = None
+        params = request.query_params
+        if self.offset_query_param in params or api_settings.ORDERING_PARAM in params:
+            self.offset_paginator = LimitOffsetPagination()
+            self.offset_paginator.default_limit = self.page_size
+            if not queryset.ordered:
+                queryset = queryset.order_by(*self.ordering)
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = queryset.count() if self._wants_count(request) else None
+        position, reverse = self.decode_cursor(request, queryset.model)
+        self.nullable = {field for field in self.ordering if queryset.model._meta.get_field(field).null}
+
+        order = [self._order(field, reverse) for field in self.ordering]
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, reverse))
+        rows = list(queryset.order_by(*order)[:self.page_size + 1])
+
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Walking back from a cursor, the page it came from is ahead; walking
+        # forward from one, the rows before it are behind
+        if reverse:
+            more_after, more_before = True, has_more
+        else:
+            more_after, more_before = has_more, position is not None
+        self.next_position = self._position(rows[-1]) if rows and more_after else None
+        self.previous_position = self._position(rows[0]) if rows and more_before else None
+        return rows
+
+    def _order(self, field, reverse):
+        if field in self.nullable:
+            return F(field).desc(nulls_first=True) if reverse else F(field).asc(nulls_last=True)
+        return f"-{field}" if reverse else field
+
+    def _wants_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() in ("1", "true", "yes")
+
+    def _seek(self, position, reverse):
+        """
+        Rows past position in the ordering: (a, b) > (x, y) spelled as
+        a >= x AND (a > x OR b > y), so the leading column bounds an index
+        range scan on every database. NULLs, sorted last, are matched with
+        IS NULL, since a comparison with NULL matches no row.
+        """
+        fields = list(zip(self.ordering, position))
+        past = Q()
+        for i, (field, value) in enumerate(fields):
+            after = self._past(field, value, reverse)
+            if after is not None:
+                past |= self._equal(fields[:i]) & after
+        return self._bound(*fields[0], reverse) & past
+
+    def _equal(self, fields):
+        condition = Q()
+        for field, value in fields:
+            condition &= Q(**{f"{field}__isnull": True}) if value is None else Q(**{field: value})
+        return condition
+
+    def _past(self, field, value, reverse):
+        """Rows strictly past value in one column; None when there are none."""
+        if reverse:
+            return Q(**{f"{field}__isnull": False}) if value is None else Q(**{f"{field}__lt": value})
+        if value is None:
+            return None
+        after = Q(**{f"{field}__gt": value})
+        return after | Q(**{f"{field}__isnull": True}) if field in self.nullable else after
+
+    def _bound(self, field, value, reverse):
+        if reverse:
+            return Q() if value is None else Q(**{f"{field}__lte": value})
+        if value is None:
+            return Q(**{f"{field}__isnull": True})
+        bound = Q(**{f"{field}__gte": value})
+        return bound | Q(**{f"{field}__isnull": True}) if field in self.nullable else bound
+
+    def _position(self, row):
+        return [getattr(row, field) for field in self.ordering]
+
+    def get_page_size(self, request):
+        size = request.query_params.get(self.page_size_query_param, "")
+        if size.isdigit() and int(size) > 0:
+            return min(int(size), self.max_page_size)
+        return self.page_size
+
+    def decode_cursor(self, request, model):
+        """The (position, reverse) a ?cursor= encodes; (None, False) on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = cursor["p"]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(cursor.get("r"))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        # isoformat() keeps the microseconds DjangoJSONEncoder would cut
+        cursor = {"p": [v.isoformat() if hasattr(v, "isoformat") else v for v in position]}
+        if reverse:
+            cursor["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        page = {"next": self.get_next_link(), "previous": self.get_previous_link(), "results": data}
+        if self.count is not None:
+            page = {"count": self.count, **page}
+        return Response(page)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class PacketPagination(KeysetPagination):
+    """Packets in capture order; (scan, timestamp, id) is indexed."""
+
+    ordering = ("timestamp", "id")
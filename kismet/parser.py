@@ -1,12 +1,29 @@
 import os
-import json
-import sqlite3
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
 from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Q, Value, When
 from datetime import datetime
 from django.utils import timezone
 from .models import (
-    Scan, Device, DeviceData, Packet,
-    DataSource, Alert, Client
+    Scan, Device, DeviceData, Packet, PacketRollup,
+    DataSource, Alert, Client, ImportState, ImportRun
+)
+from .cache import bump_scan_versions
+from .decode import DEVICE_JSON_FIELDS, extract_device, safe_json_load
+from .fingerprint import fingerprint_capture_file, fingerprint_kismet_file
+from .instrumentation import ImportProfiler
+from .partitions import ensure_packet_partition
+from .pcap import decode_frame, iter_frames
+from .pgcopy import copy_rows, copy_supported
+from .registry import DeviceRegistry
+from .rollup import RollupBuffer
+from .summary import refresh_summary
+from .reader import (
+    KismetReader, open_kismet_db, DEFAULT_CHUNK_SIZES,
+    DEVICE_COLUMNS, DATASOURCE_COLUMNS, PACKET_COLUMNS, ALERT_COLUMNS, DATA_COLUMNS
 )
 
 def kismet_ts_to_datetime(ts_sec, ts_usec=0):
@@ -19,202 +36,770 @@ def kismet_ts_to_datetime(ts_sec, ts_usec=0):
     except Exception:
         return None
 
-def safe_json_load(val):
-    """Safely parse JSON strings or return dict if already parsed."""
-    if not val:
-        return {}
-    if isinstance(val, dict):
-        return val
-    try:
-        return json.loads(val)
-    except (json.JSONDecodeError, TypeError):
-        return {}
-
-def extract_latlon(block):
-    if not block:
-        return (None, None)
-    point = block.get("kismet.common.location.geopoint")
-    if isinstance(point, list) and len(point) == 2:
-        return (point[1], point[0])  # lat, lon
-    return (None, None)
-
-def parse_clients(scan, device, device_json):
-    """
-    Creates mapping in the Client table from both AP and Client perspectives.
-    """
-    dot11 = device_json.get("dot11.device", {})
-    
-    # 1. Perspective: This device is an AP. Map its associated clients.
-    # The key is the client MAC, value is the internal Kismet key.
-    associated_map = dot11.get("dot11.device.associated_client_map", {})
-    for client_mac, client_key in associated_map.items():
-        Client.objects.update_or_create(
-            scan=scan,
-            device=device,  # The AP
-            client_mac=client_mac,
-            defaults={
-                "bssid": device.devmac,
-                "is_associated": True,
-                "client_type": "Associated",
-                "client_json": {"kismet_key": client_key}
-            }
+CLIENT_BATCH_SIZE = 1000
+
+# Every Client column refreshed when an edge is re-imported into the same scan
+CLIENT_UPDATE_FIELDS = [
+    "bssid", "bssid_key", "is_associated", "client_type", "decrypted",
+    "datasize", "num_retries", "first_time", "last_time",
+    "last_lat", "last_lon", "client_json",
+]
+
+def _merge_client(clients, key, rank, fields):
+    """
+    Merges one edge into the scan-wide clients dict. The edge with the highest
+    rank (observed before associated-only, then latest last_time, then bssid)
+    provides the details; association and first_time are combined, so the
+    result does not depend on the order devices or map entries arrive in.
+    """
+    current = clients.get(key)
+    if current is None:
+        clients[key] = (rank, fields)
+        return
+
+    current_rank, current_fields = current
+    if rank > current_rank:
+        base, other = dict(fields), current_fields
+    else:
+        base, other = dict(current_fields), fields
+        rank = current_rank
+
+    base["is_associated"] = base["is_associated"] or other["is_associated"]
+    first_times = [t for t in (base["first_time"], other["first_time"]) if t]
+    base["first_time"] = min(first_times) if first_times else None
+    clients[key] = (rank, base)
+
+def collect_clients(clients, device_id, edges):
+    """
+    Merges the client_edges() of one device into the scan-wide clients dict
+    keyed on (device_id, client_mac).
+    """
+    for client_mac, rank, fields in edges:
+        _merge_client(clients, (device_id, client_mac), rank, fields)
+
+def _build_client(scan, device_id, client_mac, fields):
+    fields = dict(
+        fields,
+        first_time=kismet_ts_to_datetime(fields["first_time"]),
+        last_time=kismet_ts_to_datetime(fields["last_time"]),
+    )
+    return Client(scan_id=scan.id, device_id=device_id, client_mac=client_mac, **fields)
+
+def bulk_upsert_clients(scan, clients, batch_size=CLIENT_BATCH_SIZE):
+    """
+    Writes the collected Client edges in batches, upserting on
+    (scan, device, client_mac). Returns the number of edges written.
+    """
+    keys = sorted(clients)
+    for i in range(0, len(keys), batch_size):
+        Client.objects.bulk_create(
+            [
+                _build_client(scan, device_id, client_mac, clients[(device_id, client_mac)][1])
+                for device_id, client_mac in keys[i:i + batch_size]
+            ],
+            update_conflicts=True,
+            unique_fields=["scan", "device", "client_mac"],
+            update_fields=CLIENT_UPDATE_FIELDS,
         )
+    return len(keys)
 
-    # 2. Perspective: This device is a Client. Map the AP it is talking to.
-    client_map = dot11.get("dot11.device.client_map", {})
-    for _, client_data in client_map.items():
-        loc = client_data.get("dot11.client.location", {})
-        last_lat, last_lon = extract_latlon(loc.get("kismet.common.location.last"))
-        
-        target_bssid = client_data.get("dot11.client.bssid")
-        if not target_bssid or target_bssid == "00:00:00:00:00:00":
-            continue
-
-        Client.objects.update_or_create(
-            scan=scan,
-            device=device,  # The Client
-            client_mac=device.devmac,
-            defaults={
-                "bssid": target_bssid,
-                "bssid_key": client_data.get("dot11.client.bssid_key"),
-                "client_type": client_data.get("dot11.client.type"),
-                "decrypted": bool(client_data.get("dot11.client.decrypted", 0)),
-                "datasize": client_data.get("dot11.client.datasize", 0),
-                "num_retries": client_data.get("dot11.client.num_retries", 0),
-                "first_time": kismet_ts_to_datetime(client_data.get("dot11.client.first_time")),
-                "last_time": kismet_ts_to_datetime(client_data.get("dot11.client.last_time")),
-                "last_lat": last_lat,
-                "last_lon": last_lon,
-                "client_json": client_data,
-            }
+WIFI_DEVICE_TYPES = ("Wi-Fi AP", "Wi-Fi Client", "Wi-Fi Bridged")
+
+# Every Device column refreshed when a devkey is re-imported into the same scan
+DEVICE_UPDATE_FIELDS = [
+    "phyname", "devmac", "type", "is_ap", "is_client",
+    "strongest_signal", "avg_signal", "last_signal",
+    "first_time", "last_time",
+    "min_lat", "min_lon", "max_lat", "max_lon", "avg_lat", "avg_lon",
+    "bytes_data", "packets_seen", "clients_count",
+    "ssid", "channel", "encryption", "manufacturer",
+    "probed_ssids", "advertised_ssids", "device_json",
+]
+
+def build_device(scan, row, extracted):
+    """Builds an unsaved Device from a Kismet devices row and its extract_device() values."""
+    return Device(
+        scan=scan,
+        devkey=row['devkey'],
+        phyname=row['phyname'],
+        devmac=row['devmac'],
+        type=row['type'],
+        is_ap=row['type'] == "Wi-Fi AP",
+        is_client=row['type'] == "Wi-Fi Client",
+
+        strongest_signal=row['strongest_signal'],
+
+        first_time=kismet_ts_to_datetime(row['first_time']),
+        last_time=kismet_ts_to_datetime(row['last_time']),
+        min_lat=row['min_lat'], min_lon=row['min_lon'],
+        max_lat=row['max_lat'], max_lon=row['max_lon'],
+        avg_lat=row['avg_lat'], avg_lon=row['avg_lon'],
+        bytes_data=row['bytes_data'],
+
+        **dict(zip(DEVICE_JSON_FIELDS, extracted)),
+    )
+
+def _flush_devices(scan, batch, devkey_map, clients, registry):
+    devices = [device for device, _ in batch.values()]
+
+    with transaction.atomic():
+        Device.objects.bulk_create(
+            devices,
+            update_conflicts=True,
+            unique_fields=["scan", "devkey"],
+            update_fields=DEVICE_UPDATE_FIELDS,
         )
 
-def import_kismet_file(file_path):
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"{file_path} does not exist")
+        # Backends that cannot return ids from an upsert need one lookup per chunk
+        if any(device.pk is None for device in devices):
+            ids = dict(
+                Device.objects.filter(scan=scan, devkey__in=list(batch))
+                .values_list("devkey", "id")
+            )
+            for device in devices:
+                device.pk = ids.get(device.devkey)
+
+        for devkey, (device, edges) in batch.items():
+            devkey_map[devkey] = device.pk
+            if clients is not None:
+                collect_clients(clients, device.pk, edges)
 
-    with sqlite3.connect(file_path) as conn:
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
+        if registry is not None:
+            registry.update(devices)
 
-        # 1. Create Scan record
-        scan, _ = Scan.objects.get_or_create(
-            name=os.path.basename(file_path),
-            defaults={"file_path": file_path}
+def _write_device_chunk(scan, rows, extracted, devkey_map, clients, state, registry):
+    batch = {}
+    for row, values in zip(rows, extracted):
+        # A devkey repeated within a chunk would hit the same row twice in one upsert
+        batch[row['devkey']] = (build_device(scan, row, values), values[-1])
+    _flush_devices(scan, batch, devkey_map, clients, registry)
+
+    if state is not None:
+        last_times = [row['last_time'] for row in rows if row['last_time'] is not None]
+        if state.devices_last_time is not None:
+            last_times.append(state.devices_last_time)
+        state.devices_last_time = max(last_times) if last_times else None
+
+def bulk_upsert_devices(scan, chunks, clients=None, state=None, decode_workers=1, registry=None):
+    """
+    Upserts chunks of Kismet devices rows on the unique_device_per_scan
+    constraint. Returns a devkey -> Device id map for the later stages.
+    Client edges of Wi-Fi devices are collected into clients when given, and
+    the newest last_time read is kept on state (saved by the caller). A
+    kismet.registry.DeviceRegistry, when given, is updated with each chunk.
+
+    With decode_workers > 1 the device JSON of each chunk is decoded by a
+    process pool (kismet.decode.extract_device) while the previous chunk is
+    written, so decoding uses the spare cores and this process only writes.
+    """
+    devkey_map = {}
+    collect = clients is not None
+
+    def items(rows):
+        return [
+            (row['devmac'], collect and row['type'] in WIFI_DEVICE_TYPES, row['device'])
+            for row in rows
+        ]
+
+    if decode_workers <= 1:
+        for rows in chunks:
+            extracted = [extract_device(item) for item in items(rows)]
+            _write_device_chunk(scan, rows, extracted, devkey_map, clients, state, registry)
+        return devkey_map
+
+    with ProcessPoolExecutor(max_workers=decode_workers) as pool:
+        pending = None
+        for rows in chunks:
+            chunksize = max(1, len(rows) // (decode_workers * 4))
+            decoding = (rows, pool.map(extract_device, items(rows), chunksize=chunksize))
+            if pending:
+                _write_device_chunk(scan, pending[0], pending[1], devkey_map, clients, state, registry)
+            pending = decoding
+        if pending:
+            _write_device_chunk(scan, pending[0], pending[1], devkey_map, clients, state, registry)
+
+    return devkey_map
+
+def build_devkey_index(scan):
+    """Returns a devkey -> Device id map for every device already in the scan."""
+    return dict(
+        Device.objects.filter(scan=scan).values_list("devkey", "id")
+    )
+
+def _advance(state, table, rows, held=()):
+    """
+    Moves a log table's high-water mark to the last row of a chunk, or to
+    just before the oldest of the held rows (packets the decimator holds
+    back), which are recorded so a resumed import can hold them again.
+    """
+    last = rows[-1]
+    rowid = last['rowid']
+    fields = [f"{table}_rowid", f"{table}_ts_sec", "updated_at"]
+    if table == "packets":
+        # A resumed import reads rows it had seen again; the mark never goes back
+        rowid = max(rowid, state.packets_seen_rowid)
+        state.packets_seen_rowid = rowid
+        state.packets_held = sorted(r['rowid'] for r in held)
+        fields += ["packets_seen_rowid", "packets_held"]
+    setattr(state, f"{table}_rowid", min(r['rowid'] for r in held) - 1 if held else rowid)
+    setattr(state, f"{table}_ts_sec", last['ts_sec'])
+    state.save(update_fields=fields)
+
+# Packet columns written by the importer, in the order of packet_values()
+PACKET_FIELDS = (
+    "scan_id", "device_id", "ts_sec", "ts_usec", "timestamp",
+    "sourcemac", "destmac", "transmac",
+    "frequency", "signal", "datarate", "packet_len",
+    "lat", "lon", "alt", "datasource", "phyname",
+)
+
+def packet_values(scan_id, device_id, r):
+    """Returns the PACKET_FIELDS values of one Kismet packets row."""
+    return (
+        scan_id, device_id, r['ts_sec'], r['ts_usec'],
+        kismet_ts_to_datetime(r['ts_sec'], r['ts_usec']),
+        r['sourcemac'], r['destmac'], r['transmac'],
+        r['frequency'], r['signal'], r['datarate'], r['packet_len'],
+        r['lat'], r['lon'], r['alt'], r['datasource'], r['phyname'],
+    )
+
+def write_packets(values, use_copy):
+    """Writes packet_values() tuples with COPY or, failing that, bulk_create."""
+    if use_copy:
+        return copy_rows(Packet, PACKET_FIELDS, values)
+    Packet.objects.bulk_create([Packet(**dict(zip(PACKET_FIELDS, v))) for v in values])
+    return len(values)
+
+def _count_dropped(scan, dropped, devkey_index):
+    """Adds decimated-away packets to the per-device and per-scan counters."""
+    per_device = {}
+    for r in dropped:
+        device_id = devkey_index.get(r['devkey'])
+        if device_id is not None:
+            per_device[device_id] = per_device.get(device_id, 0) + 1
+
+    if per_device:
+        Device.objects.filter(pk__in=list(per_device)).update(
+            packets_dropped=F("packets_dropped") + Case(
+                *[When(pk=pk, then=Value(n)) for pk, n in per_device.items()],
+                output_field=BigIntegerField(),
+            )
         )
+    # Drops of packets with an unknown devkey only show up here
+    Scan.objects.filter(pk=scan.pk).update(packets_dropped=F("packets_dropped") + len(dropped))
+
+def _replayed(rows, state, decimator):
+    """
+    Splits off the rows an earlier import already handled, which a resumed
+    import reads again from just before the packets it held back. Those
+    held rows are held again, or returned to be stored when this import
+    does not decimate. Returns (new rows, held rows to store).
+    """
+    seen = state.packets_seen_rowid
+    if not rows or rows[0]['rowid'] > seen:
+        return rows, []
+    held = set(state.packets_held)
+    store = []
+    for r in rows:
+        if r['rowid'] <= seen and r['rowid'] in held:
+            if decimator is not None:
+                decimator.hold(r)
+            else:
+                store.append(r)
+    return [r for r in rows if r['rowid'] > seen], store
 
-        # 2. Import Devices
-        cur.execute("SELECT * FROM devices")
-        rows = cur.fetchall()
-        for row in rows:
-            d_json = safe_json_load(row['device'])
+def bulk_insert_packets(scan, chunks, devkey_index, state=None, use_copy=None, decimator=None, rollups=None):
+    """
+    Bulk inserts chunks of Kismet packets rows, resolving devices through the
+    in-memory devkey index. On PostgreSQL the rows go through COPY unless
+    use_copy is False. Each chunk commits together with the packets
+    high-water mark on state. A kismet.decimate.PacketDecimator, when given,
+    picks the rows stored; the others are counted on Device.packets_dropped
+    and Scan.packets_dropped in the same transaction. Packets it holds back
+    stay held across chunks and are stored once their window closes, at the
+    latest at the end of the file unless the decimator follows a growing
+    capture. A kismet.rollup.RollupBuffer, when given, rolls up every row,
+    dropped or not, and is written with the chunk.
+    Returns (packets inserted, packets with an unknown devkey, packets dropped).
+    """
+    if use_copy is None:
+        use_copy = copy_supported()
 
-            signal_data = d_json.get("kismet.device.base.signal", {})
-            dot11 = d_json.get("dot11.device", {})
+    inserted = 0
+    unresolved = 0
+    dropped_total = 0
+    last_rows = None
 
-            avg_signal = signal_data.get("kismet.common.signal.avg_signal", None)
-            last_signal = signal_data.get("kismet.common.signal.last_signal", None)
+    def write(rows, kept, dropped):
+        nonlocal inserted, unresolved, dropped_total
+        values = []
+        for r in kept:
+            device_id = devkey_index.get(r['devkey'])
+            if device_id is None:
+                unresolved += 1
+            values.append(packet_values(scan.id, device_id, r))
+        unresolved += sum(1 for r in dropped if r['devkey'] not in devkey_index)
 
-            packets_seen = d_json.get("kismet.device.base.packets", 0)
+        with transaction.atomic():
+            inserted += write_packets(values, use_copy)
+            if dropped:
+                _count_dropped(scan, dropped, devkey_index)
+            if rollups is not None:
+                rollups.write(scan.id)
+            if state is not None:
+                _advance(state, "packets", rows, decimator.held() if decimator is not None else ())
+        dropped_total += len(dropped)
 
-            assoc_map = dot11.get("dot11.device.associated_client_map", {})
-            clients_count = len(assoc_map) if assoc_map else 0
+    for rows in chunks:
+        store = []
+        if state is not None:
+            rows, store = _replayed(rows, state, decimator)
+            if not rows and not store:
+                continue
+        if rollups is not None:
+            for r in rows:
+                rollups.add(
+                    devkey_index.get(r['devkey']), r['sourcemac'], r['ts_sec'],
+                    r['packet_len'], r['signal'], r['frequency'], r['lat'], r['lon'],
+                )
+
+        kept, dropped = rows, ()
+        if decimator is not None:
+            kept, dropped = decimator.filter(rows)
+            if rows:
+                # Windows other devices left open before this chunk's end are closed
+                kept += decimator.release(before_ts=rows[-1]['ts_sec'] // decimator.seconds * decimator.seconds)
+        if rows:
+            last_rows = rows
+        write(last_rows or store, store + kept, dropped)
+
+    if decimator is not None and not decimator.follow:
+        # End of the file: the windows still open are complete
+        released = decimator.release()
+        if released:
+            write(last_rows or released, released, ())
+
+    return inserted, unresolved, dropped_total
+
+def bulk_insert_alerts(scan, chunks, state=None):
+    """Bulk inserts chunks of Kismet alerts rows. Returns the number inserted."""
+    inserted = 0
+    for rows in chunks:
+        with transaction.atomic():
+            Alert.objects.bulk_create([
+                Alert(
+                    scan_id=scan.id, timestamp=kismet_ts_to_datetime(r['ts_sec'], r['ts_usec']),
+                    devmac=r['devmac'], header=r['header'], json=safe_json_load(r['json'])
+                )
+                for r in rows
+            ])
+            if state is not None:
+                _advance(state, "alerts", rows)
+        inserted += len(rows)
+    return inserted
+
+def bulk_insert_device_data(scan, chunks, state=None):
+    """Bulk inserts chunks of Kismet data rows. Returns the number inserted."""
+    inserted = 0
+    for rows in chunks:
+        with transaction.atomic():
+            DeviceData.objects.bulk_create([
+                DeviceData(
+                    scan_id=scan.id, timestamp=kismet_ts_to_datetime(r['ts_sec'], r['ts_usec']),
+                    devmac=r['devmac'], type=r['type'], json=safe_json_load(r['json'])
+                )
+                for r in rows
+            ])
+            if state is not None:
+                _advance(state, "data", rows)
+        inserted += len(rows)
+    return inserted
 
-            is_ap = row['type'] == "Wi-Fi AP"
-            is_client = row['type'] == "Wi-Fi Client"
-            probes = dot11.get("dot11.device.probed_ssid_map", [])
-            advertised = dot11.get("dot11.device.advertised_ssid_map", [])
+def reset_import_state(scan):
+    """Drops the rows appended by earlier imports so the next one starts over."""
+    with transaction.atomic():
+        Packet.objects.filter(scan=scan).delete()
+        PacketRollup.objects.filter(scan=scan).delete()
+        Device.objects.filter(scan=scan).update(packets_dropped=0)
+        Scan.objects.filter(pk=scan.pk).update(packets_dropped=0, rollups_built=False, packets_pruned_before=None)
+        scan.rollups_built = False
+        scan.packets_pruned_before = None
+        Alert.objects.filter(scan=scan).delete()
+        DeviceData.objects.filter(scan=scan).delete()
+        ImportState.objects.filter(scan=scan).delete()
 
-            with transaction.atomic():
-                device, _ = Device.objects.update_or_create(
-                    scan=scan,
-                    devkey=row['devkey'],
+def start_rollups(scan, fresh):
+    """
+    Returns a RollupBuffer for the packets about to be imported into scan,
+    or None when the scan's earlier packets were never rolled up (see the
+    rollup_packets command). A scan receiving its first packets counts as
+    rolled up from then on.
+    """
+    if fresh and not scan.rollups_built:
+        PacketRollup.objects.filter(scan=scan).delete()
+        Scan.objects.filter(pk=scan.pk).update(rollups_built=True)
+        scan.rollups_built = True
+    return RollupBuffer() if scan.rollups_built else None
+
+def _import_stages(reader, scan, state, profiler, use_copy, decode_workers, decimator):
+    """Runs every import stage under the profiler and returns the row counts."""
+
+    # 2. Import Devices (Bulk Upsert in Chunks)
+    with profiler.stage("devices") as stage:
+        # >= because Kismet rewrites a device row whenever it is seen again
+        if state.devices_last_time is None:
+            device_chunks = reader.chunks("devices", DEVICE_COLUMNS)
+        else:
+            device_chunks = reader.chunks(
+                "devices", DEVICE_COLUMNS,
+                "last_time >= ?", (state.devices_last_time,), "last_time"
+            )
+        clients = {}
+        devkey_map = build_devkey_index(scan)
+        new_devices = bulk_upsert_devices(
+            scan, device_chunks, clients, state, decode_workers, DeviceRegistry(scan)
+        )
+        devkey_map.update(new_devices)
+        stage["rows"] = len(new_devices)
+
+    # 3. Clients (Deduped for the Whole Scan)
+    with profiler.stage("clients") as stage:
+        client_count = bulk_upsert_clients(scan, clients)
+        del clients
+        # Devices only count as done once their client edges are written
+        state.save(update_fields=["devices_last_time", "updated_at"])
+        stage["rows"] = client_count
+
+    # 4. DataSources
+    with profiler.stage("datasources") as stage:
+        for rows in reader.chunks("datasources", DATASOURCE_COLUMNS):
+            for row in rows:
+                ds_json = safe_json_load(row['json'])
+                DataSource.objects.update_or_create(
+                    uuid=row['uuid'],
                     defaults={
-                        "phyname": row['phyname'],
-                        "devmac": row['devmac'],
-                        "type": row['type'],
-                        "is_ap": is_ap,
-                        "is_client": is_client,
-
-                        "strongest_signal": row['strongest_signal'],
-                        "avg_signal": avg_signal,
-                        "last_signal": last_signal,
-
-                        "first_time": kismet_ts_to_datetime(row['first_time']),
-                        "last_time": kismet_ts_to_datetime(row['last_time']),
-                        "min_lat": row['min_lat'], "min_lon": row['min_lon'],
-                        "max_lat": row['max_lat'], "max_lon": row['max_lon'],
-                        "avg_lat": row['avg_lat'], "avg_lon": row['avg_lon'],
-                        "bytes_data": row['bytes_data'],
-
-                        "packets_seen": packets_seen,
-                        "clients_count": clients_count,
-
-                        "ssid": d_json.get("kismet.device.base.name"),
-                        "channel": d_json.get("kismet.device.base.channel"),
-                        "encryption": d_json.get("kismet.device.base.crypt"),
-                        "manufacturer": d_json.get("kismet.device.base.manuf"),
-                        "probed_ssids": probes,
-                        "advertised_ssids": advertised,
-                        "device_json": d_json,
+                        "scan": scan,
+                        "typestring": row['typestring'],
+                        "definition": row['definition'],
+                        "name": row['name'],
+                        "interface": row['interface'],
+                        "packet_count": ds_json.get("kismet.datasource.packets", 0),
+                        "error_count": ds_json.get("kismet.datasource.errors", 0),
+                        "json": ds_json,
                     }
                 )
+                stage["rows"] += 1
 
-                if row['type'] in ["Wi-Fi AP", "Wi-Fi Client", "Wi-Fi Bridged"]:
-                    parse_clients(scan, device, d_json)
-
-        # 3. DataSources
-        cur.execute("SELECT * FROM datasources")
-        for row in cur.fetchall():
-            ds_json = safe_json_load(row['json'])
-            DataSource.objects.update_or_create(
-                uuid=row['uuid'],
-                defaults={
-                    "scan": scan,
-                    "typestring": row['typestring'],
-                    "definition": row['definition'],
-                    "name": row['name'],
-                    "interface": row['interface'],
-                    "packet_count": ds_json.get("kismet.datasource.packets", 0),
-                    "error_count": ds_json.get("kismet.datasource.errors", 0),
-                    "json": ds_json,
-                }
-            )
+    # 5. Packets (Bulk Create for Speed)
+    with profiler.stage("packets") as stage:
+        ensure_packet_partition(scan.id)
+        rollups = start_rollups(scan, state.packets_seen_rowid == 0)
+        packets, unresolved, dropped = bulk_insert_packets(
+            scan, reader.chunks_after("packets", PACKET_COLUMNS, state.packets_rowid),
+            devkey_map, state, use_copy, decimator, rollups
+        )
+        stage["rows"] = packets
 
-        # 4. Packets (Bulk Create for Speed)
-        cur.execute("SELECT * FROM packets")
-        packet_rows = cur.fetchall()
-        packet_objs = []
-        for r in packet_rows:
-            # Match back to device in memory or db
-            dev = Device.objects.filter(scan=scan, devkey=r['devkey']).first()
-            packet_objs.append(Packet(
-                scan=scan, device=dev, ts_sec=r['ts_sec'], ts_usec=r['ts_usec'],
-                timestamp=kismet_ts_to_datetime(r['ts_sec'], r['ts_usec']),
-                sourcemac=r['sourcemac'], destmac=r['destmac'], transmac=r['transmac'],
-                frequency=r['frequency'], signal=r['signal'], datarate=r['datarate'],
-                packet_len=r['packet_len'], lat=r['lat'], lon=r['lon'],
-                datasource=r['datasource'], phyname=r['phyname']
-            ))
-            if len(packet_objs) >= 500:
-                Packet.objects.bulk_create(packet_objs)
-                packet_objs = []
-        Packet.objects.bulk_create(packet_objs)
-
-        # 5. Alerts
-        cur.execute("SELECT * FROM alerts")
-        for r in cur.fetchall():
-            Alert.objects.create(
-                scan=scan, timestamp=kismet_ts_to_datetime(r['ts_sec'], r['ts_usec']),
-                devmac=r['devmac'], header=r['header'], json=safe_json_load(r['json'])
-            )
-        
-        # 6. Data
-        cur.execute("SELECT * FROM data")
-        for r in cur.fetchall():
-            Data.objects.create(
-                scan=scan, timestamp=kismet_ts_to_datetime(r['ts_sec'], r['ts_usec']),
-                devkey=r['devkey'], data=r['data']
-            )
+    # 6. Alerts
+    with profiler.stage("alerts") as stage:
+        alerts = bulk_insert_alerts(
+            scan, reader.chunks_after("alerts", ALERT_COLUMNS, state.alerts_rowid), state
+        )
+        stage["rows"] = alerts
+
+    # 7. Data
+    with profiler.stage("data") as stage:
+        data = bulk_insert_device_data(
+            scan, reader.chunks_after("data", DATA_COLUMNS, state.data_rowid), state
+        )
+        stage["rows"] = data
+
+    # 8. Chart aggregates of the scan's devices
+    with profiler.stage("summary") as stage, transaction.atomic():
+        refresh_summary(scan)
+        # Cached charts and maps of the scan (kismet.cache) are stale from now on
+        bump_scan_versions(scan.id)
+        stage["rows"] = 1
+
+    return {
+        "devices": len(new_devices),
+        "clients": client_count,
+        "packets": packets,
+        "packets_unresolved": unresolved,
+        "packets_dropped": dropped,
+        "alerts": alerts,
+        "data": data,
+    }
+
+def resolve_scan(file_path, fp):
+    """
+    Finds the Scan a fingerprinted Kismet file belongs to. Returns
+    (scan, status) with status "unchanged", "grown", "changed" or "new".
+    """
+    scan = Scan.objects.filter(fingerprint=fp["fingerprint"]).order_by("-id").first()
+    if scan:
+        return scan, "unchanged"
+
+    if fp["origin"]:
+        scan = Scan.objects.filter(origin=fp["origin"]).order_by("-id").first()
+        if scan:
+            grown = scan.file_size is None or fp["size"] >= scan.file_size
+            return scan, "grown" if grown else "changed"
+
+    # The file a scan was imported from, whose origin has since appeared
+    # (it was empty) or moved, and scans imported before fingerprints
+    # existed, are matched by name
+    name = os.path.basename(file_path)
+    scan = (
+        Scan.objects.filter(name=name)
+        .filter(Q(file_path=file_path) | Q(origin__isnull=True))
+        .order_by("-id")
+        .first()
+    )
+    if scan:
+        # Nothing identifying was imported from an empty file, so the rows
+        # now in it can be read on from where that import stopped
+        grown = (
+            scan.fingerprint is not None
+            and scan.origin is None
+            and scan.file_size is not None
+            and fp["size"] >= scan.file_size
+        )
+        return scan, "grown" if grown else "changed"
+
+    return Scan.objects.create(name=name, file_path=file_path), "new"
+
+def _finish_run(run, status, started, profiler, error=None):
+    if run is None:
+        return
+    run.status = status
+    run.error = error
+    run.finished_at = timezone.now()
+    run.seconds = time.perf_counter() - started
+    run.stages = profiler.stages
+    run.save()
+
+class _Progress:
+    """Turns reader chunk callbacks into progress(stage, rows_done, rows_total) calls."""
+
+    def __init__(self, progress):
+        self.progress = progress
+        self.rows_done = 0
+        self.rows_total = 0
+
+    def estimate(self, reader, state):
+        self.rows_total = (
+            reader.conn.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+            + reader.count_after("packets", state.packets_rowid)
+            + reader.count_after("alerts", state.alerts_rowid)
+            + reader.count_after("data", state.data_rowid)
+        )
+        self.progress("starting", 0, self.rows_total)
+
+    def __call__(self, table, rows):
+        if table == "datasources":
+            return
+        self.rows_done += rows
+        self.progress(table, self.rows_done, max(self.rows_total, self.rows_done))
+
+def import_kismet_file(file_path, chunk_sizes=None, max_rss_mb=None, full=False,
+                       use_copy=None, record_run=True, progress=None, decode_workers=1,
+                       decimator=None):
+    """
+    Imports a Kismet sqlite log into a Scan. Every table is streamed in
+    chunks (see kismet.reader); chunk_sizes overrides the per-table defaults
+    and max_rss_mb shrinks them when the process outgrows the budget.
+
+    Imports are incremental: the scan's ImportState remembers the last
+    committed rowid of packets, alerts and data and the newest device
+    last_time, so a re-run (or a resumed crash) only reads rows past them.
+    full=True discards those rows and marks and imports everything again.
+    use_copy forces the PostgreSQL COPY packet loader on or off.
+    decode_workers > 1 decodes the device JSON in that many processes.
+    decimator, a kismet.decimate.PacketDecimator, samples the packets
+    stored; its window is recorded on Scan.decimate_seconds.
+
+    The file is first fingerprinted (kismet.fingerprint): a file already
+    imported unchanged, under any name, returns its Scan straight away with
+    import_stats["status"] == "unchanged"; a renamed or grown file continues
+    the Scan it was imported into.
+
+    Each stage is profiled; the timings are saved as an ImportRun unless
+    record_run is False, and returned with the counts in scan.import_stats.
+    progress, when given, is called as progress(stage, rows_done, rows_total)
+    after every chunk; rows_total is an estimate taken before the first stage.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{file_path} does not exist")
+
+    fp = fingerprint_kismet_file(file_path)
+
+    with closing(open_kismet_db(file_path)) as conn:
+        reader = KismetReader(conn, chunk_sizes=chunk_sizes, max_rss_mb=max_rss_mb)
+        profiler = ImportProfiler()
+        started = time.perf_counter()
+
+        # 1. Find or create the Scan record
+        scan, status = resolve_scan(file_path, fp)
+        if status == "unchanged" and not full:
+            scan.import_stats = {
+                "status": status, "devices": 0, "clients": 0, "packets": 0,
+                "packets_unresolved": 0, "packets_dropped": 0, "alerts": 0, "data": 0, "stages": {},
+            }
+            return scan
+        if full:
+            # Forced re-import of a known file; only skipped files report "unchanged"
+            status = "changed" if status == "unchanged" else status
+        scan.origin = fp["origin"]
+        scan.file_path = file_path
+        update_fields = ["origin", "file_path"]
+        if decimator is not None:
+            scan.decimate_seconds = decimator.seconds
+            update_fields.append("decimate_seconds")
+        scan.save(update_fields=update_fields)
+
+        if full or status == "changed":
+            # Rowids of a rewritten file say nothing about what was imported
+            reset_import_state(scan)
+        state, _ = ImportState.objects.get_or_create(scan=scan)
+        if progress is not None:
+            reader.on_chunk = _Progress(progress)
+            reader.on_chunk.estimate(reader, state)
+        run = ImportRun.objects.create(scan=scan, file_path=file_path) if record_run else None
+
+        try:
+            stats = _import_stages(reader, scan, state, profiler, use_copy, decode_workers, decimator)
+        except Exception as e:
+            # Committed chunks are visible even when a later one failed
+            bump_scan_versions(scan.id)
+            _finish_run(run, "failed", started, profiler, error=str(e))
+            raise
+
+    _finish_run(run, "success", started, profiler)
+
+    # Only a completed import marks the file as seen
+    scan.fingerprint = fp["fingerprint"]
+    scan.file_size = fp["size"]
+    scan.save(update_fields=["fingerprint", "file_size"])
+
+    stats["status"] = status
+    stats["stages"] = profiler.stages
+    scan.import_stats = stats
+    return scan
+
+def _write_pcap_chunk(scan, values, use_copy, rollups, state, frames, ts_sec):
+    with transaction.atomic():
+        inserted = write_packets(values, use_copy)
+        if rollups is not None:
+            rollups.write(scan.id)
+        if state is not None:
+            # packets_rowid counts the frames read from the capture
+            state.packets_rowid = state.packets_seen_rowid = frames
+            state.packets_ts_sec = ts_sec
+            state.save(update_fields=["packets_rowid", "packets_seen_rowid", "packets_ts_sec", "updated_at"])
+    return inserted
+
+def import_pcap_file(file_path, scan=None, chunk_size=None, use_copy=None, record_run=True, full=False):
+    """
+    Streams a pcap or pcapng capture (radiotap, raw 802.11, PPI or
+    Ethernet) into Packet rows. Frames are decoded with fixed-size struct
+    parsing (kismet.pcap) into PACKET_FIELDS tuples and written chunk by
+    chunk with write_packets(), so memory stays flat for any file size.
+
+    Unless scan is given the capture is fingerprinted and resolved like a
+    Kismet log (see resolve_scan): an unchanged capture returns its Scan
+    with import_stats["status"] == "unchanged", a grown or interrupted one
+    continues past the frames its ImportState counted, and a changed one
+    replaces the packets imported before. full=True re-imports it anyway.
+    A given scan gets the packets linked to its devices by source MAC.
+    Frames without a timestamp, of an unsupported link type or that fail
+    to decode are counted in import_stats["skipped"]. Returns the Scan.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"{file_path} does not exist")
+    if use_copy is None:
+        use_copy = copy_supported()
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZES["packets"]
+
+    devmac_index = {}
+    state = None
+    fp = None
+    if scan is None:
+        fp = fingerprint_capture_file(file_path)
+        scan, status = resolve_scan(file_path, fp)
+        if status == "unchanged" and not full:
+            scan.import_stats = {"status": status, "packets": 0, "skipped": 0, "stages": {}}
+            return scan
+        if full or status == "changed":
+            # Frames are only counted, so a rewritten capture starts over
+            reset_import_state(scan)
+            status = "changed" if status == "unchanged" else status
+        scan.origin = fp["origin"]
+        scan.file_path = file_path
+        scan.save(update_fields=["origin", "file_path"])
+        state, _ = ImportState.objects.get_or_create(scan=scan)
+        fresh = state.packets_rowid == 0
+    else:
+        status = "added"
+        fresh = False
+        devmac_index = dict(
+            Device.objects.filter(scan=scan, devmac__isnull=False).values_list("devmac", "id")
+        )
+
+    ensure_packet_partition(scan.id)
+    rollups = start_rollups(scan, fresh)
+
+    profiler = ImportProfiler()
+    started = time.perf_counter()
+    run = ImportRun.objects.create(scan=scan, file_path=file_path) if record_run else None
+    resume_after = state.packets_rowid if state is not None else 0
+    inserted = 0
+    skipped = 0
+
+    try:
+        with profiler.stage("packets") as stage, open(file_path, "rb") as f:
+            values = []
+            frames = last_ts = 0
+            for linktype, iface, ts_sec, ts_usec, length, data in iter_frames(f):
+                frames += 1
+                if frames <= resume_after:
+                    continue
+                try:
+                    decoded = decode_frame(linktype, data) if ts_sec is not None else None
+                except (struct.error, IndexError, ValueError):
+                    decoded = None
+                if decoded is None:
+                    skipped += 1
+                    continue
+                source, dest, trans, signal, freq, rate, phyname = decoded
+                device_id = devmac_index.get(source)
+                if rollups is not None:
+                    rollups.add(device_id, source, ts_sec, length, signal, freq, None, None)
+                values.append((
+                    scan.id, device_id, ts_sec, ts_usec,
+                    kismet_ts_to_datetime(ts_sec, ts_usec),
+                    source, dest, trans,
+                    freq, signal, rate, length,
+                    None, None, None, iface, phyname,
+                ))
+                last_ts = ts_sec
+                if len(values) >= chunk_size:
+                    inserted += _write_pcap_chunk(scan, values, use_copy, rollups, state, frames, last_ts)
+                    values = []
+            if values or (state is not None and frames > resume_after):
+                inserted += _write_pcap_chunk(scan, values, use_copy, rollups, state, frames, last_ts or None)
+            stage["rows"] = inserted
+    except Exception as e:
+        bump_scan_versions(scan.id)
+        _finish_run(run, "failed", started, profiler, error=str(e))
+        raise
+    bump_scan_versions(scan.id)
 
-    return scan
\ No newline at end of file
+    _finish_run(run, "success", started, profiler)
+    if fp is not None:
+        # Only a completed import marks the capture as seen
+        scan.fingerprint = fp["fingerprint"]
+        scan.file_size = fp["size"]
+        scan.save(update_fields=["fingerprint", "file_size"])
+    scan.import_stats = {"status": status, "packets": inserted, "skipped": skipped, "stages": profiler.stages}
+    return scan
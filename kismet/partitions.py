@@ -0,0 +1,149 @@
+from django.db import connection, transaction
+
+# packets is LIST-partitioned on scan_id on PostgreSQL: one packets_scan_<id>
+# partition per Scan, plus packets_default for rows nobody made a partition
+# for (and, after migration 0007, every packet imported before it).
+PACKETS_TABLE = "packets"
+DEFAULT_PARTITION = "packets_default"
+
+
+def partition_name(scan_id):
+    return f"packets_scan_{int(scan_id)}"
+
+
+def packets_partitioned(conn=None):
+    """True when the packets table is a PostgreSQL partitioned table."""
+    conn = conn or connection
+    if conn.vendor != "postgresql":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [PACKETS_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def _split_from_default(cursor, scan_id):
+    """
+    Moves one scan's rows out of the default partition into a partition of
+    their own. Attaching the partition first would fail, since the default
+    partition would then hold rows belonging to it.
+    """
+    name = partition_name(scan_id)
+    cursor.execute(
+        f"CREATE TABLE {name} (LIKE {PACKETS_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    cursor.execute(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE scan_id = %s", [scan_id])
+    moved = cursor.rowcount
+    cursor.execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE scan_id = %s", [scan_id])
+    cursor.execute(f"ALTER TABLE {PACKETS_TABLE} ATTACH PARTITION {name} FOR VALUES IN (%s)", [int(scan_id)])
+    return moved
+
+
+def ensure_packet_partition(scan_id):
+    """
+    Makes sure scan_id has its own packets partition, creating it (and
+    moving any rows the default partition holds for it) when needed.
+    Returns the number of rows moved. No-op outside partitioned PostgreSQL.
+    """
+    if not packets_partitioned():
+        return 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if _table_exists(cursor, partition_name(scan_id)):
+            return 0
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE scan_id = %s)", [scan_id])
+        if cursor.fetchone()[0]:
+            return _split_from_default(cursor, scan_id)
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(scan_id)} "
+            f"PARTITION OF {PACKETS_TABLE} FOR VALUES IN (%s)",
+            [int(scan_id)],
+        )
+    return 0
+
+
+def drop_packet_partition(scan_id):
+    """
+    Deletes every packet of a scan by dropping its partition, instead of
+    deleting rows one by one. Rows left in the default partition are
+    deleted normally. Returns True when a partition was dropped.
+    """
+    if not packets_partitioned():
+        return False
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        name = partition_name(scan_id)
+        dropped = _table_exists(cursor, name)
+        if dropped:
+            cursor.execute(f"DROP TABLE {name}")
+        cursor.execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE scan_id = %s", [scan_id])
+    return dropped
+
+
+def default_partition_scans():
+    """Scan ids that still have rows in the default partition."""
+    if not packets_partitioned():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT scan_id FROM {DEFAULT_PARTITION} ORDER BY scan_id")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def partition_packets_table(schema_editor):
+    """
+    Turns the plain packets table into one LIST-partitioned by scan_id.
+    The existing table becomes the default partition as it is, so the
+    migration does not copy any rows; scans are moved into partitions of
+    their own afterwards (ensure_packet_partition / partition_packets).
+    """
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql" or packets_partitioned(conn):
+        return
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {PACKETS_TABLE}")
+        max_id = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {PACKETS_TABLE} RENAME TO {DEFAULT_PARTITION}")
+        # The partition gets the parent's (id, scan_id) key when attached
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'",
+            [DEFAULT_PARTITION],
+        )
+        for (conname,) in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {DEFAULT_PARTITION} DROP CONSTRAINT {conn.ops.quote_name(conname)}")
+        # A partition cannot keep an identity column or sequence of its own
+        cursor.execute(f"ALTER TABLE {DEFAULT_PARTITION} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {DEFAULT_PARTITION} ALTER COLUMN id DROP DEFAULT")
+
+        cursor.execute(
+            f"CREATE TABLE {PACKETS_TABLE} (LIKE {DEFAULT_PARTITION} INCLUDING DEFAULTS) "
+            f"PARTITION BY LIST (scan_id)"
+        )
+        # A serial column's old packets_id_seq may still exist, so use a new name
+        cursor.execute(f"CREATE SEQUENCE {PACKETS_TABLE}_part_id_seq OWNED BY {PACKETS_TABLE}.id")
+        cursor.execute(f"SELECT setval('{PACKETS_TABLE}_part_id_seq', %s, %s)", [max(max_id, 1), max_id > 0])
+        cursor.execute(
+            f"ALTER TABLE {PACKETS_TABLE} ALTER COLUMN id SET DEFAULT nextval('{PACKETS_TABLE}_part_id_seq')"
+        )
+        # The partition key has to be part of every unique constraint
+        cursor.execute(f"ALTER TABLE {PACKETS_TABLE} ADD PRIMARY KEY (id, scan_id)")
+        cursor.execute(
+            f"ALTER TABLE {PACKETS_TABLE} ADD CONSTRAINT packets_scan_id_fk "
+            f"FOREIGN KEY (scan_id) REFERENCES scans (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute(
+            f"ALTER TABLE {PACKETS_TABLE} ADD CONSTRAINT packets_device_id_fk "
+            f"FOREIGN KEY (device_id) REFERENCES devices (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        for column in ("scan_id", "device_id", "ts_sec", "timestamp"):
+            cursor.execute(f"CREATE INDEX packets_{column}_idx ON {PACKETS_TABLE} ({column})")
+
+        cursor.execute(f"ALTER TABLE {PACKETS_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
@@ -0,0 +1,303 @@
+import struct
+
+# Link types the frame parser understands
+LINKTYPE_ETHERNET = 1
+LINKTYPE_IEEE802_11 = 105
+LINKTYPE_RADIOTAP = 127
+LINKTYPE_PPI = 192
+SUPPORTED_LINKTYPES = {LINKTYPE_ETHERNET, LINKTYPE_IEEE802_11, LINKTYPE_RADIOTAP, LINKTYPE_PPI}
+
+NULL_MAC = "00:00:00:00:00:00"
+
+# Yielded by iter_frames() for a packet block it cannot read (too short, or
+# naming an interface never described); decode_frame() rejects it
+UNREADABLE_FRAME = (None, None, None, None, 0, b"")
+
+# Bytes read from disk at a time; blocks are sliced out of this buffer
+READ_SIZE = 1 << 20
+
+# pcapng block types
+SHB = 0x0A0D0D0A
+IDB = 0x00000001
+PB = 0x00000002
+SPB = 0x00000003
+EPB = 0x00000006
+
+# Classic pcap magic numbers -> timestamp fraction divisor to microseconds
+PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1),
+    b"\xa1\xb2\xc3\xd4": (">", 1),
+    b"\x4d\x3c\xb2\xa1": ("<", 1000),
+    b"\xa1\xb2\x3c\x4d": (">", 1000),
+}
+
+# Radiotap fields up to the dBm antenna signal: (size, alignment) by
+# presence bit. Everything the importer reads sits in this range.
+RADIOTAP_FIELDS = (
+    (8, 8),   # 0 TSFT
+    (1, 1),   # 1 flags
+    (1, 1),   # 2 rate
+    (4, 2),   # 3 channel
+    (2, 1),   # 4 FHSS
+    (1, 1),   # 5 dBm antenna signal
+)
+RT_RATE, RT_CHANNEL, RT_DBM_SIGNAL = 2, 3, 5
+
+_s8 = struct.Struct("<b")
+_u16_le = struct.Struct("<H")
+_u32_le = struct.Struct("<I")
+_radiotap_header = struct.Struct("<BBHI")
+_block_header = {e: struct.Struct(e + "II") for e in "<>"}
+_idb = {e: struct.Struct(e + "HHI") for e in "<>"}
+_epb = {e: struct.Struct(e + "IIIII") for e in "<>"}
+_pb = {e: struct.Struct(e + "HHIIII") for e in "<>"}
+_spb = {e: struct.Struct(e + "I") for e in "<>"}
+_option = {e: struct.Struct(e + "HH") for e in "<>"}
+_pcap_header = {e: struct.Struct(e + "HHiIII") for e in "<>"}
+_pcap_record = {e: struct.Struct(e + "IIII") for e in "<>"}
+
+
+def _mac(data, offset):
+    return ":".join(f"{b:02X}" for b in data[offset:offset + 6])
+
+
+class _Buffered:
+    """Minimal read-exactly wrapper with a large read-ahead buffer."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = b""
+        self.pos = 0
+
+    def read(self, n):
+        if self.pos + n > len(self.buf):
+            self.buf = self.buf[self.pos:] + self.f.read(max(n, READ_SIZE))
+            self.pos = 0
+            if n > len(self.buf):
+                return None
+        data = self.buf[self.pos:self.pos + n]
+        self.pos += n
+        return data
+
+
+class _Interface:
+    __slots__ = ("linktype", "name", "units_per_sec")
+
+    def __init__(self, linktype, name=None, units_per_sec=1_000_000):
+        self.linktype = linktype
+        self.name = name
+        self.units_per_sec = units_per_sec
+
+    def split_ts(self, ts):
+        sec, frac = divmod(ts, self.units_per_sec)
+        return sec, frac * 1_000_000 // self.units_per_sec
+
+
+def _parse_idb(body, endian):
+    linktype, _, _ = _idb[endian].unpack_from(body, 0)
+    iface = _Interface(linktype)
+    option = _option[endian]
+    offset = 8
+    while offset + 4 <= len(body):
+        code, length = option.unpack_from(body, offset)
+        value = body[offset + 4:offset + 4 + length]
+        if code == 0:
+            break
+        if code == 2:  # if_name
+            iface.name = value.decode("utf-8", "replace")
+        elif code == 9 and length >= 1:  # if_tsresol
+            resol = value[0]
+            iface.units_per_sec = 2 ** (resol & 0x7F) if resol & 0x80 else 10 ** resol
+        offset += 4 + ((length + 3) & ~3)
+    return iface
+
+
+def _packet(interfaces, iface_id, ts_high, ts_low, origlen, data):
+    """The frame of an enhanced or obsolete packet block."""
+    if iface_id >= len(interfaces):
+        return UNREADABLE_FRAME
+    iface = interfaces[iface_id]
+    ts_sec, ts_usec = iface.split_ts((ts_high << 32) | ts_low)
+    return iface.linktype, iface.name, ts_sec, ts_usec, origlen, data
+
+
+def _pcapng_frames(reader, first):
+    """Yields frames of a pcapng file; first holds the 8 bytes already read."""
+    endian = "<"
+    interfaces = []
+    header = first
+
+    while header is not None and len(header) == 8:
+        block_type = struct.unpack_from("<I", header)[0]
+        if block_type == SHB:
+            # Byte order of the section is given by its own magic
+            magic = reader.read(4)
+            if magic is None:
+                return
+            endian = "<" if magic == b"\x4d\x3c\x2b\x1a" else ">"
+            interfaces = []
+            block_len = struct.unpack_from(endian + "I", header, 4)[0]
+            body = reader.read(block_len - 12) if block_len >= 12 else None
+        else:
+            block_type, block_len = _block_header[endian].unpack(header)
+            body = reader.read(block_len - 8) if block_len >= 12 else None
+        if body is None:
+            return  # truncated capture, e.g. Kismet still writing it
+
+        if block_type == IDB and len(body) >= _idb[endian].size:
+            interfaces.append(_parse_idb(body, endian))
+        elif block_type == EPB:
+            if len(body) < _epb[endian].size:
+                yield UNREADABLE_FRAME
+            else:
+                iface_id, ts_high, ts_low, caplen, origlen = _epb[endian].unpack_from(body, 0)
+                yield _packet(interfaces, iface_id, ts_high, ts_low, origlen, body[20:20 + caplen])
+        elif block_type == SPB and interfaces:
+            if len(body) < _spb[endian].size:
+                yield UNREADABLE_FRAME
+            else:
+                origlen = _spb[endian].unpack_from(body, 0)[0]
+                iface = interfaces[0]
+                caplen = min(origlen, len(body) - 8)
+                yield iface.linktype, iface.name, None, None, origlen, body[4:4 + caplen]
+        elif block_type == PB:
+            if len(body) < _pb[endian].size:
+                yield UNREADABLE_FRAME
+            else:
+                iface_id, _, ts_high, ts_low, caplen, origlen = _pb[endian].unpack_from(body, 0)
+                yield _packet(interfaces, iface_id, ts_high, ts_low, origlen, body[20:20 + caplen])
+
+        header = reader.read(8)
+
+
+def _pcap_frames(reader, endian, divisor):
+    header = reader.read(20)
+    if header is None:
+        return
+    _, _, _, _, _, linktype = _pcap_header[endian].unpack(header)
+    record = _pcap_record[endian]
+
+    while True:
+        rec = reader.read(16)
+        if rec is None:
+            return
+        ts_sec, ts_frac, caplen, origlen = record.unpack(rec)
+        data = reader.read(caplen)
+        if data is None:
+            return
+        yield linktype, None, ts_sec, ts_frac // divisor, origlen, data
+
+
+def iter_frames(f):
+    """
+    Streams (linktype, interface name, ts_sec, ts_usec, original length,
+    frame bytes) from a pcap or pcapng file object, reading it in READ_SIZE
+    pieces so memory stays flat whatever the file size. A truncated last
+    record ends the stream quietly; an unreadable pcapng packet block comes
+    out as UNREADABLE_FRAME and the stream carries on past it.
+    """
+    reader = _Buffered(f)
+    first = reader.read(4)
+    if first is None:
+        return
+    if first in PCAP_MAGIC:
+        endian, divisor = PCAP_MAGIC[first]
+        yield from _pcap_frames(reader, endian, divisor)
+    elif first == b"\x0a\x0d\x0d\x0a":
+        length = reader.read(4)
+        if length is None:
+            return
+        yield from _pcapng_frames(reader, first + length)
+    else:
+        raise ValueError("not a pcap or pcapng file")
+
+
+def parse_radiotap(data):
+    """
+    Returns (header length, dBm signal, frequency in MHz, rate in Mbps)
+    from a radiotap header; missing fields are None.
+    """
+    _, _, length, present = _radiotap_header.unpack_from(data, 0)
+
+    # Skip the extended presence words; only the first one is decoded
+    offset = 8
+    word = present
+    while word & 0x80000000 and offset + 4 <= len(data):
+        word = _u32_le.unpack_from(data, offset)[0]
+        offset += 4
+
+    length = min(length, len(data))
+    signal = freq = rate = None
+    for bit, (size, align) in enumerate(RADIOTAP_FIELDS):
+        if not present & (1 << bit):
+            continue
+        offset = (offset + align - 1) & ~(align - 1)
+        if offset + size > length:
+            break
+        if bit == RT_RATE:
+            rate = data[offset] / 2
+        elif bit == RT_CHANNEL:
+            freq = _u16_le.unpack_from(data, offset)[0]
+        elif bit == RT_DBM_SIGNAL:
+            signal = _s8.unpack_from(data, offset)[0]
+        offset += size
+
+    return length, signal, freq, rate
+
+
+def parse_dot11(data, offset):
+    """
+    Returns (source, destination, transmitter) MACs of an 802.11 frame,
+    following the ToDS/FromDS address layout; transmitter is only set on
+    four-address (WDS) frames, as Kismet logs it.
+    """
+    if len(data) < offset + 10:
+        return NULL_MAC, NULL_MAC, NULL_MAC
+
+    flags = data[offset + 1]
+    dest = _mac(data, offset + 4)
+    if len(data) < offset + 16:
+        # ACK and CTS only carry the receiver; Kismet logs it as both ends
+        return dest, dest, NULL_MAC
+    addr2 = _mac(data, offset + 10)
+    if len(data) < offset + 22:
+        return addr2, dest, NULL_MAC
+    addr3 = _mac(data, offset + 16)
+
+    to_ds, from_ds = flags & 0x01, flags & 0x02
+    if not to_ds and not from_ds:
+        return addr2, dest, NULL_MAC
+    if to_ds and not from_ds:
+        return addr2, addr3, NULL_MAC
+    if from_ds and not to_ds:
+        return addr3, dest, NULL_MAC
+    source = _mac(data, offset + 24) if len(data) >= offset + 30 else NULL_MAC
+    return source, addr3, addr2
+
+
+def decode_frame(linktype, data):
+    """
+    Returns (source, dest, transmitter, signal, frequency in kHz, rate,
+    phyname) for one captured frame, or None for unsupported link types.
+    The frequency is scaled to kHz like the Kismet packets table.
+    """
+    signal = freq = rate = None
+    if linktype == LINKTYPE_RADIOTAP:
+        if len(data) < 8:
+            return None
+        offset, signal, freq, rate = parse_radiotap(data)
+    elif linktype == LINKTYPE_IEEE802_11:
+        offset = 0
+    elif linktype == LINKTYPE_PPI:
+        if len(data) < 8:
+            return None
+        offset = _u16_le.unpack_from(data, 2)[0]
+    elif linktype == LINKTYPE_ETHERNET:
+        if len(data) < 12:
+            return None
+        return _mac(data, 6), _mac(data, 0), NULL_MAC, None, None, None, "Ethernet"
+    else:
+        return None
+
+    source, dest, trans = parse_dot11(data, offset)
+    return source, dest, trans, signal, freq * 1000 if freq else None, rate, "IEEE802.11"
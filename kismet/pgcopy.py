@@ -0,0 +1,95 @@
+import io
+import json
+import math
+
+from django.db import connection
+
+# Django internal types written as integers / floats in COPY text format
+INTEGER_TYPES = {
+    "IntegerField", "BigIntegerField", "SmallIntegerField",
+    "PositiveIntegerField", "PositiveBigIntegerField", "PositiveSmallIntegerField",
+    "AutoField", "BigAutoField", "ForeignKey",
+}
+FLOAT_TYPES = {"FloatField"}
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def copy_supported():
+    """True when the default database can take COPY ... FROM STDIN."""
+    return connection.vendor == "postgresql"
+
+
+def _format_integer(value):
+    return str(int(value))
+
+
+def _format_float(value):
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "Infinity" if value > 0 else "-Infinity"
+    return repr(value)
+
+
+def _format_datetime(value):
+    return value.isoformat()
+
+
+def _format_json(value):
+    return json.dumps(value).translate(_ESCAPES)
+
+
+def _format_text(value):
+    return str(value).translate(_ESCAPES)
+
+
+def _formatter(field):
+    internal_type = field.get_internal_type()
+    if internal_type in INTEGER_TYPES:
+        return _format_integer
+    if internal_type in FLOAT_TYPES:
+        return _format_float
+    if internal_type == "DateTimeField":
+        return _format_datetime
+    if internal_type == "JSONField":
+        return _format_json
+    return _format_text
+
+
+def copy_rows(model, fields, rows, table=None):
+    """
+    Loads rows (tuples ordered like fields, given as attnames such as
+    "scan_id") into the model's table, or into table when given (a staging
+    table with the same columns), with COPY FROM STDIN. Values are
+    formatted per column type, so a Kismet REAL going into an integer column
+    is written the way the ORM would have cast it. Returns the row count.
+    """
+    formatters = [_formatter(model._meta.get_field(name)) for name in fields]
+
+    buf = io.StringIO()
+    count = 0
+    for row in rows:
+        buf.write("\t".join(
+            "\\N" if value is None else fmt(value)
+            for fmt, value in zip(formatters, row)
+        ))
+        buf.write("\n")
+        count += 1
+    if not count:
+        return 0
+    buf.seek(0)
+
+    columns = ", ".join(connection.ops.quote_name(name) for name in fields)
+    sql = f"COPY {connection.ops.quote_name(table or model._meta.db_table)} ({columns}) FROM STDIN"
+
+    with connection.cursor() as cursor:
+        if hasattr(cursor.cursor, "copy_expert"):
+            # psycopg2
+            cursor.cursor.copy_expert(sql, buf)
+        else:
+            # psycopg 3
+            with cursor.cursor.copy(sql) as copy:
+                copy.write(buf.getvalue())
+    return count
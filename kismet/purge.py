@@ -0,0 +1,110 @@
+from django.db import connection, transaction
+
+from .cache import bump_scan_versions
+from .models import (
+    Scan, Device, DeviceData, Packet, PacketRollup,
+    DataSource, Alert, Client, ImportState, ImportRun
+)
+from .partitions import DEFAULT_PARTITION, drop_packet_partition, packets_partitioned
+from .registry import forget_scan
+
+# Rows deleted per statement (and per transaction)
+PURGE_BATCH_SIZE = 10000
+
+# Children before parents, so no batch leaves a row pointing at a deleted one
+PURGE_ORDER = (Packet, PacketRollup, Client, DeviceData, Alert, DataSource, ImportRun, ImportState, Device)
+
+
+def delete_batches(model, scan_id, batch_size=PURGE_BATCH_SIZE, on_batch=None, where=None, params=()):
+    """
+    Deletes a scan's rows of one table, optionally narrowed by an extra SQL
+    condition, with set-based DELETE statements of at most batch_size rows,
+    each committed on its own so locks and undo stay small. Returns the
+    number of rows deleted.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    condition = f"scan_id = %s AND ({where})" if where else "scan_id = %s"
+    sql = f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {condition} LIMIT %s)"
+
+    deleted = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [scan_id, *params, batch_size])
+            count = cursor.rowcount
+        deleted += count
+        if on_batch is not None:
+            on_batch(count)
+        if count < batch_size:
+            return deleted
+
+
+def compact(tables):
+    """
+    Makes the space of deleted rows reusable: VACUUM ANALYZE of the given
+    tables on PostgreSQL, a full VACUUM of the file on SQLite.
+    """
+    if connection.vendor == "postgresql":
+        # VACUUM cannot run inside a transaction; Django autocommits here
+        with connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute(f"VACUUM (ANALYZE) {connection.ops.quote_name(table)}")
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM")
+
+
+def purge_scan(scan_id, batch_size=PURGE_BATCH_SIZE, vacuum=True, progress=None):
+    """
+    Deletes a Scan and everything imported into it without Django's
+    cascade collector, which loads every related row into memory first.
+    The packets partition is dropped when there is one; every other table
+    is emptied in batches in PURGE_ORDER, then the now empty Scan is
+    deleted through the ORM. progress, when given, is called as
+    progress(stage, rows_done, rows_total). Returns rows deleted per table.
+    """
+    counts = {
+        model: model.objects.filter(scan_id=scan_id).count()
+        for model in PURGE_ORDER
+    }
+    rows_total = sum(counts.values())
+    done = [0]
+
+    def report(stage):
+        def on_batch(rows):
+            done[0] += rows
+            if progress is not None:
+                progress(stage, done[0], max(rows_total, done[0]))
+        return on_batch
+
+    # Cached responses stop matching as soon as rows start disappearing; once
+    # the Scan row is gone no version of it matches at all (kismet.cache)
+    bump_scan_versions(scan_id)
+
+    # Before the scan's devices go, while their MACs can still be read
+    forget_scan(scan_id)
+
+    deleted = {}
+    vacuum_tables = []
+
+    for model in PURGE_ORDER:
+        table = model._meta.db_table
+        stage = report(table)
+        if model is Packet and drop_packet_partition(scan_id):
+            stage(counts[Packet])
+            deleted[table] = counts[Packet]
+            continue
+        if counts[model]:
+            deleted[table] = delete_batches(model, scan_id, batch_size, stage)
+            vacuum_tables.append(DEFAULT_PARTITION if model is Packet and packets_partitioned() else table)
+        else:
+            deleted[table] = 0
+
+    with transaction.atomic():
+        Scan.objects.filter(pk=scan_id).delete()
+
+    if vacuum and vacuum_tables:
+        if progress is not None:
+            progress("vacuum", done[0], max(rows_total, done[0]))
+        compact(vacuum_tables)
+
+    return deleted
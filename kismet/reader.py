@@ -0,0 +1,105 @@
+import gc
+import resource
+import sqlite3
+from pathlib import Path
+
+try:
+    import psutil
+except ImportError:  # psutil is optional outside the Pi image
+    psutil = None
+
+# Rows pulled per fetchmany() call, per Kismet table
+DEFAULT_CHUNK_SIZES = {
+    "devices": 500,
+    "datasources": 100,
+    "packets": 5000,
+    "alerts": 1000,
+    "data": 1000,
+}
+
+# Floor the chunk size is halved down to while over the RSS budget
+MIN_CHUNK_SIZE = 50
+
+# Only the columns import_kismet_file reads, never SELECT *. The append-only
+# log tables also return their rowid, which the importer uses as a cursor.
+DEVICE_COLUMNS = (
+    "devkey", "phyname", "devmac", "type", "strongest_signal",
+    "first_time", "last_time",
+    "min_lat", "min_lon", "max_lat", "max_lon", "avg_lat", "avg_lon",
+    "bytes_data", "device",
+)
+DATASOURCE_COLUMNS = ("uuid", "typestring", "definition", "name", "interface", "json")
+PACKET_COLUMNS = (
+    "rowid", "ts_sec", "ts_usec", "phyname", "sourcemac", "destmac", "transmac",
+    "frequency", "devkey", "lat", "lon", "alt", "packet_len", "signal",
+    "datasource", "datarate",
+)
+ALERT_COLUMNS = ("rowid", "ts_sec", "ts_usec", "devmac", "header", "json")
+DATA_COLUMNS = ("rowid", "ts_sec", "ts_usec", "devmac", "type", "json")
+
+
+def open_kismet_db(file_path):
+    """Opens a Kismet log read-only so the importer can never modify it."""
+    uri = Path(file_path).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    # Without psutil fall back to the peak, which only over-reports
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class KismetReader:
+    """
+    Streams rows out of a Kismet sqlite log in chunks. With max_rss_mb set,
+    the chunk size of a table is halved whenever the process grows past the
+    budget, so large captures import in bounded memory. on_chunk, when set,
+    is called with (table, rows) once each chunk has been processed.
+    """
+
+    def __init__(self, conn, chunk_sizes=None, max_rss_mb=None, on_chunk=None):
+        self.conn = conn
+        self.chunk_sizes = {**DEFAULT_CHUNK_SIZES, **(chunk_sizes or {})}
+        self.max_rss_mb = max_rss_mb
+        self.on_chunk = on_chunk
+
+    def chunks(self, table, columns, where="", params=(), order_by=""):
+        """Yields lists of sqlite3.Row for the given table and columns."""
+        sql = f"SELECT {', '.join(columns)} FROM {table}"
+        if where:
+            sql += f" WHERE {where}"
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+
+        cur = self.conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(self.chunk_sizes[table])
+            if not rows:
+                break
+            yield rows
+            if self.on_chunk is not None:
+                self.on_chunk(table, len(rows))
+            del rows
+            self._enforce_budget(table)
+
+    def chunks_after(self, table, columns, rowid):
+        """Yields the rows added to an append-only table after the given rowid."""
+        return self.chunks(table, columns, "rowid > ?", (rowid,), "rowid")
+
+    def count_after(self, table, rowid):
+        """Upper bound of the rows past rowid, from MAX(rowid) instead of a COUNT(*)."""
+        max_rowid = self.conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0]
+        return max(0, (max_rowid or 0) - rowid)
+
+    def _enforce_budget(self, table):
+        if not self.max_rss_mb or current_rss_mb() <= self.max_rss_mb:
+            return
+
+        gc.collect()
+        if current_rss_mb() > self.max_rss_mb:
+            self.chunk_sizes[table] = max(MIN_CHUNK_SIZE, self.chunk_sizes[table] // 2)
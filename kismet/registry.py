@@ -0,0 +1,251 @@
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import bump_scan_versions
+from .models import Scan, Device, KnownDevice
+
+NULL_MAC = "00:00:00:00:00:00"
+
+KNOWN_DEVICE_UPDATE_FIELDS = [
+    "phyname", "type", "manufacturer",
+    "first_seen", "last_seen", "first_scan", "last_scan", "scan_count",
+    "last_lat", "last_lon", "last_ssid", "updated_at",
+]
+
+# KnownDevice columns upserted by DeviceRegistry.update(), in order
+KNOWN_DEVICE_COLUMNS = (
+    "devmac", "phyname", "type", "manufacturer", "first_seen", "last_seen",
+    "first_scan_id", "last_scan_id", "scan_count", "last_lat", "last_lon", "last_ssid", "updated_at",
+)
+
+# MACs upserted per query; 13 parameters each stays well under SQLite's
+# 32766 variable limit
+REGISTRY_BATCH_SIZE = 1000
+
+# Databases update() merges rows on in SQL with INSERT ... ON CONFLICT
+_UPSERT_VENDORS = ("postgresql", "sqlite")
+
+
+def _earlier(a, b):
+    return a is None or (b is not None and b < a)
+
+
+def _later(a, b):
+    return a is None or (b is not None and b > a)
+
+
+class DeviceRegistry:
+    """
+    Folds one scan's Device rows into the cross-scan KnownDevice registry.
+    A MAC's scan_count goes up the first time it shows up in the scan; the
+    MACs the scan already held are loaded once, so re-importing or
+    following a growing log does not count a scan twice. update() is called
+    in the same transaction as the device upsert it mirrors.
+    """
+
+    def __init__(self, scan, scan_macs=None):
+        self.scan = scan
+        if scan_macs is None:
+            scan_macs = set(
+                Device.objects.filter(scan=scan, devmac__isnull=False).values_list("devmac", flat=True)
+            )
+        self.scan_macs = scan_macs
+
+    def _sightings(self, devices):
+        """Merges devices sharing a MAC (one per phy, say) into one sighting each."""
+        sightings = {}
+        for device in devices:
+            mac = device.devmac
+            if not mac or mac == NULL_MAC:
+                continue
+            seen = sightings.get(mac)
+            if seen is None:
+                sightings[mac] = [device.first_time, device.last_time, device]
+                continue
+            if _earlier(seen[0], device.first_time):
+                seen[0] = device.first_time
+            if _later(seen[1], device.last_time):
+                seen[1] = device.last_time
+                seen[2] = device
+        return sightings
+
+    def _merge(self, known, first_time, last_time, device, new_in_scan):
+        if new_in_scan:
+            known.scan_count += 1
+        # Ties go to the oldest / newest scan, whatever order scans are imported in
+        if _earlier(known.first_seen, first_time) or (
+            first_time == known.first_seen and self.scan.id <= (known.first_scan_id or self.scan.id)
+        ):
+            known.first_seen = first_time
+            known.first_scan_id = self.scan.id
+        if _later(known.last_seen, last_time) or (
+            last_time == known.last_seen and self.scan.id >= (known.last_scan_id or self.scan.id)
+        ):
+            known.last_seen = last_time
+            known.last_scan_id = self.scan.id
+            known.phyname = device.phyname
+            known.type = device.type
+            known.manufacturer = device.manufacturer or known.manufacturer
+            known.last_ssid = device.ssid or known.last_ssid
+            # Kismet reports 0,0 for devices without a GPS fix
+            if device.avg_lat or device.avg_lon:
+                known.last_lat, known.last_lon = device.avg_lat, device.avg_lon
+
+    def update(self, devices):
+        """Merges saved Device objects of the scan into the registry. Returns MACs touched."""
+        sightings = self._sightings(devices)
+        # Rows are locked in MAC order, so concurrent imports cannot deadlock
+        macs = sorted(sightings)
+
+        for start in range(0, len(macs), REGISTRY_BATCH_SIZE):
+            batch = macs[start:start + REGISTRY_BATCH_SIZE]
+            if connection.vendor not in _UPSERT_VENDORS:
+                self._merge_existing(batch, sightings)
+                continue
+            rows = []
+            for mac in batch:
+                first_time, last_time, device = sightings[mac]
+                known = KnownDevice(devmac=mac)
+                self._merge(known, first_time, last_time, device, mac not in self.scan_macs)
+                rows.append(known)
+            _upsert(rows)
+
+        self.scan_macs.update(macs)
+        return len(macs)
+
+    def _merge_existing(self, batch, sightings):
+        """
+        update() on databases without INSERT ... ON CONFLICT: merges the
+        stored rows of the batch in Python, holding their locks until the
+        transaction ends.
+        """
+        existing = {
+            known.devmac: known
+            for known in KnownDevice.objects.select_for_update().filter(devmac__in=batch).order_by("devmac")
+        }
+        rows = []
+        for mac in batch:
+            first_time, last_time, device = sightings[mac]
+            known = existing.get(mac) or KnownDevice(devmac=mac)
+            self._merge(known, first_time, last_time, device, mac not in self.scan_macs)
+            rows.append(known)
+
+        KnownDevice.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["devmac"],
+            update_fields=KNOWN_DEVICE_UPDATE_FIELDS,
+        )
+
+
+def _upsert_sql(rows):
+    """
+    INSERT of KNOWN_DEVICE_COLUMNS rows, one scan's sighting each, that
+    merges each row colliding with a stored MAC into it in SQL, the way
+    DeviceRegistry._merge() does: scan counts add up and concurrent imports
+    do not overwrite each other's sightings.
+    """
+    qn = connection.ops.quote_name
+    table = qn(KnownDevice._meta.db_table)
+
+    def old(column):
+        return f"{table}.{qn(column)}"
+
+    def new(column):
+        return f"EXCLUDED.{qn(column)}"
+
+    def wins(time, scan, op):
+        # Ties go to the oldest / newest scan, as in _merge()
+        return (f"({old(time)} IS NULL OR {new(time)} {op} {old(time)} OR ({new(time)} = {old(time)}"
+                f" AND {new(scan)} {op}= COALESCE({old(scan)}, {new(scan)})))")
+
+    first, last = wins("first_seen", "first_scan_id", "<"), wins("last_seen", "last_scan_id", ">")
+    located = f"({new('last_lat')} IS NOT NULL OR {new('last_lon')} IS NOT NULL)"
+
+    def pick(column, when):
+        return f"CASE WHEN {when} THEN {new(column)} ELSE {old(column)} END"
+
+    def fill(column):
+        return f"CASE WHEN {last} THEN COALESCE(NULLIF({new(column)}, ''), {old(column)}) ELSE {old(column)} END"
+
+    merged = {
+        "phyname": pick("phyname", last),
+        "type": pick("type", last),
+        "manufacturer": fill("manufacturer"),
+        "first_seen": pick("first_seen", first),
+        "last_seen": pick("last_seen", last),
+        "first_scan_id": pick("first_scan_id", first),
+        "last_scan_id": pick("last_scan_id", last),
+        "scan_count": f"{old('scan_count')} + {new('scan_count')}",
+        "last_lat": pick("last_lat", f"{last} AND {located}"),
+        "last_lon": pick("last_lon", f"{last} AND {located}"),
+        "last_ssid": fill("last_ssid"),
+        "updated_at": new("updated_at"),
+    }
+    placeholders = "(" + ", ".join(["%s"] * len(KNOWN_DEVICE_COLUMNS)) + ")"
+    return (
+        f"INSERT INTO {table} ({', '.join(qn(column) for column in KNOWN_DEVICE_COLUMNS)})"
+        f" VALUES {', '.join([placeholders] * rows)}"
+        f" ON CONFLICT ({qn('devmac')}) DO UPDATE SET "
+        + ", ".join(f"{qn(column)} = {expression}" for column, expression in merged.items())
+    )
+
+
+def _upsert(rows):
+    """Upserts KnownDevice objects with one INSERT ... VALUES statement."""
+    fields = [KnownDevice._meta.get_field(column) for column in KNOWN_DEVICE_COLUMNS]
+    now = timezone.now()
+    params = []
+    for known in rows:
+        known.updated_at = now
+        params.extend(field.get_db_prep_save(getattr(known, field.attname), connection) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql(len(rows)), params)
+
+
+def forget_scan(scan_id):
+    """
+    Recounts the scans of every MAC in a scan about to be deleted, leaving
+    it out, and drops MACs no other scan has. first_seen/last_seen keep the
+    deleted sighting: they record when a MAC was seen, not where it still
+    is. Safe to run twice. Returns the number of MACs recounted.
+    """
+    macs = list(
+        Device.objects.filter(scan_id=scan_id, devmac__isnull=False)
+        .values_list("devmac", flat=True).distinct()
+    )
+    other_scans = (
+        Device.objects.filter(devmac=OuterRef("devmac")).exclude(scan_id=scan_id)
+        .values("devmac").annotate(scans=Count("scan_id", distinct=True)).values("scans")
+    )
+    for start in range(0, len(macs), REGISTRY_BATCH_SIZE):
+        batch = macs[start:start + REGISTRY_BATCH_SIZE]
+        KnownDevice.objects.filter(devmac__in=batch).update(
+            scan_count=Coalesce(Subquery(other_scans, output_field=IntegerField()), Value(0))
+        )
+        KnownDevice.objects.filter(devmac__in=batch, scan_count=0).delete()
+    return len(macs)
+
+
+def rebuild_registry(progress=None):
+    """
+    Recomputes the whole registry from the Device table, scan by scan in
+    import order, e.g. for scans imported before the registry existed.
+    progress, when given, is called as progress(scan, macs). Returns the
+    number of KnownDevice rows.
+    """
+    fields = ("scan", "devmac", "phyname", "type", "manufacturer", "ssid",
+              "first_time", "last_time", "avg_lat", "avg_lon")
+    with transaction.atomic():
+        KnownDevice.objects.all().delete()
+        for scan in Scan.objects.order_by("id"):
+            registry = DeviceRegistry(scan, scan_macs=set())
+            devices = Device.objects.filter(scan=scan, devmac__isnull=False).only(*fields)
+            macs = registry.update(devices.iterator(chunk_size=REGISTRY_BATCH_SIZE))
+            if progress is not None:
+                progress(scan, macs)
+        # New vs returning devices of every scan may have changed
+        bump_scan_versions()
+        return KnownDevice.objects.count()
@@ -0,0 +1,333 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .models import Scan, Packet, PacketRollup
+from .pgcopy import copy_rows, copy_supported
+from .purge import PURGE_BATCH_SIZE, delete_batches
+
+# Width of one rollup bucket; charts of old scans work at minute resolution
+ROLLUP_BUCKET_SECONDS = 60
+
+# Stored packets read per query when rolling up an existing scan
+ROLLUP_CHUNK_SIZE = 50000
+
+# Packet columns RollupBuffer.add() takes, in order
+ROLLUP_PACKET_FIELDS = ("device_id", "sourcemac", "ts_sec", "packet_len", "signal", "frequency", "lat", "lon")
+
+# Rollup rows per INSERT ... VALUES statement where COPY is unavailable;
+# 15 parameters each stays well under SQLite's 32766 variable limit
+ROLLUP_INSERT_BATCH_SIZE = 1000
+
+# PacketRollup columns written by RollupBuffer.write(), in order
+ROLLUP_COLUMNS = (
+    "scan_id", "device_id", "sourcemac", "bucket_start", "packets", "bytes",
+    "min_signal", "avg_signal", "max_signal", "signal_count", "frequencies",
+    "min_lat", "max_lat", "min_lon", "max_lon",
+)
+
+# The union of two rows' frequencies JSON lists, sorted, per database
+_FREQUENCY_UNION = {
+    "postgresql": (
+        "(SELECT coalesce(jsonb_agg(DISTINCT f ORDER BY f), '[]'::jsonb)"
+        " FROM jsonb_array_elements({old} || {new}) AS f)"
+    ),
+    "sqlite": (
+        "(SELECT json_group_array(value) FROM (SELECT value FROM json_each({old})"
+        " UNION SELECT value FROM json_each({new}) ORDER BY value))"
+    ),
+}
+
+
+def bucket_start(ts_sec):
+    """Start of the rollup bucket holding ts_sec, as an aware datetime."""
+    return datetime.fromtimestamp(ts_sec - ts_sec % ROLLUP_BUCKET_SECONDS, tz=dt_timezone.utc)
+
+
+def _lower(a, b):
+    return b if a is None or (b is not None and b < a) else a
+
+
+def _higher(a, b):
+    return b if a is None or (b is not None and b > a) else a
+
+
+class _Bucket:
+    __slots__ = (
+        "device_id", "packets", "bytes", "min_signal", "max_signal", "signal_sum", "signal_count",
+        "frequencies", "min_lat", "max_lat", "min_lon", "max_lon",
+    )
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.packets = 0
+        self.bytes = 0
+        self.min_signal = self.max_signal = None
+        self.signal_sum = 0
+        self.signal_count = 0
+        self.frequencies = set()
+        self.min_lat = self.max_lat = self.min_lon = self.max_lon = None
+
+    def add(self, packet_len, signal, frequency, lat, lon):
+        self.packets += 1
+        self.bytes += packet_len or 0
+        if signal is not None:
+            self.min_signal = _lower(self.min_signal, signal)
+            self.max_signal = _higher(self.max_signal, signal)
+            self.signal_sum += signal
+            self.signal_count += 1
+        if frequency:
+            self.frequencies.add(frequency)
+        # Kismet logs 0,0 for packets without a GPS fix
+        if lat or lon:
+            self.min_lat = _lower(self.min_lat, lat)
+            self.max_lat = _higher(self.max_lat, lat)
+            self.min_lon = _lower(self.min_lon, lon)
+            self.max_lon = _higher(self.max_lon, lon)
+
+    def merge_into(self, rollup):
+        """Adds this bucket's packets to an existing PacketRollup row."""
+        if rollup.device_id is None:
+            rollup.device_id = self.device_id
+        rollup.packets += self.packets
+        rollup.bytes += self.bytes
+        if self.signal_count:
+            total = (rollup.avg_signal or 0) * rollup.signal_count + self.signal_sum
+            rollup.signal_count += self.signal_count
+            rollup.avg_signal = total / rollup.signal_count
+            rollup.min_signal = _lower(rollup.min_signal, self.min_signal)
+            rollup.max_signal = _higher(rollup.max_signal, self.max_signal)
+        rollup.frequencies = sorted(set(rollup.frequencies or ()) | self.frequencies)
+        rollup.min_lat = _lower(rollup.min_lat, self.min_lat)
+        rollup.max_lat = _higher(rollup.max_lat, self.max_lat)
+        rollup.min_lon = _lower(rollup.min_lon, self.min_lon)
+        rollup.max_lon = _higher(rollup.max_lon, self.max_lon)
+
+    def values(self, scan_id, sourcemac, start):
+        """This bucket as a tuple of ROLLUP_COLUMNS values."""
+        return (
+            scan_id, self.device_id, sourcemac, bucket_start(start), self.packets, self.bytes,
+            self.min_signal, self.signal_sum / self.signal_count if self.signal_count else None,
+            self.max_signal, self.signal_count, sorted(self.frequencies),
+            self.min_lat, self.max_lat, self.min_lon, self.max_lon,
+        )
+
+    def to_rollup(self, scan_id, sourcemac, start):
+        return PacketRollup(
+            scan_id=scan_id, device_id=self.device_id, sourcemac=sourcemac, bucket_start=start,
+            packets=self.packets, bytes=self.bytes,
+            min_signal=self.min_signal, max_signal=self.max_signal,
+            avg_signal=self.signal_sum / self.signal_count if self.signal_count else None,
+            signal_count=self.signal_count,
+            frequencies=sorted(self.frequencies),
+            min_lat=self.min_lat, max_lat=self.max_lat,
+            min_lon=self.min_lon, max_lon=self.max_lon,
+        )
+
+
+class RollupBuffer:
+    """
+    Accumulates packets into per-(transmitter, minute) buckets in memory.
+    write() merges them into the scan's PacketRollup rows; the importer
+    calls it inside each chunk's transaction, so the rollups always match
+    the packets high-water mark, and it sees every packet before decimation
+    drops any.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def add(self, device_id, sourcemac, ts_sec, packet_len, signal, frequency, lat, lon):
+        key = (sourcemac, ts_sec - ts_sec % ROLLUP_BUCKET_SECONDS)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(device_id)
+        elif bucket.device_id is None:
+            bucket.device_id = device_id
+        bucket.add(packet_len, signal, frequency, lat, lon)
+
+    def write(self, scan_id):
+        """Merges the buffered buckets into PacketRollup rows and empties the buffer."""
+        if not self._buckets:
+            return 0
+
+        if connection.vendor not in _FREQUENCY_UNION:
+            rollups = _merge_existing(scan_id, self._buckets)
+            self._buckets = {}
+            return len(rollups)
+
+        rows = [
+            bucket.values(scan_id, sourcemac, start)
+            for (sourcemac, start), bucket in self._buckets.items()
+        ]
+        if copy_supported():
+            _copy_upsert(rows)
+        else:
+            for i in range(0, len(rows), ROLLUP_INSERT_BATCH_SIZE):
+                _values_upsert(rows[i:i + ROLLUP_INSERT_BATCH_SIZE])
+        self._buckets = {}
+        return len(rows)
+
+
+def _upsert_sql(source):
+    """
+    INSERT of ROLLUP_COLUMNS rows from source (a VALUES list or a SELECT)
+    that merges each row colliding with a stored bucket into it, in SQL:
+    no read of the stored rows and no rewrite of the ones left untouched.
+    """
+    qn = connection.ops.quote_name
+    table = qn(PacketRollup._meta.db_table)
+
+    def old(column):
+        return f"{table}.{qn(column)}"
+
+    def new(column):
+        return f"EXCLUDED.{qn(column)}"
+
+    def lower(column):
+        return (f"CASE WHEN {old(column)} IS NULL OR {new(column)} < {old(column)}"
+                f" THEN {new(column)} ELSE {old(column)} END")
+
+    def higher(column):
+        return (f"CASE WHEN {old(column)} IS NULL OR {new(column)} > {old(column)}"
+                f" THEN {new(column)} ELSE {old(column)} END")
+
+    merged = {
+        "device_id": f"COALESCE({old('device_id')}, {new('device_id')})",
+        "packets": f"{old('packets')} + {new('packets')}",
+        "bytes": f"{old('bytes')} + {new('bytes')}",
+        "min_signal": lower("min_signal"),
+        "avg_signal": (
+            f"CASE WHEN {new('signal_count')} = 0 THEN {old('avg_signal')}"
+            f" ELSE (COALESCE({old('avg_signal')}, 0) * {old('signal_count')}"
+            f" + {new('avg_signal')} * {new('signal_count')})"
+            f" / ({old('signal_count')} + {new('signal_count')}) END"
+        ),
+        "max_signal": higher("max_signal"),
+        "signal_count": f"{old('signal_count')} + {new('signal_count')}",
+        "frequencies": _FREQUENCY_UNION[connection.vendor].format(
+            old=old("frequencies"), new=new("frequencies")
+        ),
+        "min_lat": lower("min_lat"),
+        "max_lat": higher("max_lat"),
+        "min_lon": lower("min_lon"),
+        "max_lon": higher("max_lon"),
+    }
+    return (
+        f"INSERT INTO {table} ({', '.join(qn(column) for column in ROLLUP_COLUMNS)}) {source}"
+        f" ON CONFLICT ({qn('scan_id')}, {qn('sourcemac')}, {qn('bucket_start')}) DO UPDATE SET "
+        + ", ".join(f"{qn(column)} = {expression}" for column, expression in merged.items())
+    )
+
+
+def _copy_upsert(rows):
+    """Upserts rows through a temporary table loaded with COPY (PostgreSQL)."""
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(column) for column in ROLLUP_COLUMNS)
+    stage = qn("packet_rollups_stage")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {stage} ON COMMIT DROP AS"
+            f" SELECT {columns} FROM {qn(PacketRollup._meta.db_table)} WITH NO DATA"
+        )
+        copy_rows(PacketRollup, ROLLUP_COLUMNS, rows, table="packet_rollups_stage")
+        cursor.execute(_upsert_sql(f"SELECT {columns} FROM {stage}"))
+        cursor.execute(f"DROP TABLE {stage}")
+
+
+def _values_upsert(rows):
+    """Upserts rows with one INSERT ... VALUES statement."""
+    fields = [PacketRollup._meta.get_field(column) for column in ("bucket_start", "frequencies")]
+    start, frequencies = ROLLUP_COLUMNS.index("bucket_start"), ROLLUP_COLUMNS.index("frequencies")
+    params = []
+    for row in rows:
+        row = list(row)
+        row[start] = fields[0].get_db_prep_save(row[start], connection)
+        row[frequencies] = fields[1].get_db_prep_save(row[frequencies], connection)
+        params.extend(row)
+    placeholders = "(" + ", ".join(["%s"] * len(ROLLUP_COLUMNS)) + ")"
+    with connection.cursor() as cursor:
+        cursor.execute(_upsert_sql(f"VALUES {', '.join([placeholders] * len(rows))}"), params)
+
+
+def _merge_existing(scan_id, buckets):
+    """
+    write() on databases without INSERT ... ON CONFLICT: merges the stored
+    rows the buckets collide with in Python, then rewrites them.
+    """
+    starts = [start for _, start in buckets]
+    existing = {
+        (r.sourcemac, int(r.bucket_start.timestamp())): r
+        for r in PacketRollup.objects.filter(
+            scan_id=scan_id,
+            bucket_start__range=(bucket_start(min(starts)), bucket_start(max(starts))),
+        )
+    }
+
+    rollups = []
+    merged = []
+    for (sourcemac, start), bucket in buckets.items():
+        rollup = existing.get((sourcemac, start))
+        if rollup is None:
+            rollups.append(bucket.to_rollup(scan_id, sourcemac, bucket_start(start)))
+        else:
+            bucket.merge_into(rollup)
+            rollups.append(rollup)
+            merged.append(rollup.pk)
+
+    if merged:
+        PacketRollup.objects.filter(pk__in=merged).delete()
+    PacketRollup.objects.bulk_create(rollups)
+    return rollups
+
+
+def rebuild_rollups(scan, chunk_size=ROLLUP_CHUNK_SIZE):
+    """
+    Recomputes a scan's rollups from its stored packets, in one
+    transaction. Refused once raw packets were pruned, since the rebuilt
+    rollups would lose those; packets a decimated import never stored are
+    not counted either. Returns the number of packets rolled up.
+    """
+    if scan.packets_pruned_before is not None:
+        raise ValueError(f"{scan}: raw packets were pruned, its rollups cannot be rebuilt")
+
+    rolled = 0
+    last_id = 0
+    with transaction.atomic():
+        PacketRollup.objects.filter(scan=scan).delete()
+        buffer = RollupBuffer()
+        while True:
+            rows = list(
+                Packet.objects.filter(scan=scan, id__gt=last_id)
+                .order_by("id")
+                .values_list("id", *ROLLUP_PACKET_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                break
+            for row in rows:
+                buffer.add(*row[1:])
+            buffer.write(scan.id)
+            rolled += len(rows)
+            last_id = rows[-1][0]
+        Scan.objects.filter(pk=scan.pk).update(rollups_built=True)
+    scan.rollups_built = True
+    return rolled
+
+
+def prune_packets(scan, cutoff, batch_size=PURGE_BATCH_SIZE):
+    """
+    Deletes a rolled-up scan's raw packets timestamped before cutoff, in
+    batches, and records the cutoff on Scan.packets_pruned_before.
+    Returns the number of packets deleted.
+    """
+    if not scan.rollups_built:
+        raise ValueError(f"{scan}: packets are not rolled up, refusing to prune them")
+
+    deleted = delete_batches(Packet, scan.id, batch_size, where="timestamp < %s", params=[cutoff])
+    if deleted and (scan.packets_pruned_before is None or cutoff > scan.packets_pruned_before):
+        scan.packets_pruned_before = cutoff
+        scan.save(update_fields=["packets_pruned_before"])
+    return deleted
@@ -9,6 +9,12 @@ VENV_ACTIVATE="/home/pi/GloopieGuardian/venv/bin/activate"
 PROJECT_DIR="/home/pi/GloopieGuardian"
 MANAGE_PY="${PROJECT_DIR}/manage.py"
 
+# --stop-only: stop Kismet and print LATEST_DB=<path> for a background import job
+STOP_ONLY=0
+if [[ "${1:-}" == "--stop-only" ]]; then
+    STOP_ONLY=1
+fi
+
 if [[ -f "$VENV_ACTIVATE" ]]; then
     # shellcheck disable=SC1090
     source "$VENV_ACTIVATE"
@@ -46,6 +52,11 @@ if [[ -z "$LATEST_DB" ]]; then
     exit 1
 fi
 
+if [[ "$STOP_ONLY" -eq 1 ]]; then
+    echo "LATEST_DB=$LATEST_DB"
+    exit 0
+fi
+
 echo ">>> Importing latest file: $LATEST_DB"
 
 # ensure manage.py exists
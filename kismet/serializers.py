@@ -1,20 +1,100 @@
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import (
-    Scan, Device, DataSource, Alert, Packet, Client
+    Scan, Device, KnownDevice, DataSource, Alert, Packet, PacketRollup, Client, ImportRun, Job
 )
 
+def _names(value):
+    return [name.strip() for name in value.split(",") if name.strip()] if value else []
+
+class SparseFieldsMixin:
+    """
+    Lets GET requests pick fields with ?fields=a,b or drop them with
+    ?exclude=c. Meta.list_exclude names fields (raw Kismet JSON) list
+    responses leave out unless ?fields= asks for them. load_only() narrows
+    a queryset to the columns the remaining fields read.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        requested = _names(request.query_params.get("fields"))
+        excluded = _names(request.query_params.get("exclude"))
+        unknown = sorted(set(requested + excluded) - set(self.fields))
+        if unknown:
+            raise serializers.ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}"})
+
+        view = self.context.get("view")
+        if not requested and getattr(view, "action", None) == "list":
+            excluded += getattr(self.Meta, "list_exclude", ())
+        for name in list(self.fields):
+            if (requested and name not in requested) or name in excluded:
+                self.fields.pop(name)
+
+    def load_only(self, queryset, keep=()):
+        """
+        queryset with only the columns the selected fields read (plus keep)
+        loaded, and the relations they follow joined in. Left as it is
+        when a field's source is not a model field.
+        """
+        model = queryset.model
+        columns = {model._meta.pk.name, *keep}
+        related = set()
+        for field in self.fields.values():
+            if field.source == "*":
+                continue  # method fields read the object, not a column
+            parts = field.source.split(".")
+            try:
+                model._meta.get_field(parts[0])
+            except FieldDoesNotExist:
+                return queryset
+            if len(parts) > 1:
+                related.add(parts[0])
+            columns.add("__".join(parts))
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
 class ScanSerializer(serializers.ModelSerializer):
     class Meta:
         model = Scan
         fields = "__all__"
 
-class DeviceSerializer(serializers.ModelSerializer):
+class ImportRunSerializer(serializers.ModelSerializer):
+    scan_name = serializers.CharField(source="scan.name", read_only=True)
+
+    class Meta:
+        model = ImportRun
+        fields = "__all__"
+
+class JobSerializer(serializers.ModelSerializer):
+    eta_seconds = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = "__all__"
+
+class DeviceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     scan_name = serializers.CharField(source="scan.name", read_only=True)
     wigle_ref_data = serializers.SerializerMethodField()
 
     class Meta:
         model = Device
         fields = "__all__"
+        list_exclude = ("device_json",)
+
+    def get_wigle_ref_data(self, obj):
+        # Set by kismet.wigle.enrich_with_wigle_data(); never looked up here
+        return getattr(obj, "wigle_data", None)
+
+class KnownDeviceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = KnownDevice
+        fields = "__all__"
 
 class DataSourceSerializer(serializers.ModelSerializer):
     scan_name = serializers.CharField(source="scan.name", read_only=True)
@@ -30,16 +110,23 @@ class AlertSerializer(serializers.ModelSerializer):
         model = Alert
         fields = "__all__"
 
-class PacketSerializer(serializers.ModelSerializer):
+class PacketSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     scan_name = serializers.CharField(source="scan.name", read_only=True)
 
     class Meta:
         model = Packet
         fields = "__all__"
+        list_exclude = ("packet_json",)
 
-class ClientSerializer(serializers.ModelSerializer):
+class PacketRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PacketRollup
+        fields = "__all__"
+
+class ClientSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     scan_name = serializers.CharField(source="scan.name", read_only=True)
 
     class Meta:
         model = Client
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+        list_exclude = ("client_json",)
\ No newline at end of file
@@ -0,0 +1,11 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import Scan
+from .partitions import drop_packet_partition
+
+
+@receiver(pre_delete, sender=Scan)
+def drop_scan_packets(sender, instance, **kwargs):
+    # Runs before the cascade, which then finds no packets left to delete
+    drop_packet_partition(instance.pk)
@@ -0,0 +1,163 @@
+from collections import Counter
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay
+
+from .models import Scan, Device, ScanSummary
+
+# Bumped whenever the stored layout changes; older summaries are recomputed
+SUMMARY_VERSION = 1
+
+# Count lists stored per scan: name -> Device field(s) grouped on
+SUMMARY_COUNTS = {
+    "types": ("type",),
+    "signals": ("strongest_signal",),
+    "channels": ("channel",),
+    "encryption": ("encryption",),
+    "manufacturers": ("manufacturer",),
+}
+
+
+def compute_summary(scan_id):
+    """
+    Aggregates a scan's devices into the mergeable totals the charts are
+    drawn from: plain counts, counts per value of the grouped columns, and
+    signal sums rather than averages, so several scans can be added up.
+    """
+    devices = Device.objects.filter(scan_id=scan_id)
+    totals = devices.aggregate(
+        devices=Count("id"),
+        access_points=Count("id", filter=Q(type__icontains="AP")),
+        clients=Count("id", filter=Q(type__icontains="Client")),
+        signal_sum=Sum("strongest_signal"),
+        signal_count=Count("strongest_signal"),
+    )
+    data = {"version": SUMMARY_VERSION, **totals, "signal_sum": totals["signal_sum"] or 0}
+
+    for name, fields in SUMMARY_COUNTS.items():
+        data[name] = [list(row) for row in devices.values_list(*fields).annotate(n=Count("id")).order_by()]
+    data["signals"] = [row for row in data["signals"] if row[0] is not None]
+
+    data["manufacturer_signals"] = [
+        list(row) for row in devices.filter(strongest_signal__lt=0)
+        .values_list("manufacturer", "ssid")
+        .annotate(total=Sum("strongest_signal"), n=Count("strongest_signal"))
+        .order_by()
+    ]
+    data["days"] = [
+        [day.isoformat() if day else None, n]
+        for day, n in devices.annotate(day=TruncDay("first_time")).values_list("day").annotate(n=Count("id")).order_by()
+    ]
+    return data
+
+
+def refresh_summary(scan):
+    """Recomputes and stores one scan's ScanSummary. Returns it."""
+    scan_id = getattr(scan, "pk", scan)
+    with transaction.atomic():
+        summary, _ = ScanSummary.objects.update_or_create(
+            scan_id=scan_id, defaults={"data": compute_summary(scan_id)}
+        )
+    return summary
+
+
+def scan_summaries(scan_ids=None):
+    """
+    Summaries of the given scans (every scan when None), computing and
+    storing any that are missing or in an older layout.
+    """
+    scans = Scan.objects.all()
+    if scan_ids is not None:
+        scans = scans.filter(pk__in=scan_ids)
+    stored = {
+        s.scan_id: s.data
+        for s in ScanSummary.objects.filter(scan__in=scans)
+        if s.data.get("version") == SUMMARY_VERSION
+    }
+    for scan_id in scans.exclude(pk__in=list(stored)).values_list("pk", flat=True):
+        stored[scan_id] = refresh_summary(scan_id).data
+    return list(stored.values())
+
+
+class MergedSummary:
+    """Several scans' summaries added up, with the chart datasets derived from them."""
+
+    def __init__(self, summaries):
+        self.totals = Counter()
+        self.counts = {name: Counter() for name in SUMMARY_COUNTS}
+        self.manufacturer_signals = {}
+        self.days = Counter()
+
+        for data in summaries:
+            for key in ("devices", "access_points", "clients", "signal_sum", "signal_count"):
+                self.totals[key] += data[key]
+            for name in SUMMARY_COUNTS:
+                for value, n in data[name]:
+                    self.counts[name][value] += n
+            for manufacturer, ssid, total, n in data["manufacturer_signals"]:
+                key = (manufacturer, ssid)
+                old_total, old_n = self.manufacturer_signals.get(key, (0, 0))
+                self.manufacturer_signals[key] = (old_total + total, old_n + n)
+            for day, n in data["days"]:
+                self.days[day] += n
+
+    @staticmethod
+    def _ordered(counter, key_name, by_count=False, limit=None):
+        # NULL sorts last, as on PostgreSQL
+        if by_count:
+            items = sorted(counter.items(), key=lambda kv: (-kv[1], kv[0] is None, kv[0] or ""))
+        else:
+            items = sorted(counter.items(), key=lambda kv: (kv[0] is None, kv[0] or ""))
+        return [{key_name: value, "count": n} for value, n in items[:limit]]
+
+    def stats(self):
+        count = self.totals["signal_count"]
+        return {
+            "total_scans": self.totals["devices"],
+            "access_points": self.totals["access_points"],
+            "connected_clients": self.totals["clients"],
+            "avg_signal": round(self.totals["signal_sum"] / count, 2) if count else 0,
+        }
+
+    def by_type(self):
+        return self._ordered(self.counts["types"], "type")
+
+    def channel_usage(self):
+        return self._ordered(self.counts["channels"], "channel")
+
+    def encryption_types(self):
+        return self._ordered(self.counts["encryption"], "encryption", by_count=True)
+
+    def top_manufacturers(self, top=10):
+        manufacturers = Counter({m: n for m, n in self.counts["manufacturers"].items() if m is not None})
+        return self._ordered(manufacturers, "manufacturer", by_count=True, limit=top)
+
+    def signal_histogram(self, width=5):
+        histogram = Counter()
+        for signal, n in self.counts["signals"].items():
+            histogram[width * (signal // width)] += n
+        return [{"bin": b, "count": n} for b, n in sorted(histogram.items())]
+
+    def signal_categories(self, thresholds, labels):
+        thresholds = sorted(thresholds, reverse=True)
+        categories = [0] * len(labels)
+        for signal, n in self.counts["signals"].items():
+            index = next((i for i, t in enumerate(thresholds) if signal >= t), len(thresholds))
+            categories[index] += n
+        return [{"category": label, "count": n} for label, n in zip(labels, categories)]
+
+    def avg_signal_manufacturer(self, top=10):
+        rows = [
+            {"manufacturer": m, "ssid": ssid, "avg_signal": total / n}
+            for (m, ssid), (total, n) in self.manufacturer_signals.items() if n
+        ]
+        rows.sort(key=lambda row: (-row["avg_signal"], row["manufacturer"] or "", row["ssid"] or ""))
+        return rows[:top]
+
+    def devices_over_time(self):
+        return [
+            {"day": datetime.fromisoformat(day) if day else None, "count": n}
+            for day, n in sorted(self.days.items(), key=lambda kv: (kv[0] is None, kv[0] or ""))
+        ]
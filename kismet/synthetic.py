@@ -0,0 +1,330 @@
+import json
+import random
+import sqlite3
+import uuid
+
+# Same DDL Kismet 2025.10 writes (kismetlog db_version 9)
+KISMET_SCHEMA = (
+    "CREATE TABLE KISMET (kismet_version TEXT, db_version INT, db_module TEXT)",
+    "CREATE TABLE devices (first_time INT, last_time INT, devkey TEXT, phyname TEXT, devmac TEXT, "
+    "strongest_signal INT, min_lat REAL, min_lon REAL, max_lat REAL, max_lon REAL, avg_lat REAL, "
+    "avg_lon REAL, bytes_data INT, type TEXT, device BLOB, UNIQUE(phyname, devmac) ON CONFLICT REPLACE)",
+    "CREATE TABLE packets (ts_sec INT, ts_usec INT, phyname TEXT, sourcemac TEXT, destmac TEXT, "
+    "transmac TEXT, frequency REAL, devkey TEXT, lat REAL, lon REAL, alt REAL, speed REAL, heading REAL, "
+    "packet_len INT, signal INT, datasource TEXT, dlt INT, packet BLOB, error INT, tags TEXT, "
+    "datarate REAL, hash INT, packetid INT, packet_full_len INT)",
+    "CREATE TABLE data (ts_sec INT, ts_usec INT, phyname TEXT, devmac TEXT, lat REAL, lon REAL, alt REAL, "
+    "speed REAL, heading REAL, datasource TEXT, type TEXT, json BLOB )",
+    "CREATE TABLE datasources (uuid TEXT, typestring TEXT, definition TEXT, name TEXT, interface TEXT, "
+    "json BLOB, UNIQUE(uuid) ON CONFLICT REPLACE)",
+    "CREATE TABLE alerts (ts_sec INT, ts_usec INT, phyname TEXT, devmac TEXT, lat REAL, lon REAL, "
+    "header TEXT, json BLOB )",
+    "CREATE TABLE messages (ts_sec INT, lat REAL, lon REAL, msgtype TEXT, message TEXT )",
+    "CREATE TABLE snapshots (ts_sec INT, ts_usec INT, lat REAL, lon REAL, snaptype TEXT, json BLOB )",
+)
+
+PHYNAME = "IEEE802.11"
+CHANNELS = {"1": 2412000, "6": 2437000, "11": 2462000, "36": 5180000, "44": 5220000, "149": 5745000}
+CRYPTS = ("", "WPA2-PSK AES-CCMP", "WPA3 WPA3-PSK WPA3-SAE AES-CCMP", "WPA2 WPA2-PSK WPA3-SAE AES-CCMP", "WEP")
+MANUFACTURERS = ("Unknown", "Samsung Electronics Co.,Ltd", "Apple, Inc.", "TP-LINK TECHNOLOGIES CO.,LTD.",
+                 "Huawei Technologies Co.,Ltd", "Espressif Inc.", "Intel Corporate")
+OTHER_TYPES = ("Wi-Fi Device", "Wi-Fi Bridged", "Wi-Fi WDS")
+ALERT_HEADERS = ("DEAUTHFLOOD", "BSSTIMESTAMP", "PROBECHAN", "APSPOOF", "DISASSOCTRAFFIC")
+DATASOURCE_UUID = "5FE308BD-0000-0000-0000-00C0CAB85152"
+
+# Rows handed to executemany() at a time
+INSERT_BATCH = 5000
+
+
+class _Capture:
+    """Random but reproducible capture state shared by the table writers."""
+
+    def __init__(self, seed, start_ts, duration, lat, lon):
+        self.rng = random.Random(seed)
+        self.start_ts = start_ts
+        self.duration = duration
+        self.lat = lat
+        self.lon = lon
+        self.server_uuid = str(uuid.UUID(int=self.rng.getrandbits(128))).upper()
+
+    def mac(self):
+        octets = [self.rng.randrange(256) for _ in range(6)]
+        octets[0] = (octets[0] & 0xFC) | 0x02  # locally administered, unicast
+        return ":".join(f"{o:02X}" for o in octets)
+
+    def ts(self):
+        return self.start_ts + self.rng.random() * self.duration
+
+    def point(self):
+        # Roughly a 500 m walk around the start position
+        return (
+            self.lat + self.rng.uniform(-0.0025, 0.0025),
+            self.lon + self.rng.uniform(-0.0025, 0.0025),
+        )
+
+
+def devkey_for(mac):
+    return "4202770D00000000_" + "".join(reversed(mac.split(":")))
+
+
+def _location(lat, lon, ts):
+    point = {"kismet.common.location.geopoint": [lon, lat], "kismet.common.location.alt": 117}
+    return {
+        "kismet.common.location.loc_fix": 3,
+        "kismet.common.location.min_loc": point,
+        "kismet.common.location.max_loc": point,
+        "kismet.common.location.last": dict(point, **{
+            "kismet.common.location.fix": 3,
+            "kismet.common.location.speed": 0.0,
+            "kismet.common.location.heading": 0,
+        }),
+        "kismet.common.location.avg_loc": dict(point, **{
+            "kismet.common.location.fix": 3,
+            "kismet.common.location.time_sec": int(ts),
+            "kismet.common.location.time_usec": 0,
+        }),
+    }
+
+
+def _seenby(last_ts, signal):
+    # Kismet repeats the whole datasource record in every device; it is
+    # most of the blob size, which is what makes decoding expensive
+    return [{
+        "kismet.common.seenby.uuid": DATASOURCE_UUID,
+        "kismet.common.seenby.source": {
+            "kismet.datasource.name": "wlan1",
+            "kismet.datasource.uuid": DATASOURCE_UUID,
+            "kismet.datasource.interface": "wlan1",
+            "kismet.datasource.capture_interface": "wlan1mon",
+            "kismet.datasource.hardware": "mt7921u",
+            "kismet.datasource.dlt": 127,
+            "kismet.datasource.channels": list(CHANNELS) * 8,
+        },
+        "kismet.common.seenby.last_time": int(last_ts),
+        "kismet.common.seenby.signal": {"kismet.common.signal.last_signal": signal},
+    }]
+
+
+def _plan_devices(cap, devices, clients):
+    """Picks MACs, types and timings; clients are spread over the APs."""
+    clients = max(0, min(clients, devices - 1))
+    others = (devices - clients) // 10
+    aps = devices - clients - others
+
+    macs = set()
+    while len(macs) < devices:
+        macs.add(cap.mac())
+
+    plan = []
+    for i, mac in enumerate(sorted(macs)):
+        if i < aps:
+            dev_type = "Wi-Fi AP"
+        elif i < aps + clients:
+            dev_type = "Wi-Fi Client"
+        else:
+            dev_type = cap.rng.choice(OTHER_TYPES)
+        first = cap.ts()
+        last = min(cap.start_ts + cap.duration, first + cap.rng.random() * cap.duration / 4)
+        plan.append({
+            "mac": mac,
+            "type": dev_type,
+            "first": int(first),
+            "last": int(last),
+            "signal": cap.rng.randint(-92, -30),
+            "channel": cap.rng.choice(list(CHANNELS)),
+            "point": cap.point(),
+            "assoc": {},
+            "bssid": None,
+        })
+
+    ap_list = plan[:aps]
+    for device in plan[aps:aps + clients]:
+        ap = cap.rng.choice(ap_list)
+        device["bssid"] = ap["mac"]
+        device["channel"] = ap["channel"]
+        ap["assoc"][device["mac"]] = devkey_for(device["mac"])
+    return plan
+
+
+def _device_json(cap, d):
+    lat, lon = d["point"]
+    dot11 = {
+        "dot11.device.typeset": 1 if d["type"] == "Wi-Fi AP" else 2,
+        "dot11.device.num_associated_clients": len(d["assoc"]),
+        "dot11.device.last_bssid": d["bssid"] or d["mac"],
+        "dot11.device.associated_client_map": d["assoc"],
+    }
+    if d["type"] == "Wi-Fi AP":
+        dot11["dot11.device.advertised_ssid_map"] = [{
+            "dot11.advertisedssid.ssid": f"net-{d['mac'][-5:].replace(':', '')}",
+            "dot11.advertisedssid.channel": d["channel"],
+            "dot11.advertisedssid.first_time": d["first"],
+            "dot11.advertisedssid.last_time": d["last"],
+            "dot11.advertisedssid.crypt_string": cap.rng.choice(CRYPTS),
+            "dot11.advertisedssid.beacon": 1,
+        }]
+    elif d["type"] == "Wi-Fi Client":
+        dot11["dot11.device.probed_ssid_map"] = [{
+            "dot11.probedssid.ssid": f"probe-{cap.rng.randrange(50)}",
+            "dot11.probedssid.first_time": d["first"],
+            "dot11.probedssid.last_time": d["last"],
+            "dot11.probedssid.location": _location(lat, lon, d["last"]),
+        }]
+        dot11["dot11.device.client_map"] = {
+            d["bssid"]: {
+                "dot11.client.bssid": d["bssid"],
+                "dot11.client.bssid_key": devkey_for(d["bssid"]),
+                "dot11.client.first_time": d["first"],
+                "dot11.client.last_time": d["last"],
+                "dot11.client.type": cap.rng.choice((0, 1, 2)),
+                "dot11.client.decrypted": 0,
+                "dot11.client.datasize": cap.rng.randrange(1 << 20),
+                "dot11.client.num_retries": cap.rng.randrange(100),
+                "dot11.client.location": _location(lat, lon, d["last"]),
+            }
+        }
+
+    return {
+        "kismet.device.base.key": devkey_for(d["mac"]),
+        "kismet.device.base.macaddr": d["mac"],
+        "kismet.device.base.name": dot11.get("dot11.device.advertised_ssid_map", [{}])[0].get(
+            "dot11.advertisedssid.ssid", ""),
+        "kismet.device.base.commonname": d["mac"],
+        "kismet.server.uuid": cap.server_uuid,
+        "kismet.device.base.type": d["type"],
+        "kismet.device.base.phyname": PHYNAME,
+        "kismet.device.base.crypt": cap.rng.choice(CRYPTS) if d["type"] == "Wi-Fi AP" else "",
+        "kismet.device.base.manuf": cap.rng.choice(MANUFACTURERS),
+        "kismet.device.base.first_time": d["first"],
+        "kismet.device.base.last_time": d["last"],
+        "kismet.device.base.packets": cap.rng.randrange(1, 5000),
+        "kismet.device.base.channel": d["channel"],
+        "kismet.device.base.frequency": CHANNELS[d["channel"]],
+        "kismet.device.base.signal": {
+            "kismet.common.signal.last_signal": d["signal"] - cap.rng.randrange(10),
+            "kismet.common.signal.max_signal": d["signal"],
+            "kismet.common.signal.avg_signal": d["signal"] - 5,
+        },
+        "kismet.device.base.location": _location(lat, lon, d["last"]),
+        "dot11.device": dot11,
+        "kismet.device.base.seenby": _seenby(d["last"], d["signal"]),
+    }
+
+
+def _device_rows(cap, plan):
+    for d in plan:
+        lat, lon = d["point"]
+        yield (
+            d["first"], d["last"], devkey_for(d["mac"]), PHYNAME, d["mac"], d["signal"],
+            lat, lon, lat, lon, lat, lon, cap.rng.randrange(1 << 24), d["type"],
+            json.dumps(_device_json(cap, d)).encode(),
+        )
+
+
+def _packet_rows(cap, plan, packets):
+    # Packets arrive in time order, like Kismet logs them
+    step = cap.duration / max(packets, 1)
+    for i in range(packets):
+        ts = cap.start_ts + i * step
+        d = cap.rng.choice(plan)
+        lat, lon = d["point"]
+        length = cap.rng.randint(40, 1500)
+        if d["bssid"]:
+            dest = d["bssid"]
+        elif d["type"] == "Wi-Fi AP":
+            dest = "FF:FF:FF:FF:FF:FF"
+        else:
+            dest = cap.mac()
+        yield (
+            int(ts), int((ts % 1) * 1_000_000), PHYNAME, d["mac"], dest, "00:00:00:00:00:00",
+            float(CHANNELS[d["channel"]]), devkey_for(d["mac"]), lat, lon, 117.0, 0.0, 0.0,
+            length, d["signal"] - cap.rng.randrange(15), DATASOURCE_UUID, 127, None, 0, "",
+            cap.rng.choice((1.0, 6.0, 54.0, 72.2, 144.4)), cap.rng.getrandbits(31), i + 1, length,
+        )
+
+
+def _alert_rows(cap, plan, alerts):
+    for ts in sorted(cap.ts() for _ in range(alerts)):
+        d = cap.rng.choice(plan)
+        header = cap.rng.choice(ALERT_HEADERS)
+        lat, lon = d["point"]
+        yield (
+            int(ts), int((ts % 1) * 1_000_000), PHYNAME, d["mac"], lat, lon, header,
+            json.dumps({
+                "kismet.alert.header": header,
+                "kismet.alert.class": "SPOOF",
+                "kismet.alert.severity": cap.rng.choice((5, 10, 15)),
+                "kismet.alert.timestamp": ts,
+                "kismet.alert.transmitter_mac": d["mac"],
+                "kismet.alert.text": f"Synthetic {header} alert",
+            }).encode(),
+        )
+
+
+def _data_rows(cap, plan, data):
+    for ts in sorted(cap.ts() for _ in range(data)):
+        d = cap.rng.choice(plan)
+        lat, lon = d["point"]
+        yield (
+            int(ts), int((ts % 1) * 1_000_000), PHYNAME, d["mac"], lat, lon, 117.0, 0.0, 0.0,
+            DATASOURCE_UUID, "dot11_eapol",
+            json.dumps({"dot11.eapol.timestamp": ts, "dot11.eapol.direction": 1,
+                        "dot11.eapol.message_num": cap.rng.randint(1, 4)}).encode(),
+        )
+
+
+def _insert(conn, table, width, rows):
+    sql = f"INSERT INTO {table} VALUES ({', '.join('?' * width)})"
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate_kismet_db(path, devices=1000, clients=None, packets=100_000, alerts=100, data=1000,
+                       seed=0, start_ts=1766717600, duration=3600, lat=5.3505745, lon=100.3055693):
+    """
+    Writes a synthetic Kismet log to path with the schema and JSON layout
+    import_kismet_file reads: APs with associated_client_map, Wi-Fi clients
+    with a client_map pointing back at their AP, time-ordered packets whose
+    devkeys resolve to those devices, alerts, data and one datasource. The
+    same arguments always produce the same file. clients defaults to 40% of
+    the devices. Rows are streamed in batches, so large files are generated
+    in constant memory.
+    """
+    if clients is None:
+        clients = devices * 2 // 5
+    cap = _Capture(seed, start_ts, duration, lat, lon)
+    plan = _plan_devices(cap, devices, clients)
+
+    conn = sqlite3.connect(path)
+    try:
+        for ddl in KISMET_SCHEMA:
+            conn.execute(ddl)
+        conn.execute("INSERT INTO KISMET VALUES ('2025.10.0', 9, 'kismetlog')")
+        conn.execute(
+            "INSERT INTO datasources VALUES (?, ?, ?, ?, ?, ?)",
+            (DATASOURCE_UUID, "linuxwifi", "wlan1", "wlan1", "wlan1",
+             json.dumps({"kismet.datasource.uuid": DATASOURCE_UUID,
+                         "kismet.datasource.packets": packets,
+                         "kismet.datasource.errors": 0}).encode()),
+        )
+        _insert(conn, "devices", 15, _device_rows(cap, plan))
+        _insert(conn, "packets", 24, _packet_rows(cap, plan, packets))
+        _insert(conn, "alerts", 8, _alert_rows(cap, plan, alerts))
+        _insert(conn, "data", 12, _data_rows(cap, plan, data))
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        "devices": len(plan),
+        "clients": sum(1 for d in plan if d["bssid"]),
+        "packets": packets,
+        "alerts": alerts,
+        "data": data,
+    }
@@ -0,0 +1,641 @@
+import io
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from . import parser, registry
+from .cache import analytics_cache, stats as cache_stats
+from .decimate import PacketDecimator
+from .models import Alert, Client, Device, DeviceData, ImportRun, KnownDevice, Packet, PacketRollup, Scan
+from .pagination import KeysetPagination
+from .parser import import_kismet_file, import_pcap_file
+from .partitions import packets_partitioned, partition_name
+from .pcap import iter_frames
+from .purge import PURGE_ORDER, purge_scan
+from .registry import forget_scan, rebuild_registry
+from .rollup import rebuild_rollups
+from .synthetic import generate_kismet_db
+
+
+class SyntheticLogMixin:
+    """Generates small Kismet logs (kismet.synthetic) in a temporary directory."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmpdir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+        super().tearDownClass()
+
+    def make_log(self, name="test.kismet", **kwargs):
+        path = os.path.join(self.tmpdir, name)
+        if os.path.exists(path):
+            os.remove(path)
+        options = {"devices": 40, "packets": 4000, "alerts": 10, "data": 20}
+        options.update(kwargs)
+        generate_kismet_db(path, **options)
+        return path
+
+
+class SyntheticLogTestCase(SyntheticLogMixin, TestCase):
+    pass
+
+
+
+class ImportTests(SyntheticLogTestCase):
+    def stored(self, scan):
+        return {
+            "devices": Device.objects.filter(scan=scan).count(),
+            "clients": Client.objects.filter(scan=scan).count(),
+            "packets": Packet.objects.filter(scan=scan).count(),
+            "alerts": Alert.objects.filter(scan=scan).count(),
+            "data": DeviceData.objects.filter(scan=scan).count(),
+        }
+
+    def truncate(self, path, name, packets, alerts, data):
+        """A copy of the log as Kismet had written it earlier on."""
+        early = os.path.join(self.tmpdir, name)
+        shutil.copyfile(path, early)
+        conn = sqlite3.connect(early)
+        for table, keep in (("packets", packets), ("alerts", alerts), ("data", data)):
+            conn.execute(f"DELETE FROM {table} WHERE rowid > ?", [keep])
+        conn.commit()
+        conn.close()
+        return early
+
+    def test_reimport_is_skipped(self):
+        path = self.make_log()
+        scan = import_kismet_file(path)
+        stored = self.stored(scan)
+        self.assertEqual(stored["packets"], 4000)
+
+        again = import_kismet_file(path)
+        self.assertEqual((again.pk, again.import_stats["status"]), (scan.pk, "unchanged"))
+        copy = os.path.join(self.tmpdir, "renamed.kismet")
+        shutil.copyfile(path, copy)
+        self.assertEqual(import_kismet_file(copy).pk, scan.pk)
+
+        forced = import_kismet_file(path, full=True)
+        self.assertEqual(forced.pk, scan.pk)
+        self.assertEqual(self.stored(scan), stored)
+        self.assertEqual(Scan.objects.count(), 1)
+
+    def test_chunk_sizes_do_not_change_what_is_stored(self):
+        path = self.make_log()
+        scan = import_kismet_file(path)
+        stored = self.stored(scan)
+        chunk_sizes = {"devices": 7, "packets": 113, "alerts": 3, "data": 5}
+        import_kismet_file(path, chunk_sizes=chunk_sizes, full=True)
+        self.assertEqual(self.stored(scan), stored)
+
+    def test_grown_log_imports_only_new_rows(self):
+        path = self.make_log()
+        early = self.truncate(path, "growing.kismet", packets=1500, alerts=4, data=8)
+        scan = import_kismet_file(early)
+        self.assertEqual(self.stored(scan)["packets"], 1500)
+
+        shutil.copyfile(path, early)
+        grown = import_kismet_file(early)
+        self.assertEqual((grown.pk, grown.import_stats["status"]), (scan.pk, "grown"))
+        self.assertEqual(
+            (grown.import_stats["packets"], grown.import_stats["alerts"], grown.import_stats["data"]),
+            (2500, 6, 12),
+        )
+        stored = self.stored(scan)
+        self.assertEqual((stored["packets"], stored["alerts"], stored["data"]), (4000, 10, 20))
+
+    def test_empty_log_that_grows_continues_its_scan(self):
+        path = self.make_log()
+        early = os.path.join(self.tmpdir, "Kismet-live.kismet")
+        shutil.copyfile(path, early)
+        conn = sqlite3.connect(early)
+        for table in ("devices", "packets", "alerts", "data"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.commit()
+        conn.close()
+        scan = import_kismet_file(early)
+        self.assertIsNone(scan.origin)
+
+        shutil.copyfile(path, early)
+        grown = import_kismet_file(early)
+        self.assertEqual((grown.pk, grown.import_stats["status"]), (scan.pk, "grown"))
+        self.assertEqual(Scan.objects.count(), 1)
+        self.assertEqual(self.stored(scan), self.stored(import_kismet_file(path, full=True)))
+
+    def test_replaced_log_is_imported_from_the_start(self):
+        path = self.make_log("replaced.kismet", seed=1)
+        scan = import_kismet_file(path)
+        replacement = self.make_log("replacement.kismet", seed=2, packets=1000, alerts=4, data=8)
+        shutil.copyfile(replacement, path)
+
+        changed = import_kismet_file(path)
+        self.assertEqual((changed.pk, changed.import_stats["status"]), (scan.pk, "changed"))
+        self.assertEqual(changed.import_stats["packets"], 1000)
+        stored = self.stored(scan)
+        self.assertEqual((stored["packets"], stored["alerts"], stored["data"]), (1000, 4, 8))
+
+    def test_interrupted_import_resumes_where_it_stopped(self):
+        path = self.make_log()
+        write_packets = parser.write_packets
+        calls = []
+
+        def fail_on_fourth_chunk(values, use_copy):
+            calls.append(1)
+            if len(calls) == 4:
+                raise RuntimeError("interrupted")
+            return write_packets(values, use_copy)
+
+        with mock.patch.object(parser, "write_packets", fail_on_fourth_chunk):
+            with self.assertRaises(RuntimeError):
+                import_kismet_file(path, chunk_sizes={"packets": 500})
+        scan = Scan.objects.get()
+        self.assertEqual(scan.import_state.packets_rowid, 1500)
+        self.assertEqual(ImportRun.objects.get(scan=scan).status, "failed")
+
+        resumed = import_kismet_file(path, chunk_sizes={"packets": 500})
+        self.assertEqual(resumed.pk, scan.pk)
+        self.assertEqual(resumed.import_stats["packets"], 2500)
+        self.assertEqual(self.stored(scan)["packets"], 4000)
+        self.assertEqual(
+            Packet.objects.filter(scan=scan).values("ts_sec", "ts_usec", "sourcemac").distinct().count(), 4000
+        )
+
+
+class DecimationTests(SyntheticLogTestCase):
+    def import_decimated(self, path, packet_chunk_size=None):
+        chunk_sizes = {"packets": packet_chunk_size} if packet_chunk_size else None
+        scan = import_kismet_file(path, chunk_sizes=chunk_sizes, decimator=PacketDecimator(600), full=True)
+        return scan.import_stats
+
+    def test_reduction_does_not_depend_on_chunk_size(self):
+        path = self.make_log(packets=6000)
+        results = {size: self.import_decimated(path, size) for size in (None, 1000, 200, 37)}
+
+        kept = {size: stats["packets"] for size, stats in results.items()}
+        self.assertEqual(len(set(kept.values())), 1, kept)
+        for stats in results.values():
+            self.assertEqual(stats["packets"] + stats["packets_dropped"], 6000)
+        self.assertGreater(results[None]["packets_dropped"], 6000 // 2)
+
+    def test_resumed_import_stores_held_packets_once(self):
+        path = self.make_log(packets=3000)
+        count_dropped = parser._count_dropped
+        calls = []
+
+        def fail_on_third_chunk(*args):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError("interrupted")
+            return count_dropped(*args)
+
+        with mock.patch.object(parser, "_count_dropped", fail_on_third_chunk):
+            with self.assertRaises(RuntimeError):
+                import_kismet_file(path, chunk_sizes={"packets": 250}, decimator=PacketDecimator(600))
+
+        scan = Scan.objects.get()
+        self.assertTrue(scan.import_state.packets_held)
+        self.assertLess(scan.import_state.packets_rowid, scan.import_state.packets_seen_rowid)
+
+        import_kismet_file(path, chunk_sizes={"packets": 250}, decimator=PacketDecimator(600))
+        scan.refresh_from_db()
+        packets = Packet.objects.filter(scan=scan)
+        self.assertEqual(packets.count() + scan.packets_dropped, 3000)
+        self.assertEqual(
+            packets.values("sourcemac", "ts_sec", "ts_usec").distinct().count(), packets.count()
+        )
+        self.assertEqual(scan.import_state.packets_held, [])
+
+    def test_following_decimator_holds_open_windows(self):
+        path = self.make_log(packets=2000)
+        decimator = PacketDecimator(600, follow=True)
+        scan = import_kismet_file(path, decimator=decimator)
+
+        state = scan.import_state
+        self.assertEqual(len(state.packets_held), len(decimator.held()))
+        self.assertTrue(state.packets_held)
+        self.assertEqual(Packet.objects.filter(scan=scan).count() + len(state.packets_held)
+                         + Scan.objects.get(pk=scan.pk).packets_dropped, 2000)
+
+
+class CacheInvalidationTests(SyntheticLogTestCase):
+    def setUp(self):
+        analytics_cache().clear()
+
+    def get_dashboard(self):
+        response = self.client.get("/api/devices/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_import_invalidates_cached_dashboard(self):
+        import_kismet_file(self.make_log("first.kismet", seed=1))
+        first = self.get_dashboard()
+        self.assertEqual(self.get_dashboard(), first)
+        self.assertEqual(cache_stats()["endpoints"]["devices-dashboard"], {"hits": 1, "misses": 1})
+
+        import_kismet_file(self.make_log("second.kismet", seed=2))
+        second = self.get_dashboard()
+        self.assertEqual(cache_stats()["endpoints"]["devices-dashboard"], {"hits": 1, "misses": 2})
+        self.assertNotEqual(second, first)
+
+    def test_reimport_of_a_scan_invalidates_its_entries(self):
+        path = self.make_log(packets=2000)
+        scan = import_kismet_file(path, chunk_sizes={"packets": 500})
+        url = f"/api/devices/stats/?scan_id={scan.id}"
+        self.client.get(url)
+
+        version = Scan.objects.get(pk=scan.pk).cache_version
+        import_kismet_file(path, full=True)
+        self.assertGreater(Scan.objects.get(pk=scan.pk).cache_version, version)
+        self.client.get(url)
+        self.assertEqual(cache_stats()["endpoints"]["devices-stats"], {"hits": 0, "misses": 2})
+
+    def test_every_scan_entries_are_kept_per_scan_id_set(self):
+        first = import_kismet_file(self.make_log("first.kismet", seed=1))
+        second = import_kismet_file(self.make_log("second.kismet", seed=2))
+        url = "/api/devices/dashboard/?sections=stats,new_vs_returning&scan_id="
+        one = self.client.get(url + str(first.id)).json()
+        two = self.client.get(url + str(second.id)).json()
+        self.assertNotEqual(one, two)
+        self.assertEqual(cache_stats()["endpoints"]["devices-dashboard"], {"hits": 0, "misses": 2})
+        self.assertEqual(self.client.get(url + str(first.id)).json(), one)
+
+
+class RollupTests(SyntheticLogTestCase):
+    def rollups(self, scan):
+        rows = PacketRollup.objects.filter(scan=scan).order_by("sourcemac", "bucket_start").values_list(
+            "device_id", "sourcemac", "bucket_start", "packets", "bytes", "min_signal", "avg_signal",
+            "max_signal", "signal_count", "frequencies", "min_lat", "max_lat", "min_lon", "max_lon",
+        )
+        return [row[:6] + (round(row[6], 6) if row[6] is not None else None,) + row[7:] for row in rows]
+
+    def test_chunked_writes_merge_into_the_same_rollups(self):
+        path = self.make_log(packets=3000)
+        scan = import_kismet_file(path, chunk_sizes={"packets": 37})
+        chunked = self.rollups(scan)
+
+        # One write of every packet, with nothing to merge
+        self.assertEqual(rebuild_rollups(scan), 3000)
+        self.assertEqual(chunked, self.rollups(scan))
+        self.assertEqual(sum(row[3] for row in chunked), 3000)
+
+
+class DashboardTests(SyntheticLogTestCase):
+    def test_top_limits_manufacturer_sections(self):
+        import_kismet_file(self.make_log())
+        url = "/api/devices/dashboard/?sections=top_manufacturers,avg_signal_manufacturer"
+        everything = self.client.get(url + "&top=1000").json()
+        self.assertGreater(len(everything["top_manufacturers"]), 2)
+
+        data = self.client.get(url + "&top=2").json()
+        self.assertEqual(data["top_manufacturers"], everything["top_manufacturers"][:2])
+        self.assertEqual(len(data["avg_signal_manufacturer"]), 2)
+
+
+class PaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.scan = Scan.objects.create(name="pagination")
+        start = datetime(2025, 12, 26, tzinfo=dt_timezone.utc)
+        # Runs of packets sharing a timestamp, so pages break inside a run
+        Packet.objects.bulk_create(
+            Packet(scan=cls.scan, ts_sec=int(start.timestamp()) + i // 9, ts_usec=0,
+                   timestamp=start + timedelta(seconds=i // 9))
+            for i in range(60)
+        )
+        cls.ids = list(
+            Packet.objects.filter(scan=cls.scan).order_by("timestamp", "id").values_list("id", flat=True)
+        )
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursors_walk_equal_timestamps_forwards_and_back(self):
+        pages = []
+        url = f"/api/packets/?scan_id={self.scan.id}&limit=7&fields=id"
+        while url:
+            page = self.get(url)
+            pages.append([row["id"] for row in page["results"]])
+            url = page["next"]
+        self.assertEqual([pk for page in pages for pk in page], self.ids)
+        self.assertNotIn("count", page)
+
+        previous = page["previous"]
+        for expected in reversed(pages[:-1]):
+            page = self.get(previous)
+            self.assertEqual([row["id"] for row in page["results"]], expected)
+            previous = page["previous"]
+        self.assertIsNone(previous)
+
+    def test_offset_keeps_limit_offset_pages(self):
+        page = self.get(f"/api/packets/?scan_id={self.scan.id}&limit=5&offset=10&fields=id")
+        self.assertEqual(page["count"], 60)
+        self.assertEqual([row["id"] for row in page["results"]], self.ids[10:15])
+        self.assertIn("offset=15", page["next"])
+        self.assertIn("offset=5", page["previous"])
+
+    def test_ordering_parameter_keeps_limit_offset_pages(self):
+        page = self.get(f"/api/packets/?scan_id={self.scan.id}&limit=5&ordering=-id&fields=id")
+        self.assertEqual([row["id"] for row in page["results"]], sorted(self.ids, reverse=True)[:5])
+        self.assertIn("offset=5", page["next"])
+
+    def test_cursors_walk_past_nulls(self):
+        seen = datetime(2025, 12, 26, tzinfo=dt_timezone.utc)
+        # Runs of equal last_seen, with NULLs in between
+        KnownDevice.objects.bulk_create(
+            KnownDevice(devmac=f"00:00:00:00:00:{i:02x}", last_seen=seen + timedelta(seconds=i // 6) if i % 3 else None)
+            for i in range(30)
+        )
+        stored = KnownDevice.objects.all()
+        expected = [
+            known.pk for known in sorted(stored, key=lambda k: (k.last_seen is None, k.last_seen or seen, k.pk))
+        ]
+
+        class LastSeenPagination(KeysetPagination):
+            ordering = ("last_seen", "id")
+
+        def page(url):
+            paginator = LastSeenPagination()
+            rows = paginator.paginate_queryset(KnownDevice.objects.all(), Request(APIRequestFactory().get(url)))
+            return [row.pk for row in rows], paginator
+
+        pages = []
+        url = "/?limit=4"
+        while url:
+            rows, paginator = page(url)
+            pages.append(rows)
+            url = paginator.get_next_link()
+        self.assertEqual([pk for rows in pages for pk in rows], expected)
+
+        previous = paginator.get_previous_link()
+        for rows in reversed(pages[:-1]):
+            back, paginator = page(previous)
+            self.assertEqual(back, rows)
+            previous = paginator.get_previous_link()
+        self.assertIsNone(previous)
+
+
+def _radiotap_frame(source, signal):
+    radiotap = struct.pack("<BBHIb", 0, 0, 9, 1 << 5, signal)
+    dot11 = bytes([0x80, 0, 0, 0]) + b"\xff" * 6 + source + source + b"\0\0"
+    return radiotap + dot11
+
+
+class PcapImportTests(SyntheticLogTestCase):
+    def write_pcap(self, name, frames, append=False):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "ab" if append else "wb") as f:
+            if not append:
+                f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 127))
+            for ts_sec, frame in frames:
+                f.write(struct.pack("<IIII", ts_sec, 0, len(frame), len(frame)) + frame)
+        return path
+
+    def frames(self, first, count):
+        return [
+            (1766717600 + i, _radiotap_frame(bytes([0x02, 0, 0, 0, 0, i % 7]), -40 - i % 30))
+            for i in range(first, first + count)
+        ]
+
+    def test_reimport_resolves_the_same_scan(self):
+        path = self.write_pcap("capture.pcap", self.frames(0, 120))
+        scan = import_pcap_file(path, chunk_size=50)
+        self.assertEqual(scan.import_stats["packets"], 120)
+
+        again = import_pcap_file(path)
+        self.assertEqual((again.pk, again.import_stats["status"]), (scan.pk, "unchanged"))
+
+        self.write_pcap("capture.pcap", self.frames(120, 30), append=True)
+        grown = import_pcap_file(path, chunk_size=50)
+        self.assertEqual((grown.pk, grown.import_stats["status"]), (scan.pk, "grown"))
+        self.assertEqual(grown.import_stats["packets"], 30)
+
+        self.assertEqual(Scan.objects.count(), 1)
+        self.assertEqual(Packet.objects.filter(scan=scan).count(), 150)
+        self.assertEqual(sum(PacketRollup.objects.filter(scan=scan).values_list("packets", flat=True)), 150)
+
+    def test_undecodable_frames_are_skipped(self):
+        frames = self.frames(0, 10)
+        frames[3] = (frames[3][0], b"\0\0\x05")  # radiotap header cut short
+        path = self.write_pcap("broken.pcap", frames)
+        decode_frame = parser.decode_frame
+
+        def fail_on_signal_minus_45(linktype, data):
+            if data[8:9] == struct.pack("b", -45):
+                raise struct.error("unpack requires a buffer of 4 bytes")
+            return decode_frame(linktype, data)
+
+        with mock.patch.object(parser, "decode_frame", fail_on_signal_minus_45):
+            scan = import_pcap_file(path)
+        self.assertEqual((scan.import_stats["packets"], scan.import_stats["skipped"]), (8, 2))
+
+    def test_captures_cut_short_after_the_magic_have_no_frames(self):
+        for head in (b"\x0a\x0d\x0d\x0a", b"\x0a\x0d\x0d\x0a\x1c\x00", struct.pack("<I", 0xA1B2C3D4)):
+            self.assertEqual(list(iter_frames(io.BytesIO(head))), [])
+
+
+class HistogramTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.scan = Scan.objects.create(name="histogram")
+        start = datetime(2025, 12, 26, tzinfo=dt_timezone.utc)
+        signals = [-91, -90, -86, -85, -84, -50, -46, -45, -41, -40, -1, 0, 4, 5, None]
+        Packet.objects.bulk_create(
+            Packet(scan=cls.scan, ts_sec=int(start.timestamp()), timestamp=start, signal=signal)
+            for signal in signals
+        )
+
+    def histogram(self, query):
+        return self.client.get(f"/api/packets/histogram/?scan_id={self.scan.id}&field=signal&{query}")
+
+    def test_bins_start_at_multiples_of_width(self):
+        data = self.histogram("width=5").json()
+        self.assertEqual(data["bins"], [
+            {"bin": -95, "count": 1}, {"bin": -90, "count": 2}, {"bin": -85, "count": 2},
+            {"bin": -50, "count": 2}, {"bin": -45, "count": 2}, {"bin": -40, "count": 1},
+            {"bin": -5, "count": 1}, {"bin": 0, "count": 2}, {"bin": 5, "count": 1},
+        ])
+
+    def test_range_bounds_are_inclusive(self):
+        data = self.histogram("width=5&min=-90&max=-45").json()
+        self.assertEqual(sum(b["count"] for b in data["bins"]), 7)
+        self.assertEqual(data["bins"][0], {"bin": -90, "count": 2})
+
+    def test_thresholds_are_lower_bounds(self):
+        data = self.histogram("thresholds=-50,-85&labels=strong,medium,weak").json()
+        self.assertEqual(data["categories"], [
+            {"category": "strong", "count": 9}, {"category": "medium", "count": 2},
+            {"category": "weak", "count": 3},
+        ])
+
+    def test_non_finite_numbers_are_rejected(self):
+        for query in ("width=nan", "width=inf", "min=-inf", "max=NaN", "thresholds=-50,nan"):
+            with self.subTest(query=query):
+                response = self.histogram(query)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("not a finite number", response.json()["error"])
+
+
+class PurgeTests(SyntheticLogMixin, TransactionTestCase):
+    # Dropping a partition needs the rows inserted into it committed first
+    def test_children_are_purged_before_their_parents(self):
+        for i, model in enumerate(PURGE_ORDER):
+            for field in model._meta.concrete_fields:
+                if field.is_relation and field.related_model in PURGE_ORDER:
+                    self.assertGreater(
+                        PURGE_ORDER.index(field.related_model), i,
+                        f"{model.__name__}.{field.name} points at a table purged before it",
+                    )
+
+    def test_purge_removes_one_scan_only(self):
+        kept = import_kismet_file(self.make_log("kept.kismet", seed=1), chunk_sizes={"packets": 1000})
+        purged = import_kismet_file(self.make_log("purged.kismet", seed=2), chunk_sizes={"packets": 1000})
+        kept_rows = {model: model.objects.filter(scan=kept).count() for model in PURGE_ORDER}
+        purged_rows = {model._meta.db_table: model.objects.filter(scan=purged).count() for model in PURGE_ORDER}
+        self.assertTrue(all(purged_rows[table] for table in ("packets", "packet_rollups", "clients", "devices")))
+
+        stages = []
+        deleted = purge_scan(purged.id, batch_size=700, vacuum=False,
+                             progress=lambda stage, done, total: stages.append((stage, done, total)))
+
+        self.assertEqual(deleted, purged_rows)
+        self.assertFalse(Scan.objects.filter(pk=purged.pk).exists())
+        for model in PURGE_ORDER:
+            self.assertFalse(model.objects.filter(scan_id=purged.id).exists(), model.__name__)
+            self.assertEqual(model.objects.filter(scan=kept).count(), kept_rows[model], model.__name__)
+        done = [d for _, d, _ in stages]
+        self.assertEqual(done, sorted(done))
+        self.assertEqual(done[-1], sum(purged_rows.values()))
+
+    def test_packets_partition_is_dropped(self):
+        if not packets_partitioned():
+            self.skipTest("packets is only partitioned on PostgreSQL")
+        scan = import_kismet_file(self.make_log(packets=500))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [partition_name(scan.id)])
+            self.assertTrue(cursor.fetchone()[0])
+            cursor.execute(f"SELECT COUNT(*) FROM {partition_name(scan.id)}")
+            self.assertEqual(cursor.fetchone()[0], 500)
+
+            purge_scan(scan.id, vacuum=False)
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [partition_name(scan.id)])
+            self.assertFalse(cursor.fetchone()[0])
+        self.assertEqual(Packet.objects.count(), 0)
+
+    def test_packet_pk_picks_out_one_row(self):
+        # The packets primary key is (id, scan_id) once partitioned
+        first = import_kismet_file(self.make_log("first.kismet", seed=1, packets=200))
+        second = import_kismet_file(self.make_log("second.kismet", seed=2, packets=200))
+        packet = Packet.objects.filter(scan=second).order_by("id").first()
+        self.assertEqual(Packet.objects.get(pk=packet.pk).scan_id, second.id)
+
+        packet.delete()
+        self.assertFalse(Packet.objects.filter(pk=packet.pk).exists())
+        self.assertEqual(Packet.objects.filter(scan=second).count(), 199)
+        self.assertEqual(Packet.objects.filter(scan=first).count(), 200)
+
+
+class RegistryTests(SyntheticLogTestCase):
+    def registry(self):
+        return dict(KnownDevice.objects.values_list("devmac", "scan_count"))
+
+    def test_scan_count_counts_each_scan_once(self):
+        # Same seed, so the same MACs, captured a day apart
+        first_path = self.make_log("first.kismet", packets=1000)
+        second_path = self.make_log("second.kismet", packets=1000, start_ts=1766717600 + 86400)
+        first = import_kismet_file(first_path, chunk_sizes={"devices": 7})
+        second = import_kismet_file(second_path)
+        self.assertNotEqual(first.pk, second.pk)
+
+        registry = self.registry()
+        macs = set(Device.objects.filter(scan=first).values_list("devmac", flat=True))
+        self.assertTrue(macs)
+        self.assertEqual({registry[mac] for mac in macs}, {2})
+
+        import_kismet_file(first_path)
+        import_kismet_file(first_path, full=True, chunk_sizes={"devices": 11})
+        self.assertEqual(self.registry(), registry)
+
+        known = KnownDevice.objects.get(devmac=sorted(macs)[0])
+        self.assertEqual((known.first_scan_id, known.last_scan_id), (first.pk, second.pk))
+
+        rebuild_registry()
+        self.assertEqual(self.registry(), registry)
+
+        forget_scan(second.pk)
+        self.assertEqual({self.registry()[mac] for mac in macs}, {1})
+
+    def test_sql_merge_matches_python_merge(self):
+        # Imported newest first, so stored rows lose to the incoming ones
+        import_kismet_file(self.make_log("second.kismet", packets=500, start_ts=1766717600 + 86400))
+        import_kismet_file(self.make_log("first.kismet", packets=500))
+        fields = [field.attname for field in KnownDevice._meta.fields if field.name not in ("id", "updated_at")]
+        merged_in_sql = list(KnownDevice.objects.order_by("devmac").values_list(*fields))
+
+        with mock.patch.object(registry, "_UPSERT_VENDORS", ()):
+            rebuild_registry()
+        self.assertEqual(list(KnownDevice.objects.order_by("devmac").values_list(*fields)), merged_in_sql)
+
+
+class SparseFieldsTests(SyntheticLogTestCase):
+    def setUp(self):
+        self.scan = import_kismet_file(self.make_log(packets=500))
+        self.url = f"/api/devices/?scan_id={self.scan.id}&limit=20"
+
+    def test_list_leaves_raw_json_out_unless_asked(self):
+        device = self.client.get(self.url).json()["results"][0]
+        self.assertNotIn("device_json", device)
+        self.assertIn("scan_name", device)
+
+        detail = self.client.get(f"/api/devices/{device['id']}/").json()
+        self.assertIn("device_json", detail)
+        with_json = self.client.get(self.url + "&fields=id,device_json").json()["results"][0]
+        self.assertEqual(set(with_json), {"id", "device_json"})
+        self.assertEqual(with_json["device_json"], detail["device_json"])
+
+    def test_fields_load_only_their_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url + "&fields=id,devmac,scan_name")
+        rows = response.json()["results"]
+        self.assertEqual(len(rows), 20)
+        self.assertEqual({key for row in rows for key in row}, {"id", "devmac", "scan_name"})
+        self.assertEqual(rows[0]["scan_name"], self.scan.name)
+
+        select = next(q["sql"] for q in queries.captured_queries if '"devices"' in q["sql"])
+        self.assertEqual(len([q for q in queries.captured_queries if '"devices"' in q["sql"]]), 1)
+        self.assertIn('"scans"."name"', select)
+        for column in ("device_json", "ssid", "strongest_signal"):
+            self.assertNotIn(f'"devices"."{column}"', select)
+
+    def test_exclude_and_unknown_fields(self):
+        device = self.client.get(self.url + "&exclude=scan_name,wigle_ref_data").json()["results"][0]
+        self.assertNotIn("scan_name", device)
+        self.assertNotIn("wigle_ref_data", device)
+        self.assertIn("devmac", device)
+
+        response = self.client.get(self.url + "&fields=id,bogus")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("bogus", response.json()["fields"])
+
+    def test_writes_ignore_field_selection(self):
+        device = Device.objects.filter(scan=self.scan).first()
+        response = self.client.patch(
+            f"/api/devices/{device.id}/?fields=id", {"ssid": "renamed"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["ssid"], "renamed")
+        self.assertIn("device_json", response.json())
@@ -1,14 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ScanViewSet, DeviceViewSet, DataSourceViewSet, AlertViewSet, PacketViewSet, ClientViewSet
+from .views import AnalyticsCacheViewSet, ScanViewSet, ImportRunViewSet, JobViewSet, DeviceViewSet, KnownDeviceViewSet, DataSourceViewSet, AlertViewSet, PacketViewSet, PacketRollupViewSet, ClientViewSet
 
 router = DefaultRouter()
 router.register(r'scans', ScanViewSet)
+router.register(r'import-runs', ImportRunViewSet)
+router.register(r'jobs', JobViewSet)
 router.register(r'devices', DeviceViewSet)
+router.register(r'known-devices', KnownDeviceViewSet)
 router.register(r'datasources', DataSourceViewSet)
 router.register(r'alerts', AlertViewSet)
 router.register(r'packets', PacketViewSet)
+router.register(r'packet-rollups', PacketRollupViewSet)
 router.register(r'clients', ClientViewSet)
+router.register(r'analytics-cache', AnalyticsCacheViewSet, basename='analytics-cache')
 
 urlpatterns = [
     path('api/', include(router.urls)),
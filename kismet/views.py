@@ -2,15 +2,108 @@ from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from .models import Scan, Device, DataSource, Alert, Packet, Client
+from rest_framework.permissions import SAFE_METHODS
+from .cache import bump_scan_versions, cache_response, scan_ids_param, stats as cache_stats
+from .jobs import enqueue_purge
+from .pagination import KeysetPagination, PacketPagination
+from .models import Scan, Device, KnownDevice, DataSource, Alert, Packet, PacketRollup, Client, ImportRun, Job
 from .serializers import (
-    ScanSerializer, DeviceSerializer, DataSourceSerializer, 
-    AlertSerializer, PacketSerializer, ClientSerializer
+    ScanSerializer, DeviceSerializer, KnownDeviceSerializer, DataSourceSerializer,
+    AlertSerializer, PacketSerializer, PacketRollupSerializer, ClientSerializer,
+    ImportRunSerializer, JobSerializer
 )
-from django.db.models import Avg, Count, Max, Min, Sum, F
-from django.db.models.functions import TruncDay, Round
+from .histogram import bin_counts, category_counts, numeric_fields
+from .rollup import ROLLUP_BUCKET_SECONDS, bucket_start
+from .summary import MergedSummary, refresh_summary, scan_summaries
+from django.db import transaction
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q, Sum, F
+from django.db.models.functions import Round
 from django.utils import timezone
 from django.conf import settings
+import math
+
+class HistogramMixin:
+    """
+    Adds a histogram action over any numeric field of the viewset's model,
+    binned in SQL (see kismet.histogram), on the viewset's own queryset:
+    ?field=signal&width=5[&min=&max=] for fixed-width bins, or
+    ?field=signal&thresholds=-50,-70,-85[&labels=a,b,c,d] for categories.
+    """
+
+    @action(detail=False, methods=['get'], url_path='histogram')
+    def histogram(self, request):
+        params = request.query_params
+        field = params.get('field')
+        allowed = numeric_fields(self.queryset.model)
+        if field not in allowed:
+            return Response({"error": f"field must be one of: {', '.join(allowed)}"}, status=400)
+
+        try:
+            min_value = _number(params.get('min'))
+            max_value = _number(params.get('max'))
+            data = {"field": field}
+            if params.get('thresholds'):
+                thresholds = [_number(t) for t in params['thresholds'].split(',')]
+                labels = params['labels'].split(',') if params.get('labels') else None
+                data["categories"] = category_counts(
+                    self.get_queryset(), field, thresholds, labels, min_value, max_value
+                )
+            else:
+                width = _number(params.get('width')) or 1
+                data["width"] = width
+                data["bins"] = bin_counts(self.get_queryset(), field, width, min_value, max_value)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(data)
+
+class ScanVersionMixin:
+    """
+    Calls scan_changed() with the scan of every object written through the
+    API, which moves the scan's cache version on (see kismet.cache).
+    """
+
+    def scan_changed(self, scan_id):
+        bump_scan_versions(scan_id)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.scan_changed(serializer.instance.scan_id)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_scan_id = serializer.instance.scan_id
+        super().perform_update(serializer)
+        for scan_id in {old_scan_id, serializer.instance.scan_id}:
+            self.scan_changed(scan_id)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        scan_id = instance.scan_id
+        super().perform_destroy(instance)
+        self.scan_changed(scan_id)
+
+class SparseFieldsViewMixin:
+    """
+    Loads only the columns of the fields a GET list or retrieve serializes
+    (see SparseFieldsMixin), plus the paginator's ordering.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method in SAFE_METHODS and self.action in ('list', 'retrieve'):
+            keep = getattr(self.paginator, 'ordering', ()) if self.action == 'list' else ()
+            queryset = self.get_serializer().load_only(queryset, keep)
+        return queryset
+
+def _number(value):
+    """Parses a query parameter as an int, or a float when it has a fraction."""
+    if value in (None, ''):
+        return None
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return int(number) if number.is_integer() else number
 
 class ScanViewSet(viewsets.ModelViewSet):
     queryset = Scan.objects.all().order_by('-id')
@@ -20,156 +113,219 @@ class ScanViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
     ordering_fields = ['id', 'name']
 
-class DeviceViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        # Scans waiting to be purged are already gone as far as the UI is concerned
+        return Scan.objects.exclude(
+            jobs__kind="purge", jobs__status__in=["queued", "running"]
+        ).order_by('-id')
+
+    def destroy(self, request, *args, **kwargs):
+        """Deletes the scan in a background purge job (see kismet.purge)."""
+        job = enqueue_purge(self.get_object())
+        return Response({"status": "purging", "job_id": job.id}, status=202)
+
+class AnalyticsCacheViewSet(viewsets.ViewSet):
+    """Hit and miss counters of the chart and map response cache (kismet.cache)."""
+
+    def list(self, request):
+        return Response(cache_stats())
+
+class ImportRunViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ImportRun.objects.all().order_by('-started_at')
+    serializer_class = ImportRunSerializer
+
+    def get_queryset(self):
+        queryset = ImportRun.objects.select_related('scan').order_by('-started_at')
+        scan_id = self.request.query_params.get('scan_id')
+        if scan_id:
+            queryset = queryset.filter(scan_id=scan_id)
+        return queryset
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Job.objects.all().order_by('-id')
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        queryset = Job.objects.all().order_by('-id')
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset
+
+class DeviceViewSet(HistogramMixin, SparseFieldsViewMixin, ScanVersionMixin, viewsets.ModelViewSet):
     queryset = Device.objects.all()
     serializer_class = DeviceSerializer
+    pagination_class = KeysetPagination
 
-    def get_queryset(self, request):
-        scan_ids = request.query_params.get('scan_id')
+    def get_queryset(self, request=None):
+        scan_ids = self._scan_ids(request or self.request)
         queryset = Device.objects.all()
 
-        if scan_ids:
-            scan_ids = [int(sid) for sid in scan_ids.split(',') if sid.isdigit()]
+        if scan_ids is not None:
             queryset = queryset.filter(scan_id__in=scan_ids)
 
         return queryset
 
+    def _scan_ids(self, request):
+        return scan_ids_param(request)
+
+    # Signal strength categories: lower bounds in dBm, strongest first
+    SIGNAL_THRESHOLDS = (-50, -70, -85)
+    SIGNAL_CATEGORIES = ('Strong', 'Medium', 'Weak', 'Very Weak')
+
+    # Sections of the dashboard action; all of them unless ?sections= picks some
+    DASHBOARD_SECTIONS = (
+        'stats', 'by_type', 'signal_distribution', 'signal_strength_distribution',
+        'avg_signal_manufacturer', 'devices_over_time', 'channel_usage', 'encryption_types',
+        'top_manufacturers', 'geolocation', 'new_vs_returning',
+    )
+
+    # Sections merged from the per-scan summaries (kismet.summary); the others
+    # are per device or depend on other scans, and query the devices
+    SUMMARY_SECTIONS = {
+        'stats', 'by_type', 'signal_distribution', 'signal_strength_distribution',
+        'avg_signal_manufacturer', 'devices_over_time', 'channel_usage', 'encryption_types',
+        'top_manufacturers',
+    }
+
+    def _top(self, request, default=10):
+        top = request.query_params.get('top', '')
+        return int(top) if top.isdigit() else default
+
+    def _summary(self, request):
+        return MergedSummary(scan_summaries(self._scan_ids(request)))
+
+    def _from_summary(self, name, summary, request):
+        if name == 'signal_distribution':
+            return summary.signal_histogram(5)  # 5 dBm bins
+        if name == 'signal_strength_distribution':
+            return summary.signal_categories(self.SIGNAL_THRESHOLDS, self.SIGNAL_CATEGORIES)
+        if name == 'avg_signal_manufacturer':
+            return summary.avg_signal_manufacturer(self._top(request))
+        if name == 'top_manufacturers':
+            return summary.top_manufacturers(self._top(request))
+        return getattr(summary, name)()
+
+    def _geolocation(self, devices):
+        return list(
+            devices.exclude(avg_lat__isnull=True, avg_lon__isnull=True)
+                .exclude(avg_lat=0, avg_lon=0)
+                .values('devkey', 'avg_lat', 'avg_lon', 'strongest_signal')
+        )
+
+    def _new_vs_returning(self, devices):
+        # New: the device's scan is where the registry first saw its MAC
+        first_seen_here = KnownDevice.objects.filter(
+            devmac=OuterRef('devmac'), first_scan_id=OuterRef('scan_id')
+        )
+        return (
+            devices.exclude(devmac__isnull=True)
+                .annotate(first_seen_here=Exists(first_seen_here))
+                .aggregate(
+                    new=Count('id', filter=Q(first_seen_here=True)),
+                    returning=Count('id', filter=Q(first_seen_here=False)),
+                )
+        )
+
+    def scan_changed(self, scan_id):
+        # The summary first, so no request caches the old one under the new version
+        refresh_summary(scan_id)
+        super().scan_changed(scan_id)
+
+    # --- Every Chart Dataset in One Request ---
+    @action(detail=False, methods=['get'], url_path='dashboard')
+    @cache_response('devices-dashboard', every_scan=True)
+    def dashboard(self, request):
+        sections = request.query_params.get('sections')
+        if sections:
+            sections = [name.strip() for name in sections.split(',') if name.strip()]
+            unknown = sorted(set(sections) - set(self.DASHBOARD_SECTIONS))
+            if unknown:
+                return Response({"error": f"Unknown sections: {', '.join(unknown)}"}, status=400)
+        else:
+            sections = self.DASHBOARD_SECTIONS
+
+        summary = self._summary(request) if self.SUMMARY_SECTIONS.intersection(sections) else None
+        devices = self.get_queryset(request)
+        data = {}
+        for name in sections:
+            if name in self.SUMMARY_SECTIONS:
+                data[name] = self._from_summary(name, summary, request)
+            else:
+                data[name] = getattr(self, f'_{name}')(devices)
+        return Response(data)
+
     @action(detail=False, methods=['get'], url_path='stats')
+    @cache_response('devices-stats')
     def stats(self, request):
-        total_scans = self.get_queryset(request).count()
-        access_points = self.get_queryset(request).filter(type__icontains='AP').count()
-        connected_clients = self.get_queryset(request).filter(type__icontains='Client').count()
-        avg_signal = self.get_queryset(request).aggregate(avg_signal=Avg('strongest_signal'))['avg_signal'] or 0
-
-        return Response({
-            'total_scans': total_scans,
-            'access_points': access_points,
-            'connected_clients': connected_clients,
-            'avg_signal': round(avg_signal, 2)
-        })
+        return Response(self._from_summary('stats', self._summary(request), request))
 
     # --- Devices by Type (APs vs Clients) ---
     # Chart Type: Pie / Donut
     @action(detail=False, methods=['get'], url_path='by-type')
+    @cache_response('devices-by-type')
     def devices_by_type(self, request):
-        data = list(
-            self.get_queryset(request)
-                .values('type')
-                .annotate(count=Count('id'))
-                .order_by('type')
-        )
-        return Response(data)
+        return Response(self._from_summary('by_type', self._summary(request), request))
 
     # --- Signal Strength Distribution ---
     # Chart Type: Histogram / Bar
     @action(detail=False, methods=['get'], url_path='signal-distribution')
+    @cache_response('devices-signal-distribution')
     def signal_distribution(self, request):
-        histogram = {}
-        for d in self.get_queryset(request).exclude(strongest_signal__isnull=True).values_list('strongest_signal', flat=True):
-            bin_val = 5 * (d // 5)  # 5 dBm bins
-            histogram[bin_val] = histogram.get(bin_val, 0) + 1
-        data = [{"bin": k, "count": v} for k, v in sorted(histogram.items())]
-        return Response(data)
+        return Response(self._from_summary('signal_distribution', self._summary(request), request))
 
     # --- Signal Strength Distribution ---
     # Chart Type: Pie & Bar Chart
     @action(detail=False, methods=['get'], url_path='signal-strength-distribution')
+    @cache_response('devices-signal-strength-distribution')
     def signal_strength_distribution(self, request):
-        devices = self.get_queryset(request).exclude(strongest_signal__isnull=True)
-
-        # Group signal into categories
-        categories = {'Strong': 0, 'Medium': 0, 'Weak': 0, 'Very Weak': 0}
-        for d in devices:
-            s = d.strongest_signal
-            if s >= -50:
-                categories['Strong'] += 1
-            elif s >= -70:
-                categories['Medium'] += 1
-            elif s >= -85:
-                categories['Weak'] += 1
-            else:
-                categories['Very Weak'] += 1
-
-        data = [{"category": k, "count": v} for k, v in categories.items()]
-        return Response(data)
+        return Response(self._from_summary('signal_strength_distribution', self._summary(request), request))
 
     # --- Average Signal by Manufacturer ---
     # Chart Type: Horizontal Bar
     @action(detail=False, methods=['get'], url_path='avg-signal-manufacturer')
+    @cache_response('devices-avg-signal-manufacturer')
     def avg_signal_by_manufacturer(self, request):
-        data = list(
-            self.get_queryset(request)
-                .filter(strongest_signal__lt=0)
-                .values('manufacturer', 'ssid')
-                .annotate(avg_signal=Avg('strongest_signal'))
-                .order_by('-avg_signal')[:10]
-        )
-        return Response(data)
+        return Response(self._from_summary('avg_signal_manufacturer', self._summary(request), request))
 
     # --- Devices over Time ---
     # Chart Type: Line Chart
     @action(detail=False, methods=['get'], url_path='devices-over-time')
+    @cache_response('devices-over-time')
     def devices_over_time(self, request):
-        data = list(
-            self.get_queryset(request)
-                .annotate(day=TruncDay('first_time'))
-                .values('day')
-                .annotate(count=Count('id'))
-                .order_by('day')
-        )
-        return Response(data)
+        return Response(self._from_summary('devices_over_time', self._summary(request), request))
 
     # --- Geolocation Map (Device Positions) ---
     # Chart Type: Scatter / Map Overlay
     @action(detail=False, methods=['get'], url_path='geolocation')
+    @cache_response('devices-geolocation')
     def geolocation(self, request):
-        data = list(
-            self.get_queryset(request)
-                .exclude(avg_lat__isnull=True, avg_lon__isnull=True)
-                .exclude(avg_lat=0, avg_lon=0)
-                .values('devkey', 'avg_lat', 'avg_lon', 'strongest_signal')
-        )
-        return Response(data)
+        return Response(self._geolocation(self.get_queryset(request)))
 
     # --- Channel Usage Distribution ---
     # Chart Type: Bar Chart
     @action(detail=False, methods=['get'], url_path='channel-usage')
+    @cache_response('devices-channel-usage')
     def channel_usage(self, request):
-        data = list(
-            self.get_queryset(request)
-                .values('channel')
-                .annotate(count=Count('id'))
-                .order_by('channel')
-        )
-        return Response(data)
+        return Response(self._from_summary('channel_usage', self._summary(request), request))
 
     # --- Encryption Type Distribution ---
     # Chart Type: Pie Chart
     @action(detail=False, methods=['get'], url_path='encryption-types')
+    @cache_response('devices-encryption-types')
     def encryption_types(self, request):
-        data = list(
-            self.get_queryset(request)
-                .values('encryption')
-                .annotate(count=Count('id'))
-                .order_by('-count')
-        )
-        return Response(data)
+        return Response(self._from_summary('encryption_types', self._summary(request), request))
 
     # --- Top Manufacturers by Device Count ---
     # Chart Type: Bar / Horizontal Bar
     @action(detail=False, methods=['get'], url_path='top-manufacturers')
+    @cache_response('devices-top-manufacturers')
     def top_manufacturers(self, request):
-        data = list(
-            self.get_queryset(request)
-                .exclude(manufacturer__isnull=True)
-                .values('manufacturer')
-                .annotate(count=Count('id'))
-                .order_by('-count')[:10]
-        )
-        return Response(data)
+        return Response(self._from_summary('top_manufacturers', self._summary(request), request))
 
     # Table: SSIDs seen multiple times in the same area
     @action(detail=False, methods=['get'], url_path='ssid-overlap')
+    @cache_response('devices-ssid-overlap')
     def ssid_overlap(self, request):
         data = list(
             self.get_queryset(request)
@@ -183,11 +339,9 @@ class DeviceViewSet(viewsets.ModelViewSet):
 
     # Line Chart / Table: Newly detected vs previously seen devices
     @action(detail=False, methods=['get'], url_path='new-vs-returning-devices')
+    @cache_response('devices-new-vs-returning', every_scan=True)
     def new_vs_returning(self, request):
-        devices = self.get_queryset(request)
-        new_count = devices.filter(first_time=F('last_time')).count()
-        returning_count = devices.exclude(first_time=F('last_time')).count()
-        return Response({"new": new_count, "returning": returning_count})
+        return Response(self._new_vs_returning(self.get_queryset(request)))
     
     @action(detail=True, methods=['get'], url_path='wigle-lookup')
     def wigle_lookup(self, request, pk=None):
@@ -216,6 +370,37 @@ class DeviceViewSet(viewsets.ModelViewSet):
                 "details": response.text
             }, status=response.status_code)
 
+class KnownDeviceViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = KnownDevice.objects.all()
+    serializer_class = KnownDeviceSerializer
+    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['devmac', 'last_ssid', 'manufacturer']
+    ordering_fields = ['first_seen', 'last_seen', 'scan_count']
+
+    def get_queryset(self):
+        queryset = KnownDevice.objects.all().order_by('-last_seen')
+        devmac = self.request.query_params.get('devmac')
+        if devmac:
+            queryset = queryset.filter(devmac=devmac.upper())
+        min_scans = self.request.query_params.get('min_scans')
+        if min_scans and min_scans.isdigit():
+            queryset = queryset.filter(scan_count__gte=int(min_scans))
+        return queryset
+
+    # Table: every scan a MAC was seen in
+    @action(detail=True, methods=['get'], url_path='history')
+    def history(self, request, pk=None):
+        known = self.get_object()
+        data = list(
+            Device.objects.filter(devmac=known.devmac)
+                .values(
+                    'id', 'scan_id', 'scan__name', 'type', 'ssid',
+                    'first_time', 'last_time', 'strongest_signal', 'avg_lat', 'avg_lon',
+                )
+                .order_by('first_time')
+        )
+        return Response(data)
+
 class DataSourceViewSet(viewsets.ModelViewSet):
     queryset = DataSource.objects.all()
     serializer_class = DataSourceSerializer
@@ -260,20 +445,87 @@ class AlertViewSet(viewsets.ModelViewSet):
             "recent_alerts": latest_alerts,
         })
 
-class PacketViewSet(viewsets.ModelViewSet):
+class PacketViewSet(HistogramMixin, SparseFieldsViewMixin, viewsets.ModelViewSet):
     queryset = Packet.objects.all()
     serializer_class = PacketSerializer
+    pagination_class = PacketPagination
 
     def get_queryset(self):
-        queryset = Snapshot.objects.all()
+        queryset = Packet.objects.all()
         scan_id = self.request.query_params.get('scan_id')
         if scan_id:
             queryset = queryset.filter(scan_id=scan_id)
         return queryset
 
-class ClientViewSet(viewsets.ModelViewSet):
+class PacketRollupViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = PacketRollup.objects.all()
+    serializer_class = PacketRollupSerializer
+
+    def get_queryset(self):
+        queryset = PacketRollup.objects.all().order_by('bucket_start', 'id')
+        scan_ids = self.request.query_params.get('scan_id')
+        if scan_ids:
+            scan_ids = [int(sid) for sid in scan_ids.split(',') if sid.isdigit()]
+            queryset = queryset.filter(scan_id__in=scan_ids)
+        device_id = self.request.query_params.get('device_id')
+        if device_id:
+            queryset = queryset.filter(device_id=device_id)
+        return queryset
+
+    # --- Packets over Time (survives raw packet retention) ---
+    # Chart Type: Line Chart
+    @action(detail=False, methods=['get'], url_path='timeline')
+    def timeline(self, request):
+        try:
+            interval = int(request.query_params.get('interval', ROLLUP_BUCKET_SECONDS))
+        except ValueError:
+            return Response({"error": "interval must be a number of seconds"}, status=400)
+        # Buckets cannot be split, so round up to whole rollup buckets
+        interval = max(1, -(-interval // ROLLUP_BUCKET_SECONDS)) * ROLLUP_BUCKET_SECONDS
+
+        rows = (
+            self.get_queryset()
+                .values('bucket_start')
+                .annotate(
+                    packets=Sum('packets'),
+                    bytes=Sum('bytes'),
+                    min_signal=Min('min_signal'),
+                    max_signal=Max('max_signal'),
+                    signal_total=Sum(F('avg_signal') * F('signal_count')),
+                    signal_count=Sum('signal_count'),
+                )
+                .order_by('bucket_start')
+        )
+
+        timeline = {}
+        for row in rows:
+            epoch = int(row['bucket_start'].timestamp())
+            start = epoch - epoch % interval
+            point = timeline.get(start)
+            if point is None:
+                timeline[start] = dict(row, bucket_start=bucket_start(start))
+                continue
+            point['packets'] += row['packets']
+            point['bytes'] += row['bytes']
+            point['signal_total'] = (point['signal_total'] or 0) + (row['signal_total'] or 0)
+            point['signal_count'] += row['signal_count']
+            if row['min_signal'] is not None:
+                point['min_signal'] = min(x for x in (point['min_signal'], row['min_signal']) if x is not None)
+            if row['max_signal'] is not None:
+                point['max_signal'] = max(x for x in (point['max_signal'], row['max_signal']) if x is not None)
+
+        data = []
+        for point in timeline.values():
+            signal_total = point.pop('signal_total')
+            count = point.pop('signal_count')
+            point['avg_signal'] = round(signal_total / count, 2) if count else None
+            data.append(point)
+        return Response({"interval": interval, "points": data})
+
+class ClientViewSet(HistogramMixin, SparseFieldsViewMixin, ScanVersionMixin, viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         queryset = Client.objects.all()
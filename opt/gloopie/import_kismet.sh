@@ -5,6 +5,12 @@ LOG_DIR="opt/gloopie"
 VENV_ACTIVATE="venv/bin/activate"
 SLEEP_AFTER_STOP=2
 
+# --stop-only: stop Kismet and print LATEST_DB=<path> for a background import job
+STOP_ONLY=0
+if [[ "${1:-}" == "--stop-only" ]]; then
+    STOP_ONLY=1
+fi
+
 if [[ -f "$VENV_ACTIVATE" ]]; then
     source "$VENV_ACTIVATE"
 fi
@@ -28,6 +34,11 @@ if [[ -z "$LATEST_DB" ]]; then
     exit 1
 fi
 
+if [[ "$STOP_ONLY" -eq 1 ]]; then
+    echo "LATEST_DB=$LATEST_DB"
+    exit 0
+fi
+
 echo ">>> Importing latest file: $LATEST_DB"
 python manage.py import_kismet "$LATEST_DB"
 echo ">>> Import completed successfully."
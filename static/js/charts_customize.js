@@ -16,6 +16,19 @@ const chartColors = [
   "#6633CC"  // deep purple
 ];
 
+// Chart drawn on each canvas, by canvas id: a canvas still holding a chart
+// must have it destroyed before a new one is drawn on it
+const charts = {};
+
+function drawChart(canvasId, config) {
+    if (charts[canvasId]) {
+        charts[canvasId].destroy();
+    }
+    const ctx = document.getElementById(canvasId).getContext('2d');
+    charts[canvasId] = new Chart(ctx, config);
+    return charts[canvasId];
+}
+
 async function loadScanOptions() {
     try {
         const res = await fetch('/api/scans/');
@@ -63,25 +76,43 @@ document.getElementById('applyFilters').addEventListener('click', () => {
     refreshDashboard(selected);
 });
 
+// Every chart section the page draws, fetched in one request
+const DASHBOARD_SECTIONS = [
+    'stats', 'avg_signal_manufacturer', 'by_type', 'encryption_types', 'channel_usage',
+    'signal_distribution', 'signal_strength_distribution', 'geolocation',
+    'top_manufacturers', 'new_vs_returning'
+];
+
 async function refreshDashboard(scanIds = []) {
+    let data;
+    try {
+        const res = await fetch(`/api/devices/dashboard/?top=10&sections=${DASHBOARD_SECTIONS.join(',')}&scan_id=${scanIds.join(',')}`);
+        data = await res.json();
+    } catch (err) {
+        console.error("Failed to load dashboard:", err);
+        return;
+    }
     await Promise.all([
-        loadStats(scanIds),
-        loadAvgSignalByManufacturer(10, scanIds),
-        loadDeviceTypePie(scanIds),
-        loadEncryptionPie(scanIds),
-        loadChannelUsageChart(scanIds),
-        loadSignalDistribution(scanIds),
-        loadSignalStrengthCharts(scanIds),
-        loadGeolocationMap(scanIds),
-        loadTopManufacturersChart(scanIds)
+        loadStats(scanIds, data.stats),
+        loadAvgSignalByManufacturer(10, scanIds, data.avg_signal_manufacturer),
+        loadDeviceTypePie(scanIds, data.by_type),
+        loadEncryptionPie(scanIds, data.encryption_types),
+        loadChannelUsageChart(scanIds, data.channel_usage),
+        loadSignalDistribution(scanIds, data.signal_distribution),
+        loadSignalStrengthCharts(scanIds, data.signal_strength_distribution),
+        loadGeolocationMap(scanIds, data.geolocation),
+        loadTopManufacturersChart(scanIds, data.top_manufacturers),
+        loadNewVsReturning(scanIds, data.new_vs_returning)
     ]);
 }
 
 
-async function loadStats(scanIds = []) {
+async function loadStats(scanIds = [], data = null) {
     try {
-        const res = await fetch(`/api/devices/stats/?scan_id=${scanIds.join(',')}`);
-        const data = await res.json();
+        if (!data) {
+            const res = await fetch(`/api/devices/stats/?scan_id=${scanIds.join(',')}`);
+            data = await res.json();
+        }
         document.getElementById("total-scans").textContent = data.total_scans;
         document.getElementById("access-points").textContent = data.access_points;
         document.getElementById("connected-clients").textContent = data.connected_clients;
@@ -90,22 +121,18 @@ async function loadStats(scanIds = []) {
         console.error("Failed to load stats:", err);
     }
 }
-loadStats();
 
-async function loadAvgSignalByManufacturer(top = 10, scanIds = []) {
+async function loadAvgSignalByManufacturer(top = 10, scanIds = [], json = null) {
     try {
-        const res = await fetch(`/api/devices/avg-signal-manufacturer/?top=${top}&scan_id=${scanIds.join(',')}`);
-        const json = await res.json();
+        if (!json) {
+            const res = await fetch(`/api/devices/avg-signal-manufacturer/?top=${top}&scan_id=${scanIds.join(',')}`);
+            json = await res.json();
+        }
         const labels = json.map(item => item.manufacturer || "Unknown");
         const data = json.map(item => Math.round(item.avg_signal));
         const colors = labels.map((_, i) => chartColors[i % chartColors.length]);
-        const ctx = document.getElementById('avgSignalManufacturerChart').getContext('2d');
-        
-        if (window.avgSignalChart) {
-            window.avgSignalChart.destroy();
-        }
 
-        window.avgSignalChart = new Chart(ctx, {
+        drawChart('avgSignalManufacturerChart', {
             type: 'bar',
             data: {
                 labels: labels,
@@ -184,17 +211,17 @@ async function loadAvgSignalByManufacturer(top = 10, scanIds = []) {
         console.error("Failed to load average signal by manufacturer:", err);
     }
 }
-loadAvgSignalByManufacturer(10);
 
-async function loadDeviceTypePie(scanIds = []) {
+async function loadDeviceTypePie(scanIds = [], json = null) {
     try {
-        const res = await fetch(`/api/devices/by-type/?scan_id=${scanIds.join(',')}`);
-        const json = await res.json();
+        if (!json) {
+            const res = await fetch(`/api/devices/by-type/?scan_id=${scanIds.join(',')}`);
+            json = await res.json();
+        }
         const labels = json.map(item => item.type || "Unknown");
         const data = json.map(item => item.count);
 
-        const ctx = document.getElementById('deviceTypePieChart').getContext('2d');
-        new Chart(ctx, {
+        drawChart('deviceTypePieChart', {
             type: 'pie',
             data: {
                 labels: labels,
@@ -249,19 +276,19 @@ async function loadDeviceTypePie(scanIds = []) {
         console.error("Failed to load device type pie chart:", err);
     }
 }
-loadDeviceTypePie();
 
 
-async function loadEncryptionPie(scanIds = []) {
-    const res = await fetch(`/api/devices/encryption-types/?scan_id=${scanIds.join(',')}`);
-    const json = await res.json();
+async function loadEncryptionPie(scanIds = [], json = null) {
+    if (!json) {
+        const res = await fetch(`/api/devices/encryption-types/?scan_id=${scanIds.join(',')}`);
+        json = await res.json();
+    }
 
     // Extract labels and data
     const labels = json.map(item => item.encryption || 'Unknown');
     const data = json.map(item => item.count);
 
-    const ctx = document.getElementById('encryptionPieChart').getContext('2d');
-    new Chart(ctx, {
+    drawChart('encryptionPieChart', {
         type: 'pie',
         data: {
             labels: labels,
@@ -313,17 +340,17 @@ async function loadEncryptionPie(scanIds = []) {
         }
     });
 }
-loadEncryptionPie();
 
-async function loadChannelUsageChart(scanIds = []) {
-    const res = await fetch(`/api/devices/channel-usage/?scan_id=${scanIds.join(',')}`);
-    const json = await res.json();
+async function loadChannelUsageChart(scanIds = [], json = null) {
+    if (!json) {
+        const res = await fetch(`/api/devices/channel-usage/?scan_id=${scanIds.join(',')}`);
+        json = await res.json();
+    }
 
     const labels = json.map(item => `CH ${item.channel}`);
     const data = json.map(item => item.count);
 
-    const ctx = document.getElementById('channelUsageChart').getContext('2d');
-    new Chart(ctx, {
+    drawChart('channelUsageChart', {
         type: 'bar',
         data: {
             labels: labels,
@@ -414,16 +441,16 @@ async function loadChannelUsageChart(scanIds = []) {
         }
     });
 }
-loadChannelUsageChart();
 
-async function loadSignalDistribution(scanIds = []) {
-    const res = await fetch(`/api/devices/signal-distribution/?scan_id=${scanIds.join(',')}`);
-    const json = await res.json();
+async function loadSignalDistribution(scanIds = [], json = null) {
+    if (!json) {
+        const res = await fetch(`/api/devices/signal-distribution/?scan_id=${scanIds.join(',')}`);
+        json = await res.json();
+    }
     const bins = json.map(d => d.bin);
     const counts = json.map(d => d.count);
 
-    const ctx = document.getElementById('signalDistributionChart').getContext('2d');
-    new Chart(ctx, {
+    drawChart('signalDistributionChart', {
         type: 'bar',
         data: {
             labels: bins.map(b => `${b} dBm`),
@@ -492,16 +519,16 @@ async function loadSignalDistribution(scanIds = []) {
         }
     });
 }
-loadSignalDistribution();
 
-async function loadSignalStrengthCharts(scanIds = []) {
-    const res = await fetch(`/api/devices/signal-strength-distribution/?scan_id=${scanIds.join(',')}`);
-    const json = await res.json();
+async function loadSignalStrengthCharts(scanIds = [], json = null) {
+    if (!json) {
+        const res = await fetch(`/api/devices/signal-strength-distribution/?scan_id=${scanIds.join(',')}`);
+        json = await res.json();
+    }
     const labels = json.map(d => d.category);
     const values = json.map(d => d.count);
 
-    const pieCtx = document.getElementById('signalPieChart').getContext('2d');
-    new Chart(pieCtx, {
+    drawChart('signalPieChart', {
         type: 'pie',
         data: {
             labels: labels,
@@ -552,11 +579,12 @@ async function loadSignalStrengthCharts(scanIds = []) {
         }
     });
 }
-loadSignalStrengthCharts();
 
-async function loadGeolocationMap(scanIds = []) {
-    const res = await fetch(`/api/devices/geolocation/?scan_id=${scanIds.join(',')}`);
-    const json = await res.json();
+async function loadGeolocationMap(scanIds = [], json = null) {
+    if (!json) {
+        const res = await fetch(`/api/devices/geolocation/?scan_id=${scanIds.join(',')}`);
+        json = await res.json();
+    }
     const dataPoints = json.map(item => ({
         x: parseFloat(item.avg_lon),
         y: parseFloat(item.avg_lat),
@@ -564,8 +592,7 @@ async function loadGeolocationMap(scanIds = []) {
         devkey: item.devkey
     }));
 
-    const ctx = document.getElementById('geolocationChart').getContext('2d');
-    new Chart(ctx, {
+    drawChart('geolocationChart', {
         type: 'scatter',
         data: {
             datasets: [{
@@ -665,12 +692,12 @@ async function loadGeolocationMap(scanIds = []) {
         }
     });
 }
-loadGeolocationMap();
 
-async function loadTopManufacturersChart(scanIds = []) {
-    const res = await fetch(`/api/devices/top-manufacturers/?scan_id=${scanIds.join(',')}`);
-    const json = await res.json();
-    const ctx = document.getElementById('topManufacturersChart').getContext('2d');
+async function loadTopManufacturersChart(scanIds = [], json = null) {
+    if (!json) {
+        const res = await fetch(`/api/devices/top-manufacturers/?scan_id=${scanIds.join(',')}`);
+        json = await res.json();
+    }
 
     const datasets = json.map((item, i) => ({
         label: item.manufacturer || "Unknown",
@@ -680,7 +707,7 @@ async function loadTopManufacturersChart(scanIds = []) {
         borderWidth: 2
     }));
 
-    new Chart(ctx, {
+    drawChart('topManufacturersChart', {
         type: 'bar',
         data: {
             labels: ['Manufacturers'],
@@ -770,14 +797,14 @@ async function loadTopManufacturersChart(scanIds = []) {
         }
     });
 }
-loadTopManufacturersChart();
 
-async function loadNewVsReturning(scanIds = []) {
-    const res = await fetch(`/api/devices/new-vs-returning-devices/?scan_id=${scanIds.join(',')}`);
-    const json = await res.json();
+async function loadNewVsReturning(scanIds = [], json = null) {
+    if (!json) {
+        const res = await fetch(`/api/devices/new-vs-returning-devices/?scan_id=${scanIds.join(',')}`);
+        json = await res.json();
+    }
 
-    const ctx = document.getElementById('newVsReturningChart').getContext('2d');
-    new Chart(ctx, {
+    drawChart('newVsReturningChart', {
         type: 'pie',
         data: {
             labels: ['New Devices', 'Returning Devices'],
@@ -828,4 +855,4 @@ async function loadNewVsReturning(scanIds = []) {
         }
     });
 }
-loadNewVsReturning();
+refreshDashboard();
@@ -59,13 +59,45 @@ async function runKismet() {
 async function stopKismet() {
    const res = await fetch('api/stop_kismet/');
    const data = await res.json();
-   if (data.status === 'stopped') {
+   if (data.status === 'stopping') {
       stopLogStreaming();
       document.getElementById("openKismetUI").classList.add("hidden");
+      pollImportJob(data.job_id);
    } else {
       alert(data.error || "Failed to stop Kismet");
    }
 }
+
+let importJobInterval = null;
+
+function formatImportProgress(job) {
+   if (job.status === 'queued') return 'Import queued...';
+   if (job.status === 'failed') return `Import failed: ${job.error || 'unknown error'}`;
+   if (job.status === 'success') return `Import completed: ${job.rows_done} rows.`;
+   if (job.stage === 'stopping') return 'Stopping Kismet...';
+
+   const pct = job.rows_total ? Math.floor(100 * job.rows_done / job.rows_total) : 0;
+   const eta = job.eta_seconds != null ? ` - ETA ${Math.ceil(job.eta_seconds)}s` : '';
+   return `Importing ${job.stage || ''}: ${job.rows_done}/${job.rows_total} rows (${pct}%)${eta}`;
+}
+
+function pollImportJob(jobId) {
+   const logBox = document.getElementById('kismetLogs');
+   if (importJobInterval) clearInterval(importJobInterval);
+   importJobInterval = setInterval(async () => {
+      try {
+         const res = await fetch(`/api/jobs/${jobId}/`);
+         const job = await res.json();
+         logBox.value = formatImportProgress(job);
+         if (job.status === 'success' || job.status === 'failed') {
+            clearInterval(importJobInterval);
+            importJobInterval = null;
+         }
+      } catch (err) {
+         console.error('Error fetching import progress:', err);
+      }
+   }, 2000);
+}
 function startLogStreaming() {
    const logBox = document.getElementById('kismetLogs');
    stopLogStreaming();